@@ -8,12 +8,11 @@ ROOT_DIR = Path(__file__).resolve().parents[2]
 sys.path.insert(0, str(ROOT_DIR))
 
 from src.config import COLORS, PROCESSED_DIR
-from src.utils import load_dataframe
+from src.utils import load_dataframe, to_utc_datetime
 
-def load_data():
-    if "df_filtered" in st.session_state:
-        return st.session_state["df_filtered"]
-    
+PAGE_SIZES = [25, 50, 100, 200]
+
+def find_data_file():
     data_file = PROCESSED_DIR / "tweets_enriched.parquet"
     if not data_file.exists():
         # Fallback files
@@ -21,105 +20,113 @@ def load_data():
             if f.exists():
                 data_file = f
                 break
+    return data_file if data_file.exists() else None
+
+def add_datetime_columns(df):
+    """Dates converties une seule fois: filtre par période et affichage"""
+    if "created_at" in df.columns and "_created_date" not in df.columns:
+        created = to_utc_datetime(df["created_at"])
+        df = df.assign(_created_dt=created, _created_date=created.dt.date)
+    return df
+
+@st.cache_data(show_spinner="Chargement des tweets...")
+def load_tweets(path: str, mtime: float):
+    # mtime dans la clé de cache: rechargement si le fichier est régénéré
+    return add_datetime_columns(load_dataframe(Path(path)))
+
+@st.cache_data(show_spinner="Préparation des tweets filtrés...")
+def prepare_session_tweets(df):
+    # Frame filtré d'une autre page: dates converties une fois par contenu, pas à chaque rerun
+    return add_datetime_columns(df)
+
+def load_data():
+    if "df_filtered" in st.session_state:
+        return prepare_session_tweets(st.session_state["df_filtered"])
     
-    if data_file.exists():
-        return load_dataframe(data_file)
+    data_file = find_data_file()
+    if data_file is not None:
+        return load_tweets(str(data_file), data_file.stat().st_mtime)
     return None
 
-def get_badge_html(value, badge_type="sentiment"):
-    v = str(value).lower()
-    
-    badges = {
-        "sentiment": {
-            "positif": '<span class="badge-positif">Positif</span>',
-            "neutre": '<span class="badge-neutre">Neutre</span>',
-            "négatif": '<span class="badge-negatif">Négatif</span>'
-        },
-        "urgence": {
-            "faible": '<span class="badge-faible">Faible</span>',
-            "moyenne": '<span class="badge-moyenne">Moyenne</span>',
-            "élevée": '<span class="badge-elevee">Élevée</span>'
-        },
-        "churn": {
-            "modéré": '<span class="badge-elevee">Risque</span>',
-            "élevé": '<span class="badge-elevee">Risque</span>'
-        }
-    }
-    
-    if badge_type == "churn":
-        return badges["churn"].get(v, '<span class="badge-faible">Faible</span>')
-        
-    return badges.get(badge_type, {}).get(v, str(value))
+BADGE_LABELS = {
+    "sentiment": {"positif": "🟢 Positif", "neutre": "⚪ Neutre", "négatif": "🔴 Négatif"},
+    "urgence": {"faible": "🟢 Faible", "moyenne": "🟠 Moyenne", "élevée": "🔴 Élevée"},
+}
+
+HEADERS = {
+    "_created_dt": "Date", "screen_name": "Client", "text_translated_fr": "Tweet",
+    "text_clean": "Tweet", "motif": "Motif", "sentiment": "Sentiment",
+    "urgence": "Urgence", "is_churn_risk": "Churn"
+}
+
+def format_page(df_page, display_cols):
+    """Mise en forme des seules lignes de la page affichée"""
+    out = df_page[display_cols].copy()
+    if "_created_dt" in out.columns:
+        out["_created_dt"] = out["_created_dt"].dt.strftime("%Y-%m-%d %H:%M")
+    for badge_type in ("sentiment", "urgence"):
+        if badge_type in out.columns:
+            labels = out[badge_type].astype(str).str.lower().map(BADGE_LABELS[badge_type])
+            out[badge_type] = labels.fillna(out[badge_type])
+    if "is_churn_risk" in out.columns:
+        out["is_churn_risk"] = out["is_churn_risk"].map({True: "🔴 Risque", False: "🟢 Faible"})
+    for col in ("text_translated_fr", "text_clean"):
+        if col in out.columns:
+            text = out[col].astype("string")
+            out[col] = text.str.slice(0, 200) + text.str.len().gt(200).map({True: "...", False: ""})
+    return out.rename(columns=HEADERS)
 
-def render_tweet_table(df):
+def render_tweet_table(df, key=""):
     if len(df) == 0:
         st.info("Aucun tweet ne correspond aux filtres")
         return
     
-    cols = ["created_at", "screen_name", "text_translated_fr", "text_clean", "motif", "sentiment", "urgence", "is_churn_risk"]
+    cols = ["_created_dt", "screen_name", "text_translated_fr", "text_clean", "motif", "sentiment", "urgence", "is_churn_risk"]
     display_cols = [c for c in cols if c in df.columns]
     
     # Prefer translated text if available
     if "text_translated_fr" in display_cols and "text_clean" in display_cols:
         display_cols.remove("text_clean")
     
-    df_display = df[display_cols].copy()
-    
-    if len(df_display) > 1000:
-        st.warning(f"Affichage des 1000 premiers résultats sur {len(df_display)}")
-        df_display = df_display.head(1000)
-    
-    # CSS
-    st.markdown("""
-    <style>
-        .tweet-table { width: 100%; border-collapse: collapse; background: white; border-radius: 8px; overflow: hidden; }
-        .tweet-table th { background: #f3f4f6; padding: 12px; text-align: left; font-weight: 600; border-bottom: 2px solid #e5e7eb; }
-        .tweet-table td { padding: 12px; border-bottom: 1px solid #e5e7eb; font-size: 14px; }
-        .tweet-table tr:hover { background: #f9fafb; }
-        .tweet-text { max-width: 400px; word-wrap: break-word; }
-    </style>
-    """, unsafe_allow_html=True)
-    
-    html = '<table class="tweet-table"><thead><tr>'
-    
-    headers = {
-        "created_at": "Date", "screen_name": "Client", "text_translated_fr": "Tweet",
-        "text_clean": "Tweet", "motif": "Motif", "sentiment": "Sentiment",
-        "urgence": "Urgence", "is_churn_risk": "Churn"
-    }
-    
-    for col in display_cols:
-        html += f'<th>{headers.get(col, col)}</th>'
-    html += '</tr></thead><tbody>'
+    # Pagination: seule la page visible est mise en forme et envoyée au navigateur
+    c1, c2 = st.columns([1, 3])
+    page_size = c1.selectbox("Tweets par page", PAGE_SIZES, index=1)
+    n_pages = max(1, -(-len(df) // page_size))
+    # Clé liée aux filtres: retour à la page 1 quand la sélection change
+    page = c2.number_input(
+        f"Page (sur {n_pages})", min_value=1, max_value=n_pages, value=1, step=1,
+        key=f"page_{page_size}_{hash(key)}"
+    )
+    start = (int(page) - 1) * page_size
+    df_page = df.iloc[start:start + page_size]
+    
+    st.caption(f"Tweets {start + 1} à {start + len(df_page)} sur {len(df)}")
+    st.dataframe(
+        format_page(df_page, display_cols),
+        use_container_width=True,
+        hide_index=True,
+        column_config={"Tweet": st.column_config.TextColumn(width="large")}
+    )
+
+@st.cache_data(show_spinner="Génération du CSV...")
+def export_csv(df):
+    return df.drop(columns=["_created_dt", "_created_date"], errors="ignore").to_csv(index=False).encode("utf-8-sig")
+
+def render_download(df, filters):
+    # CSV généré uniquement à la demande (et mis en cache pour ces filtres)
+    if st.session_state.get("csv_filters") != filters:
+        st.session_state.pop("csv_filters", None)
+        if st.button("📄 Préparer l'export CSV"):
+            st.session_state["csv_filters"] = filters
+            st.rerun()
+        return
     
-    for _, row in df_display.iterrows():
-        html += "<tr>"
-        for col in display_cols:
-            val = row[col]
-            if pd.isna(val):
-                html += "<td>-</td>"
-                continue
-                
-            if col == "created_at":
-                try:
-                    html += f'<td>{pd.to_datetime(val).strftime("%Y-%m-%d %H:%M")}</td>'
-                except:
-                    html += f'<td>{val}</td>'
-            elif col == "sentiment":
-                html += f'<td>{get_badge_html(val, "sentiment")}</td>'
-            elif col == "urgence":
-                html += f'<td>{get_badge_html(val, "urgence")}</td>'
-            elif col == "is_churn_risk":
-                html += f'<td>{get_badge_html("élevé" if val else "faible", "churn")}</td>'
-            elif "text" in col:
-                text = str(val)[:200] + ("..." if len(str(val)) > 200 else "")
-                html += f'<td class="tweet-text">{text}</td>'
-            else:
-                html += f'<td>{val}</td>'
-        html += "</tr>"
-        
-    html += "</tbody></table>"
-    st.markdown(html, unsafe_allow_html=True)
+    st.download_button(
+        "📥 Télécharger (CSV)",
+        export_csv(df),
+        f"export_{datetime.now().strftime('%Y%m%d')}.csv",
+        "text/csv"
+    )
 
 def main():
     st.title("📋 Liste des Tweets")
@@ -132,56 +139,50 @@ def main():
     with st.sidebar:
         st.header("🔍 Filtres")
         
-        # Helper to add filter
+        # Filtres combinés en un seul masque (pas de copie du DataFrame à chaque filtre)
+        mask = pd.Series(True, index=df.index)
+        filters = {}
+        
         def add_filter(label, col):
             if col in df.columns:
-                opts = ["Tous"] + sorted(df[col].dropna().unique().tolist())
+                opts = ["Tous"] + sorted(df.loc[mask, col].dropna().unique().tolist())
                 sel = st.selectbox(label, opts)
                 return sel if sel != "Tous" else None
             return None
 
-        if f_client := add_filter("Client", "screen_name"):
-            df = df[df["screen_name"] == f_client]
-            
-        if f_motif := add_filter("Motif", "motif"):
-            df = df[df["motif"] == f_motif]
-            
-        if f_sent := add_filter("Sentiment", "sentiment"):
-            df = df[df["sentiment"] == f_sent]
-            
-        if f_urg := add_filter("Urgence", "urgence"):
-            df = df[df["urgence"] == f_urg]
+        for label, col in [("Client", "screen_name"), ("Motif", "motif"), ("Sentiment", "sentiment"), ("Urgence", "urgence")]:
+            if (sel := add_filter(label, col)) is not None:
+                mask &= df[col] == sel
+                filters[col] = sel
             
         if "is_churn_risk" in df.columns:
             churn_sel = st.selectbox("Risque churn", ["Tous", "Risque churn", "Pas de risque"])
             if churn_sel == "Risque churn":
-                df = df[df["is_churn_risk"] == True]
+                mask &= df["is_churn_risk"] == True
             elif churn_sel == "Pas de risque":
-                df = df[df["is_churn_risk"] == False]
+                mask &= df["is_churn_risk"] == False
+            filters["is_churn_risk"] = churn_sel
         
-        if "created_at" in df.columns:
-            d_min = pd.to_datetime(df["created_at"]).min().date()
-            d_max = pd.to_datetime(df["created_at"]).max().date()
+        dates = df.loc[mask, "_created_date"].dropna() if "_created_date" in df.columns else None
+        if dates is not None and len(dates) > 0:
+            d_min = dates.min()
+            d_max = dates.max()
             rng = st.date_input("Période", (d_min, d_max), min_value=d_min, max_value=d_max)
             
             if len(rng) == 2:
-                mask = (pd.to_datetime(df["created_at"]).dt.date >= rng[0]) & (pd.to_datetime(df["created_at"]).dt.date <= rng[1])
-                df = df[mask]
+                mask &= (df["_created_date"] >= rng[0]) & (df["_created_date"] <= rng[1])
+                filters["periode"] = tuple(rng)
+    
+    df = df[mask]
     
     st.metric("Nombre de tweets", len(df))
     st.markdown("---")
     
-    render_tweet_table(df)
+    render_tweet_table(df, key=str(sorted(filters.items())))
     
     if len(df) > 0:
         st.markdown("---")
-        csv = df.to_csv(index=False, encoding="utf-8-sig")
-        st.download_button(
-            "📥 Télécharger (CSV)",
-            csv,
-            f"export_{datetime.now().strftime('%Y%m%d')}.csv",
-            "text/csv"
-        )
+        render_download(df, filters)
 
 if __name__ == "__main__":
     main()
@@ -7,16 +7,29 @@ from fastapi.middleware.cors import CORSMiddleware
 from typing import List, Dict, Any, Optional
 import logging
 from datetime import datetime, date
-from collections import Counter
-import re
+import asyncio
 import json
 
 # Add project root to sys.path to import src modules
 ROOT_DIR = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT_DIR))
 
-from src.utils import load_dataframe
-from src.config import PROCESSED_DIR, COLORS
+from src.utils import load_dataframe, parquet_columns
+from src.alerts import SpikeDetector
+from src.cleaning import emoji_frequencies
+from src.examples import EXAMPLE_KINDS, build_examples, merge_examples, select_examples
+from src.facets import build_facet_cube, facet_counts, filter_options, merge_cubes
+from src.forecasting import ALL_MOTIFS, build_churn_forecasts, forecast_series, monthly_churn_rates
+from src.ingestion import (
+    DeltaSegment, add_topics, clean_fast, enrich_raw_tweets, get_local_model, load_ingested, records_to_frame
+)
+from src.serving import (
+    UNSERVED_COLUMNS, append_rows, build_indexes, prepare_serving_frame, read_serving_snapshot, snapshot_path,
+    write_serving_snapshot
+)
+from src.search_index import LEMMA_COLUMN, SearchIndex, lemma_texts
+from src.word_index import WordIndex, document_texts
+from src.config import PROCESSED_DIR, COLORS, INGEST_COMPACT_SECONDS, ALERTS_STATE_PATH, EXAMPLES_PER_BUCKET, TOPICS_PATH
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -33,12 +46,35 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global DataFrame
+# Global DataFrame (loaded dataset + compacted ingested batches)
 df_enriched = None
 
+# Tweets ingested since the last compaction (see /api/ingest)
+delta_segment = DeltaSegment()
+served_df = None
+
+# Precomputed per dataset version (see load_data), updated on ingestion
+facet_cube = None
+filters_cache = None
+churn_forecasts = {}
+word_index = None
+search_index = None
+examples_table = None
+
+# Topic keywords written by the pipeline topics stage (see src/topics.py)
+topics_info = {}
+
+# Hourly baselines and spikes, state persisted across loads (see src/alerts.py)
+spike_detector = SpikeDetector()
+# Served tweets of the hour still open in the detector (at or after spike_detector.next_hour)
+alert_tail = None
+
+# tweet_id of the served tweets: ingested duplicates are dropped without scanning the frame
+served_ids = set()
+
 def load_data():
-    """Load data from parquet files with fallback"""
-    global df_enriched
+    """Load data from the serving snapshot, or from parquet files with fallback"""
+    global df_enriched, spike_detector, topics_info
     try:
         data_file = PROCESSED_DIR / "tweets_enriched.parquet"
         if not data_file.exists():
@@ -56,61 +92,124 @@ def load_data():
             logger.error("No data file found!")
             return
             
-        logger.info(f"Loading data from {data_file}")
-        df = load_dataframe(data_file)
-        
-        # Ensure datetime
-        if "created_at" in df.columns:
-            df["created_at"] = pd.to_datetime(df["created_at"], errors="coerce", utc=True)
-            if df["created_at"].dt.tz is not None:
-                df["created_at"] = df["created_at"].dt.tz_convert(None)
-            df = df.dropna(subset=["created_at"])
-            df["date"] = df["created_at"].dt.date
-            df["week"] = df["created_at"].dt.to_period("W").astype(str)
-            df["month"] = df["created_at"].dt.to_period("M").astype(str)
-            df["hour"] = df["created_at"].dt.hour
-            
-        # Normalize column names (handle Capitalized names)
-        df.rename(columns={
-            "Motif": "motif",
-            "Sentiment": "sentiment",
-            "Urgence": "urgence",
-            "Risque_churn": "risque_churn",
-            "Risque Churn": "risque_churn"
-        }, inplace=True)
-            
-        # Normalize columns
-        if "sentiment" in df.columns:
-            df["sentiment_norm"] = df["sentiment"].astype(str).str.lower().map({
-                "positif": "Positif", "positive": "Positif",
-                "negatif": "Négatif", "négatif": "Négatif",
-                "neutre": "Neutre"
-            }).fillna("Neutre")
-        else:
-            df["sentiment_norm"] = "Neutre"
-
-        if "urgence" in df.columns:
-            df["is_urgent"] = df["urgence"].astype(str).str.contains("élev", case=False, na=False)
+        # Columns already derived and encoded by the pipeline: memory-mapped, no parsing
+        snapshot = snapshot_path(data_file)
+        served = read_serving_snapshot(snapshot, source=data_file)
+        if served is not None:
+            logger.info(f"Loading data from serving snapshot {snapshot}")
+            df, words, search = served
         else:
-            df["is_urgent"] = False
-
-        if "risque_churn" in df.columns:
-            df["churn_risk"] = df["risque_churn"].astype(str)
-        elif "is_churn_risk" in df.columns:
-            df["churn_risk"] = df["is_churn_risk"].apply(lambda x: "élevé" if x else "faible")
-        else:
-            df["churn_risk"] = "faible"
-        df["is_churn"] = df["churn_risk"].str.lower().str.contains("élev", na=False)
-            
+            logger.info(f"Loading data from {data_file}")
+            # Lemmas are only read for the search index, not served
+            columns = [c for c in parquet_columns(data_file) if c not in UNSERVED_COLUMNS or c == LEMMA_COLUMN]
+            df = prepare_serving_frame(load_dataframe(data_file, columns=columns))
+            words, search = build_indexes(df)
+            df = df.drop(columns=UNSERVED_COLUMNS, errors="ignore")
+            try:
+                write_serving_snapshot(df, snapshot, source=data_file, indexes=(words, search))
+            except OSError as e:
+                logger.warning(f"Serving snapshot not written: {e}")
+        
+        # Batches compacted by previous API runs (see /api/ingest)
+        ingested = load_ingested()
+        if ingested:
+            parts = prepare_serving_frame(pd.concat(ingested, ignore_index=True))
+            if "tweet_id" in df.columns:
+                parts = parts[~parts["tweet_id"].isin(df["tweet_id"])].drop_duplicates(subset=["tweet_id"])
+            words.add(document_texts(parts))
+            search.add(document_texts(parts), lemma_texts(parts))
+            df = append_rows(df, parts.drop(columns=UNSERVED_COLUMNS, errors="ignore"))
+            logger.info(f"{len(parts)} ingested tweets reloaded")
+        
         df_enriched = df
+        topics_info = load_topics()
+        # Only the hours after the previous load are added to the alert baselines
+        spike_detector = SpikeDetector.load(ALERTS_STATE_PATH)
+        refresh_aggregates(words=words, search=search)
+        spike_detector.save(ALERTS_STATE_PATH)
         logger.info(f"Data loaded successfully: {len(df)} rows")
         
     except Exception as e:
         logger.error(f"Error loading data: {e}")
 
+def load_topics() -> Dict[int, Dict]:
+    """Topic keywords and sizes by topic_id (read as JSON: the API does not load scikit-learn)"""
+    if not TOPICS_PATH.exists():
+        return {}
+    try:
+        return {t["topic_id"]: t for t in json.loads(TOPICS_PATH.read_text(encoding="utf-8"))["topics"]}
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Topics not loaded: {e}")
+        return {}
+
+def current_frame() -> Optional[pd.DataFrame]:
+    """Served tweets: df_enriched plus the delta segment (concatenated once per ingested batch)"""
+    global served_df
+    if served_df is None and df_enriched is not None:
+        # Ingested rows keep their pipeline-only columns until compaction, but are not served
+        delta = delta_segment.frame().drop(columns=UNSERVED_COLUMNS, errors="ignore")
+        served_df = append_rows(df_enriched, delta)
+    return served_df
+
+def refresh_aggregates(words: Optional[WordIndex] = None, search: Optional[SearchIndex] = None):
+    """
+    Recompute the aggregates derived from the served tweets (once per dataset version).
+    words, search: word and search indexes already built for these rows, rebuilt otherwise.
+    """
+    global served_df, facet_cube, filters_cache, churn_forecasts, word_index, search_index, examples_table, served_ids
+    served_df = None
+    df = current_frame()
+    facet_cube = build_facet_cube(df)
+    filters_cache = filter_options(facet_cube)
+    churn_forecasts = build_churn_forecasts(df) if "month" in df.columns else {}
+    examples_table = build_examples(df)
+    # Index rows follow the positions of current_frame()
+    if words is None:
+        words = WordIndex()
+        words.add(document_texts(df))
+    if search is None:
+        search = SearchIndex()
+        search.add(document_texts(df))
+    word_index, search_index = words, search
+    served_ids = set(df["tweet_id"]) if "tweet_id" in df.columns else set()
+    update_alerts(df)
+
+def update_alerts(df: pd.DataFrame):
+    """Add the hours of df to the alert baselines and keep the rows of the open hour for the next batch"""
+    global alert_tail
+    spike_detector.update(df)
+    if spike_detector.next_hour is None or "created_at" not in df.columns:
+        alert_tail = df.iloc[:0]
+    else:
+        alert_tail = df[df["created_at"] >= spike_detector.next_hour]
+
+def compact_delta() -> Optional[Path]:
+    """Write the delta segment to parquet and fold it into df_enriched"""
+    global df_enriched, churn_forecasts
+    if not len(delta_segment):
+        return None
+    df_enriched = current_frame()
+    path = delta_segment.compact()
+    spike_detector.save(ALERTS_STATE_PATH)
+    # Monthly forecasts are not updated per batch, only when the segment is compacted
+    churn_forecasts = build_churn_forecasts(df_enriched) if "month" in df_enriched.columns else {}
+    return path
+
+async def compaction_loop():
+    """Compact the delta segment once it is old enough, even without new batches"""
+    while True:
+        await asyncio.sleep(min(60, INGEST_COMPACT_SECONDS))
+        if delta_segment.compaction_due():
+            compact_delta()
+
 @app.on_event("startup")
 async def startup_event():
     load_data()
+    asyncio.create_task(compaction_loop())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    compact_delta()
 
 def apply_filters(
     df: pd.DataFrame,
@@ -146,20 +245,37 @@ def apply_filters(
         
     return filtered_df
 
+def tweet_records(df_page: pd.DataFrame) -> List[Dict[str, Any]]:
+    """JSON records of a page of tweets"""
+    df_page = df_page.copy()
+    
+    # Convert dates to string for JSON serialization
+    if "date" in df_page.columns:
+        df_page["date"] = df_page["date"].astype(str)
+    if "created_at" in df_page.columns:
+        df_page["created_at"] = df_page["created_at"].astype(str)
+        
+    # Safe serialization using pandas to_json
+    return json.loads(df_page.to_json(orient="records", date_format="iso"))
+
 @app.get("/api/filters")
-async def get_filters():
-    if df_enriched is None:
-        return {"min_date": None, "max_date": None, "motifs": [], "churn_risks": []}
+async def get_filters(
+    startDate: Optional[date] = None,
+    endDate: Optional[date] = None,
+    motif: Optional[str] = None,
+    sentiment: Optional[str] = None,
+    urgent: bool = False,
+    churn: Optional[str] = None
+):
+    if current_frame() is None or filters_cache is None:
+        return {"min_date": None, "max_date": None, "motifs": [], "churn_risks": [], "facets": {}}
     
-    motifs = sorted(df_enriched["motif"].dropna().unique().tolist()) if "motif" in df_enriched.columns else []
-    churn_risks = sorted(df_enriched["churn_risk"].dropna().unique().tolist()) if "churn_risk" in df_enriched.columns else []
+    filters = dict(start_date=startDate, end_date=endDate, motif=motif, sentiment=sentiment, urgent=urgent, churn=churn)
+    if not any(filters.values()):
+        return filters_cache
     
-    return {
-        "min_date": df_enriched["date"].min(),
-        "max_date": df_enriched["date"].max(),
-        "motifs": motifs,
-        "churn_risks": churn_risks
-    }
+    # Facet sizes for the current selection, from the cube (not the tweets)
+    return {**filters_cache, "facets": facet_counts(facet_cube, **filters)}
 
 @app.get("/api/kpis")
 async def get_kpis(
@@ -170,7 +286,7 @@ async def get_kpis(
     urgent: bool = False,
     churn: Optional[str] = None
 ):
-    df = apply_filters(df_enriched, startDate, endDate, motif, sentiment, urgent, churn)
+    df = apply_filters(current_frame(), startDate, endDate, motif, sentiment, urgent, churn)
     
     total = len(df)
     if total == 0:
@@ -218,7 +334,7 @@ async def get_wordcloud(
     urgent: bool = False,
     churn: Optional[str] = None
 ):
-    df = apply_filters(df_enriched, startDate, endDate, motif, sentiment, urgent, churn)
+    df = apply_filters(current_frame(), startDate, endDate, motif, sentiment, urgent, churn)
     
     # Use negative tweets for wordcloud if no sentiment specified, or use filtered df
     if sentiment is None or sentiment == "(Tous)":
@@ -229,20 +345,8 @@ async def get_wordcloud(
     if df_target.empty:
         return []
 
-    # Simple word extraction (splitting by space, removing short words)
-    # In a real app, use proper tokenization and stopword removal
-    text_col = "text_clean" if "text_clean" in df_target.columns else "full_text"
-    all_text = " ".join(df_target[text_col].astype(str).tolist()).lower()
-    words = re.findall(r'\w+', all_text)
-    
-    # Basic stop words (very limited list for demo)
-    stop_words = {'le', 'la', 'les', 'de', 'du', 'des', 'un', 'une', 'et', 'est', 'en', 'il', 'elle', 'que', 'qui', 'ce', 'ca', 'pour', 'sur', 'dans', 'pas', 'plus', 'mais', 'avec', 'tout', 'fait', 'faire', 'être', 'avoir', 'a', 'au', 'aux', 'ne', 'se', 'par', 'je', 'tu', 'nous', 'vous', 'ils', 'elles', 'mon', 'ma', 'mes', 'ton', 'ta', 'tes', 'son', 'sa', 'ses', 'notre', 'votre', 'leur', 'leurs', 'free', 'freemobile'}
-    
-    filtered_words = [w for w in words if len(w) > 3 and w not in stop_words]
-    counter = Counter(filtered_words)
-    
-    # Top 30 words
-    top_words = counter.most_common(30)
+    # Top 30 words, counted on the word index (row positions of the filtered tweets)
+    top_words = word_index.top_terms(df_target.index.to_numpy(), n=30)
     
     # Normalize sizes
     if not top_words:
@@ -275,7 +379,7 @@ async def get_volume(
     urgent: bool = False,
     churn: Optional[str] = None
 ):
-    df = apply_filters(df_enriched, startDate, endDate, motif, sentiment, urgent, churn)
+    df = apply_filters(current_frame(), startDate, endDate, motif, sentiment, urgent, churn)
     
     if df.empty:
         return []
@@ -309,37 +413,32 @@ async def get_churn_trend(
     urgent: bool = False,
     churn: Optional[str] = None
 ):
-    df = apply_filters(df_enriched, startDate, endDate, motif, sentiment, urgent, churn)
+    # Forecasts per motif are precomputed at load time; other filters need a refit
+    other_filters = [startDate, endDate, urgent] + [v for v in (sentiment, churn) if v != "(Tous)"]
+    if not any(other_filters):
+        key = motif if motif and motif != "(Tous)" else ALL_MOTIFS
+        series = churn_forecasts.get(key)
+    else:
+        df = apply_filters(current_frame(), startDate, endDate, motif, sentiment, urgent, churn)
+        if df.empty or "month" not in df.columns:
+            return []
+        series = forecast_series(monthly_churn_rates(df, by_motif=False), with_backtest=False)
     
-    if df.empty or "month" not in df.columns:
+    if not series:
         return []
-        
-    monthly = df.groupby("month").agg(
-        total=("is_churn", "count"),
-        churn=("is_churn", "sum")
-    ).reset_index()
-    
-    monthly["rate"] = (monthly["churn"] / monthly["total"] * 100).fillna(0)
     
-    result = []
-    for _, row in monthly.iterrows():
-        result.append({
-            "month": str(row["month"]),
-            "actual": round(row["rate"], 1),
-            "predicted": None
-        })
-        
-    # Add simple linear projection for next 2 months
-    if len(result) >= 2:
-        last_val = result[-1]["actual"]
-        prev_val = result[-2]["actual"]
-        trend = last_val - prev_val
-        
-        result.append({"month": "Next+1", "actual": None, "predicted": round(max(0, last_val + trend), 1)})
-        result.append({"month": "Next+2", "actual": None, "predicted": round(max(0, last_val + trend * 2), 1)})
-        
+    result = [{"month": p["month"], "actual": p["actual"], "predicted": None} for p in series["history"]]
+    result += [{"actual": None, **p} for p in series["forecast"]]
     return result
 
+@app.get("/api/churn-trend/backtest")
+async def get_churn_trend_backtest():
+    """Backtest of the churn forecasts on historical months, per motif"""
+    return {
+        motif: {"params": series["params"], **(series["backtest"] or {})}
+        for motif, series in churn_forecasts.items()
+    }
+
 @app.get("/api/churn-motifs-stacked")
 async def get_churn_motifs_stacked(
     startDate: Optional[date] = None,
@@ -349,7 +448,7 @@ async def get_churn_motifs_stacked(
     urgent: bool = False,
     churn: Optional[str] = None
 ):
-    df = apply_filters(df_enriched, startDate, endDate, motif, sentiment, urgent, churn)
+    df = apply_filters(current_frame(), startDate, endDate, motif, sentiment, urgent, churn)
     
     # Filter for churners only
     df_churn = df[df["is_churn"]]
@@ -378,13 +477,15 @@ async def get_churn_distribution(
     urgent: bool = False,
     churn: Optional[str] = None
 ):
-    df = apply_filters(df_enriched, startDate, endDate, motif, sentiment, urgent, churn)
+    df = apply_filters(current_frame(), startDate, endDate, motif, sentiment, urgent, churn)
     df_churn = df[df["is_churn"]]
     
     if df_churn.empty or "motif" not in df_churn.columns:
         return []
         
-    dist = df_churn["motif"].value_counts().reset_index()
+    dist = df_churn["motif"].value_counts()
+    # Categorical motif: motifs without churners are not listed
+    dist = dist[dist > 0].reset_index()
     dist.columns = ["name", "value"]
     
     # Assign colors
@@ -409,7 +510,7 @@ async def get_motif_sentiment(
     urgent: bool = False,
     churn: Optional[str] = None
 ):
-    df = apply_filters(df_enriched, startDate, endDate, motif, sentiment, urgent, churn)
+    df = apply_filters(current_frame(), startDate, endDate, motif, sentiment, urgent, churn)
     
     if "motif" not in df.columns or "sentiment_norm" not in df.columns:
         return []
@@ -438,7 +539,7 @@ async def get_sentiment_distribution(
     urgent: bool = False,
     churn: Optional[str] = None
 ):
-    df = apply_filters(df_enriched, startDate, endDate, motif, sentiment, urgent, churn)
+    df = apply_filters(current_frame(), startDate, endDate, motif, sentiment, urgent, churn)
     
     counts = df["sentiment_norm"].value_counts()
     
@@ -458,7 +559,7 @@ async def get_activity_peaks(
     urgent: bool = False,
     churn: Optional[str] = None
 ):
-    df = apply_filters(df_enriched, startDate, endDate, motif, sentiment, urgent, churn)
+    df = apply_filters(current_frame(), startDate, endDate, motif, sentiment, urgent, churn)
     
     if type == "hourly":
         grp = df.groupby("hour").agg(
@@ -483,6 +584,46 @@ async def get_activity_peaks(
 
     return []
 
+@app.get("/api/emojis")
+async def get_emojis(
+    top: int = 20,
+    startDate: Optional[date] = None,
+    endDate: Optional[date] = None,
+    motif: Optional[str] = None,
+    sentiment: Optional[str] = None,
+    urgent: bool = False,
+    churn: Optional[str] = None
+):
+    df = apply_filters(current_frame(), startDate, endDate, motif, sentiment, urgent, churn)
+    
+    if df.empty or "emojis" not in df.columns:
+        return []
+    
+    stats = emoji_frequencies(df["emojis"], top_n=top)
+    total = len(df)
+    return [
+        {"emoji": e, "count": int(c), "tweets": int(t), "tweets_pct": round(t / total * 100, 1)}
+        for e, c, t in zip(stats["emoji"], stats["count"], stats["tweets"])
+    ]
+
+@app.get("/api/alerts")
+async def get_alerts(
+    startDate: Optional[date] = None,
+    endDate: Optional[date] = None,
+    motif: Optional[str] = None,
+    metric: Optional[str] = Query(None, pattern="^(negatif|urgent)$"),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """Hourly spikes of negative or urgent tweets per motif, most recent first"""
+    alerts = [
+        a for a in spike_detector.current_alerts()
+        if (not motif or motif == "(Tous)" or a["motif"] == motif)
+        and (not metric or a["metric"] == metric)
+        and (not startDate or a["hour"].date() >= startDate)
+        and (not endDate or a["hour"].date() <= endDate)
+    ]
+    return [{**a, "hour": a["hour"].isoformat()} for a in alerts[:limit]]
+
 @app.get("/api/tweets")
 async def get_tweets(
     page: int = 1,
@@ -494,29 +635,106 @@ async def get_tweets(
     urgent: bool = False,
     churn: Optional[str] = None
 ):
-    df = apply_filters(df_enriched, startDate, endDate, motif, sentiment, urgent, churn)
+    df = apply_filters(current_frame(), startDate, endDate, motif, sentiment, urgent, churn)
     
     total = len(df)
     start_idx = (page - 1) * limit
     end_idx = start_idx + limit
     
     # Slice dataframe
-    df_page = df.iloc[start_idx:end_idx].copy()
-    
-    # Convert dates to string for JSON serialization
-    if "date" in df_page.columns:
-        df_page["date"] = df_page["date"].astype(str)
-    if "created_at" in df_page.columns:
-        df_page["created_at"] = df_page["created_at"].astype(str)
-        
-    # Safe serialization using pandas to_json
-    data_json = df_page.to_json(orient="records", date_format="iso")
+    df_page = df.iloc[start_idx:end_idx]
     
     return {
         "total": total,
         "page": page,
         "limit": limit,
-        "data": json.loads(data_json)
+        "data": tweet_records(df_page)
+    }
+
+@app.get("/api/topics")
+async def get_topics(
+    period: str = Query("week", pattern="^(day|week|month)$"),
+    startDate: Optional[date] = None,
+    endDate: Optional[date] = None,
+    motif: Optional[str] = None,
+    urgent: bool = False,
+    churn: Optional[str] = None
+):
+    """Negative tweets per topic (keywords, volume) and topic volumes per period"""
+    df = apply_filters(current_frame(), startDate, endDate, motif, None, urgent, churn)
+    if df.empty or "topic_id" not in df.columns:
+        return {"topics": [], "volume": []}
+    
+    df = df[df["topic_id"] >= 0]
+    column = "date" if period == "day" else period
+    vol = df.groupby([column, "topic_id"], observed=True).size().reset_index(name="volume")
+    totals = df["topic_id"].value_counts()
+    
+    topics = [
+        {"topic_id": int(t), "terms": topics_info.get(int(t), {}).get("terms", []), "volume": int(n)}
+        for t, n in totals.items()
+    ]
+    volume = [
+        {"label": str(p), "topic_id": int(t), "volume": int(v)}
+        for p, t, v in zip(vol[column], vol["topic_id"], vol["volume"])
+    ]
+    return {"topics": topics, "volume": volume}
+
+@app.get("/api/examples")
+async def get_examples(
+    startDate: Optional[date] = None,
+    endDate: Optional[date] = None,
+    motif: Optional[str] = None,
+    sentiment: Optional[str] = None,
+    limit: int = Query(5, ge=1, le=EXAMPLES_PER_BUCKET)
+):
+    """Representative (uniform sample) and most recent tweets of a motif/sentiment, from the precomputed reservoirs"""
+    df = current_frame()
+    if df is None or examples_table is None:
+        return {kind: [] for kind in EXAMPLE_KINDS}
+    rows = select_examples(examples_table, startDate, endDate, motif, sentiment, n=limit)
+    return {kind: tweet_records(df.iloc[positions]) for kind, positions in rows.items()}
+
+@app.get("/api/search")
+async def search_tweets(
+    q: str = Query(..., min_length=1),
+    page: int = Query(1, ge=1),
+    limit: int = Query(15, ge=1, le=500),
+    startDate: Optional[date] = None,
+    endDate: Optional[date] = None,
+    motif: Optional[str] = None,
+    sentiment: Optional[str] = None,
+    urgent: bool = False,
+    churn: Optional[str] = None
+):
+    """
+    Full-text search within the filter selection, ranked by relevance (BM25).
+    q: words (all required), prefixes (rembours*) and quoted phrases ("fibre coupée").
+    """
+    df = current_frame()
+    if df is None or search_index is None:
+        return {"total": 0, "page": page, "limit": limit, "query": q, "data": []}
+    
+    # Candidate rows restricted to the filtered positions (no filtering pass without filters)
+    rows = None
+    if any([startDate, endDate, motif, sentiment, urgent, churn]):
+        rows = apply_filters(df, startDate, endDate, motif, sentiment, urgent, churn).index.to_numpy()
+    found, scores = search_index.search(
+        q, document_texts(df), rows=rows, created_at=df["created_at"] if "created_at" in df.columns else None
+    )
+    
+    start_idx = (page - 1) * limit
+    page_rows = found[start_idx:start_idx + limit]
+    data = tweet_records(df.iloc[page_rows])
+    for record, score in zip(data, scores[start_idx:start_idx + limit]):
+        record["score"] = round(float(score), 3)
+    
+    return {
+        "total": len(found),
+        "page": page,
+        "limit": limit,
+        "query": q,
+        "data": data
     }
 
 @app.get("/api/export")
@@ -529,7 +747,7 @@ async def export_tweets(
     urgent: bool = False,
     churn: Optional[str] = None
 ):
-    df = apply_filters(df_enriched, startDate, endDate, motif, sentiment, urgent, churn)
+    df = apply_filters(current_frame(), startDate, endDate, motif, sentiment, urgent, churn)
     
     # Column mapping for renaming
     column_mapping = {
@@ -571,6 +789,64 @@ async def export_tweets(
     response.headers["Content-Disposition"] = "attachment; filename=export_tweets.csv"
     return response
 
+@app.post("/api/ingest")
+async def ingest_tweets(records: List[Dict[str, Any]], raw: bool = False):
+    """
+    Append a batch of tweets to the delta segment and update the aggregates incrementally.
+    Records are enriched pipeline rows, or raw tweets (raw=true) labelled by the local classifier.
+    """
+    global served_df, facet_cube, filters_cache, examples_table
+    if df_enriched is None:
+        raise HTTPException(status_code=503, detail="No dataset loaded")
+    try:
+        batch = records_to_frame(records)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    if raw:
+        model = get_local_model()
+        if model is None:
+            raise HTTPException(status_code=503, detail="Local classifier not trained (python -m src.local_classifier)")
+        batch = enrich_raw_tweets(batch, model)
+    elif "text_clean" not in batch.columns:
+        batch = clean_fast(batch)
+    # Negative tweets get the topic predicted by the pipeline's model
+    if "topic_id" in df_enriched.columns:
+        batch = add_topics(batch)
+    
+    # Tweets already served (same tweet_id) are ignored
+    if not batch.empty and "tweet_id" in batch.columns:
+        batch = batch[~np.fromiter((t in served_ids for t in batch["tweet_id"]), dtype=bool, count=len(batch))]
+    batch = prepare_serving_frame(batch)
+    
+    if not batch.empty:
+        # Batch rows are served after the current ones
+        examples_table = merge_examples(examples_table, build_examples(batch, offset=len(df_enriched) + len(delta_segment)))
+        delta_segment.append(batch)
+        served_df = None
+        if "tweet_id" in batch.columns:
+            served_ids.update(batch["tweet_id"])
+        facet_cube = merge_cubes(facet_cube, build_facet_cube(batch))
+        filters_cache = filter_options(facet_cube)
+        word_index.add(document_texts(batch))
+        search_index.add(document_texts(batch), lemma_texts(batch))
+        # Only the open hour and the batch are counted, not the whole served frame
+        update_alerts(append_rows(alert_tail, batch.drop(columns=UNSERVED_COLUMNS, errors="ignore")))
+    
+    compacted = compact_delta() if delta_segment.compaction_due() else None
+    return {
+        "received": len(records),
+        "ingested": len(batch),
+        "delta_rows": len(delta_segment),
+        "compacted": str(compacted) if compacted else None
+    }
+
+@app.post("/api/ingest/compact")
+async def compact_ingested():
+    """Write the delta segment to parquet now"""
+    path = compact_delta()
+    return {"compacted": str(path) if path else None, "rows": len(current_frame()) if current_frame() is not None else 0}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,131 @@
+"""
+Benchmark du filtrage des tweets: anciennes versions (copies successives,
+nettoyage ligne à ligne) vs masque unique vectorisé
+
+Usage:
+    python benchmarks/bench_filter_tweets.py [--n 1000000] [--arrow-strings]
+
+Corpus synthétique: RT, comptes Free, doublons de texte et de tweet_id,
+textes manquants. Mesure le temps et le pic mémoire (tracemalloc, hors
+DataFrame d'entrée) et
+vérifie que les deux versions retournent les mêmes lignes.
+"""
+import argparse
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.cleaning import filter_tweets
+from src.preprocessing import OFFICIAL_ACCOUNTS, basic_filter
+
+SAMPLE_TEXTS = [
+    "@free ma box est en panne depuis 3 jours #panne",
+    "RT @Freebox: nouvelle offre fibre https://t.co/abc",
+    "facture prélevée deux fois ce mois-ci @free_assistance",
+    "plus de réseau 4G à Lyon depuis ce matin #réseau",
+    "rt ça marche enfin merci",
+    "j'en ai marre je vais résilier https://t.co/xyz",
+]
+SAMPLE_USERS = ["alice", "bob", "Freebox", "free_assistance", "carol", "dave", "FreeNewsActu", "eve"]
+
+
+def legacy_filter_tweets(df, text_col="full_text", user_col="screen_name", exclude_free=True):
+    """Implémentation précédente de cleaning.filter_tweets"""
+    df_filtered = df.dropna(subset=[text_col]).copy()
+    df_filtered = df_filtered[
+        ~df_filtered[text_col].astype(str).str.startswith(("RT", "rt"), na=False)
+    ].copy()
+    if exclude_free and user_col in df_filtered.columns:
+        df_filtered["_user_lower"] = df_filtered[user_col].astype(str).str.lower()
+        df_filtered = df_filtered[
+            ~df_filtered["_user_lower"].str.contains("free", na=False)
+        ].copy()
+        df_filtered = df_filtered.drop(columns=["_user_lower"])
+    df_filtered = df_filtered.drop_duplicates(subset=[text_col])
+    if "tweet_id" in df_filtered.columns:
+        df_filtered = df_filtered.drop_duplicates(subset=["tweet_id"])
+    return df_filtered
+
+
+def legacy_clean_text(text):
+    """Implémentation précédente de preprocessing.clean_text"""
+    text = str(text)
+    text = re.sub(r"http\S+", " ", text)
+    text = re.sub(r"@\w+", " ", text)
+    text = re.sub(r"#(\w+)", r"\1", text)
+    text = text.lower()
+    text = re.sub(r"\s+", " ", text)
+    return text.strip()
+
+
+def legacy_basic_filter(df):
+    """Implémentation précédente de preprocessing.basic_filter"""
+    df = df.copy()
+    df = df[~df["full_text"].str.startswith("RT ", na=False)]
+    if "screen_name" in df.columns:
+        df = df[~df["screen_name"].isin(OFFICIAL_ACCOUNTS)]
+    df["full_text_clean"] = df["full_text"].apply(legacy_clean_text)
+    return df
+
+
+def make_corpus(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    texts = np.array(SAMPLE_TEXTS, dtype=object)[rng.integers(0, len(SAMPLE_TEXTS), n)]
+    # ~70% de textes distincts, le reste en doublons
+    suffix = rng.integers(0, int(n * 0.7), n).astype(str)
+    full_text = pd.Series(texts + " #" + suffix.astype(object))
+    full_text[rng.random(n) < 0.01] = None
+    return pd.DataFrame({
+        "full_text": full_text,
+        "screen_name": np.array(SAMPLE_USERS, dtype=object)[rng.integers(0, len(SAMPLE_USERS), n)],
+        "tweet_id": rng.integers(0, int(n * 0.9), n).astype(str),
+    })
+
+
+def timed(label: str, func, *args):
+    # Temps et mémoire mesurés sur deux exécutions (tracemalloc ralentit le code)
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<28} {elapsed:8.2f}s   pic {peak / 1024 ** 2:8.1f} Mo   {len(result)} lignes")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=1_000_000)
+    parser.add_argument("--arrow-strings", action="store_true",
+                        help="Colonnes texte Arrow (les buffers Arrow échappent à tracemalloc)")
+    args = parser.parse_args()
+
+    df = make_corpus(args.n)
+    if not args.arrow_strings:
+        df = df.astype(object)
+    print(f"Corpus: {len(df)} tweets")
+
+    old = timed("filter_tweets (ancien)", legacy_filter_tweets, df)
+    new = timed("filter_tweets (vectorisé)", filter_tweets, df)
+    assert old.index.equals(new.index), "filter_tweets: résultats différents"
+
+    old = timed("basic_filter (ancien)", legacy_basic_filter, df)
+    new = timed("basic_filter (vectorisé)", basic_filter, df)
+    assert old.index.equals(new.index), "basic_filter: lignes différentes"
+    assert old["full_text_clean"].equals(new["full_text_clean"]), "basic_filter: textes différents"
+    print("Résultats identiques")
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    main()
@@ -0,0 +1,74 @@
+"""
+Temps d'import et mémoire des modules du projet (interpréteur neuf pour chaque mesure)
+
+Usage:
+    python benchmarks/bench_import_time.py [--repeat 3]
+
+Pour chaque cible: temps d'import, RSS max du processus et dépendances
+lourdes effectivement chargées (spaCy, langdetect...). La dernière ligne
+mesure le premier chargement du modèle spaCy (get_nlp), désormais payé
+uniquement par les étapes qui lemmatisent.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+
+HEAVY_MODULES = ["spacy", "langdetect", "deep_translator", "emoji", "mistralai", "sklearn"]
+
+TARGETS = [
+    ("src.utils", "import src.utils"),
+    ("src.cleaning", "import src.cleaning"),
+    ("src.pipeline_enrichment", "import src.pipeline_enrichment"),
+    ("backend.main (API)", "import backend.main"),
+    ("cleaning.get_nlp()", "import src.cleaning; src.cleaning.get_nlp()"),
+]
+
+CHILD = """
+import json, resource, sys, time, logging
+logging.disable(logging.CRITICAL)
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+exec({code!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "loaded": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def measure(code: str) -> Optional[dict]:
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD.format(root=str(ROOT), code=code, heavy=HEAVY_MODULES)],
+        capture_output=True, text=True, cwd=ROOT
+    )
+    if out.returncode != 0:
+        return None
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'Cible':<28} {'Import (s)':>10} {'RSS (Mo)':>9}  Dépendances lourdes chargées")
+    for label, code in TARGETS:
+        runs = [measure(code) for _ in range(args.repeat)]
+        if None in runs:
+            print(f"{label:<28} {'échec':>10}")
+            continue
+        seconds = statistics.median(r["seconds"] for r in runs)
+        rss = statistics.median(r["rss_mb"] for r in runs)
+        print(f"{label:<28} {seconds:>10.2f} {rss:>9.0f}  {', '.join(runs[0]['loaded']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Débit de la classification LLM contre le serveur Mistral simulé
+
+Usage:
+    python benchmarks/bench_llm_throughput.py [--n 200] [--latency-median-ms 300]
+        [--error-rate 0.02] [--rate-limit-rate 0.05] [--malformed-rate 0.05]
+    python benchmarks/bench_llm_throughput.py --url http://127.0.0.1:8089   # serveur déjà lancé
+
+Sans --url, le serveur (tools/mock_mistral_server.py) est démarré en
+interne. Nécessite le SDK mistralai; aucune requête ne part vers l'API réelle.
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT.parent / "tools"))
+
+from mock_mistral_server import MockConfig, start_mock_server
+
+SAMPLE_TWEETS = [
+    "box en panne depuis 3 jours, c'est urgent",
+    "facture prélevée deux fois ce mois-ci",
+    "merci au support pour la réponse rapide",
+    "plus de réseau 4G à Lyon depuis ce matin",
+    "j'en ai marre je vais résilier et changer d'opérateur",
+    "comment changer mon forfait mobile ?",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--n", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--latency-median-ms", type=float, default=300.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        config = MockConfig(
+            latency_median_ms=args.latency_median_ms,
+            error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate,
+            malformed_rate=args.malformed_rate,
+            seed=0,
+        )
+        server, url = start_mock_server(config=config)
+
+    # La configuration est lue à l'import de src.config
+    os.environ["MISTRAL_SERVER_URL"] = url
+    os.environ.setdefault("MISTRAL_API_KEY", "mock")
+    from src.llm_classification import classify_batch, initialize_mistral_client, new_run_stats
+    from src.parse_llm_outputs import parse_batch_responses
+
+    texts = [f"{SAMPLE_TWEETS[i % len(SAMPLE_TWEETS)]} #{i}" for i in range(args.n)]
+    client = initialize_mistral_client()
+    stats = new_run_stats()
+
+    start = time.perf_counter()
+    try:
+        results = classify_batch(client, texts, batch_size=args.batch_size, stats=stats)
+    finally:
+        if server is not None:
+            server.shutdown()
+    elapsed = time.perf_counter() - start
+
+    parsed = parse_batch_responses(results, columnar=True)
+    print(f"\n{args.n} tweets en {elapsed:.1f}s -> {args.n / elapsed:.1f} tweets/s")
+    print(f"Statistiques du run: {stats}")
+    print(f"Motifs: {pd.Series(parsed['motif']).value_counts().to_dict()}")
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark du parsing des réponses LLM: ancienne extraction par regex
+vs extracteur linéaire + tables de correspondance
+
+Usage:
+    python benchmarks/bench_parse_llm_outputs.py [--n 20000]
+
+Le corpus est lu depuis le checkpoint JSONL ou la colonne raw_llm_response
+de tweets_enriched.parquet s'ils existent, complété par des réponses
+malformées typiques (texte autour, blocs ```json, JSON tronqué, accents
+manquants, longues sorties parasites pleines d'accolades).
+"""
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.config import PROCESSED_DIR
+from src.parse_llm_outputs import extract_json_from_text, parse_batch_responses
+from src.utils_io import read_jsonl
+
+MALFORMED_SAMPLES = [
+    '{"motif": "Réseau", "sentiment": "négatif", "urgence": "élevée", "risque_churn": "élevé"}',
+    'Voici l\'analyse:\n```json\n{"motif": "Facturation", "sentiment": "negatif", "urgence": "moyenne", "risque_churn": "modere"}\n```',
+    'JSON: {"motif": "service client", "sentiment": "Neutre", "urgence": "Faible", "risque_churn": "Faible"} Merci!',
+    '{"motif": "Technique", "sentiment": "négatif", "urgence": "élevée", "risque_churn": "élev',
+    '{"motif": "Abonnement", "details": {"offre": "Freebox {Pop}"}, "sentiment": "positif", "urgence": "faible", "risque_churn": "faible"}',
+    'Je ne peux pas analyser ce tweet.',
+    '{"motif": "Autre", "sentiment": "neutre", "urgence": "faible", "risque_churn": "faible", "note": "il dit \\"{urgent}\\""}',
+    "{ {{ { {{ " * 200 + "fin de sortie parasite sans JSON valide",
+]
+
+
+def legacy_extract_json_from_text(text):
+    """Implémentation précédente (trois regex successives)"""
+    if not text:
+        return None
+    json_match = re.search(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', text, re.DOTALL)
+    if json_match:
+        return json_match.group(0)
+    code_block = re.search(r'```json\s*(.*?)\s*```', text, re.DOTALL)
+    if code_block:
+        return code_block.group(1).strip()
+    after_json = re.search(r'(?:json|JSON):\s*(\{.*\})', text, re.DOTALL | re.IGNORECASE)
+    if after_json:
+        return after_json.group(1)
+    return None
+
+
+def load_corpus(n: int) -> list:
+    corpus = []
+    checkpoint = PROCESSED_DIR / "tweets_enrichment_checkpoint.jsonl"
+    if checkpoint.exists():
+        corpus = [r["raw_response"] for r in read_jsonl(checkpoint) if r.get("raw_response")]
+    elif (PROCESSED_DIR / "tweets_enriched.parquet").exists():
+        import pandas as pd
+        df = pd.read_parquet(PROCESSED_DIR / "tweets_enriched.parquet", columns=["raw_llm_response"])
+        corpus = df["raw_llm_response"].dropna().tolist()
+    print(f"Réponses réelles trouvées: {len(corpus)}")
+
+    corpus = (corpus + MALFORMED_SAMPLES) or MALFORMED_SAMPLES
+    return [corpus[i % len(corpus)] for i in range(n)]
+
+
+def timed(label: str, func, *args):
+    start = time.perf_counter()
+    out = func(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<45} {elapsed * 1000:9.1f} ms")
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=20000)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.n)
+    print(f"Corpus: {len(corpus)} réponses\n")
+
+    legacy = timed("extraction legacy (3 regex)", lambda: [legacy_extract_json_from_text(t) for t in corpus])
+    linear = timed("extraction linéaire", lambda: [extract_json_from_text(t) for t in corpus])
+    timed("parse_batch_responses (lignes)", parse_batch_responses, [{"raw_response": t} for t in corpus])
+    timed("parse_batch_responses (colonnes)", parse_batch_responses, [{"raw_response": t} for t in corpus], True)
+
+    def _valid(extracted):
+        try:
+            json.loads(extracted)
+            return True
+        except (TypeError, ValueError):
+            return False
+
+    print(f"\nJSON valides extraits: legacy={sum(map(_valid, legacy))} linéaire={sum(map(_valid, linear))}")
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.WARNING)
+    main()
@@ -55,6 +55,8 @@ export interface ChurnTrendData {
     month: string;
     actual: number | null;
     predicted: number | null;
+    lower?: number | null;
+    upper?: number | null;
 }
 
 export interface ChurnMotifData {
@@ -93,6 +95,16 @@ export interface ActivityPeakData {
     negative: number;
 }
 
+export interface AlertData {
+    hour: string;
+    metric: 'negatif' | 'urgent';
+    motif: string;
+    count: number;
+    expected: number;
+    zscore: number;
+    provisional: boolean;
+}
+
 export const api = {
     getFilters: async (): Promise<FilterOptions> => {
         const response = await axios.get(`${API_URL}/filters`);
@@ -138,10 +150,29 @@ export const api = {
         const response = await axios.get(`${API_URL}/activity-peaks`, { params: { type, ...filters } });
         return response.data;
     },
+    getAlerts: async (filters: FilterParams, metric?: 'negatif' | 'urgent'): Promise<AlertData[]> => {
+        const { startDate, endDate, motif } = filters;
+        const response = await axios.get(`${API_URL}/alerts`, { params: { startDate, endDate, motif, metric } });
+        return response.data;
+    },
     getTweets: async (page: number, limit: number, filters: FilterParams): Promise<TweetsResponse> => {
         const response = await axios.get(`${API_URL}/tweets`, { params: { page, limit, ...filters } });
         return response.data;
     },
+    getTopics: async (filters: FilterParams, period: 'day' | 'week' | 'month' = 'week'): Promise<TopicsResponse> => {
+        const { startDate, endDate, motif, urgent, churn } = filters;
+        const response = await axios.get(`${API_URL}/topics`, { params: { period, startDate, endDate, motif, urgent, churn } });
+        return response.data;
+    },
+    getExamples: async (filters: FilterParams, limit: number = 5): Promise<ExamplesResponse> => {
+        const { startDate, endDate, motif, sentiment } = filters;
+        const response = await axios.get(`${API_URL}/examples`, { params: { startDate, endDate, motif, sentiment, limit } });
+        return response.data;
+    },
+    searchTweets: async (query: string, page: number, limit: number, filters: FilterParams): Promise<SearchResponse> => {
+        const response = await axios.get(`${API_URL}/search`, { params: { q: query, page, limit, ...filters } });
+        return response.data;
+    },
     getExportUrl: (columns: string[], filters: FilterParams): string => {
         const params = new URLSearchParams();
         if (columns.length > 0) params.append('columns', columns.join(','));
@@ -174,3 +205,18 @@ export interface TweetsResponse {
     limit: number;
     data: Tweet[];
 }
+
+export interface SearchResponse extends TweetsResponse {
+    query: string;
+    data: (Tweet & { score: number })[];
+}
+
+export interface ExamplesResponse {
+    representative: Tweet[];
+    recent: Tweet[];
+}
+
+export interface TopicsResponse {
+    topics: { topic_id: number; terms: string[]; volume: number }[];
+    volume: { label: string; topic_id: number; volume: number }[];
+}
@@ -5,8 +5,11 @@ import argparse
 from pathlib import Path
 import logging
 
-from src.config import RAW_DIR, PROCESSED_DIR
+from src.config import RAW_DIR, PROCESSED_DIR, LOCAL_CLF_PATH, CSV_CHUNK_SIZE
 from src.pipeline_enrichment import run_full_pipeline
+from src.pipeline_stages import STAGES
+from src.pipeline_streaming import run_streaming_pipeline
+from src.profiling import enable_profiling, disable_profiling
 from src.utils import load_csv_with_encoding
 
 logging.basicConfig(
@@ -34,7 +37,7 @@ def main():
         "--checkpoint",
         type=str,
         default=None,
-        help="Chemin vers le fichier checkpoint (défaut: data/processed/tweets_enrichment_checkpoint.parquet)"
+        help="Chemin vers le fichier checkpoint (défaut: data/processed/tweets_enrichment_checkpoint.jsonl)"
     )
     parser.add_argument(
         "--text-col",
@@ -42,6 +45,54 @@ def main():
         default="full_text",
         help="Nom de la colonne contenant le texte (défaut: full_text)"
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Ne traite que les tweets absents de la sortie existante (par tweet_id)"
+    )
+    parser.add_argument(
+        "--local-model",
+        action="store_true",
+        help="Labellise localement les tweets à forte confiance (python -m src.local_classifier pour entraîner)"
+    )
+    parser.add_argument(
+        "--from-stage",
+        choices=STAGES,
+        default=None,
+        help="Recalcule à partir de cette étape, les précédentes sont lues depuis data/interim"
+    )
+    parser.add_argument(
+        "--to-stage",
+        choices=STAGES,
+        default=None,
+        help="S'arrête après cette étape (sortie finale écrite seulement par finalize)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore les artefacts intermédiaires et recalcule toutes les étapes"
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Traite l'export par blocs à mémoire bornée (très gros exports), puis trie la sortie en mémoire; ignore --incremental et les options d'étapes"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=CSV_CHUNK_SIZE,
+        help=f"Lignes par bloc en mode --streaming (défaut: {CSV_CHUNK_SIZE})"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Mesure temps réel/CPU et lignes par étape (rapport JSON à côté de la sortie)"
+    )
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="Comme --profile, avec le pic mémoire par étape (tracemalloc: temps gonflés, à mesurer à part)"
+    )
     
     args = parser.parse_args()
     
@@ -57,7 +108,7 @@ def main():
         output_path = Path(args.output)
     
     if args.checkpoint is None:
-        checkpoint_path = PROCESSED_DIR / "tweets_enrichment_checkpoint.parquet"
+        checkpoint_path = PROCESSED_DIR / "tweets_enrichment_checkpoint.jsonl"
     else:
         checkpoint_path = Path(args.checkpoint)
     
@@ -72,12 +123,32 @@ def main():
     logger.info(f"Sortie: {output_path}")
     logger.info(f"Checkpoint: {checkpoint_path}")
     
+    profiler = enable_profiling(trace_memory=args.profile_memory) if args.profile or args.profile_memory else None
+    
     try:
+        if args.streaming:
+            counts = run_streaming_pipeline(
+                input_path=input_path,
+                output_path=output_path,
+                text_col=args.text_col,
+                checkpoint_path=checkpoint_path,
+                chunksize=args.chunk_size,
+                local_model_path=LOCAL_CLF_PATH if args.local_model else None
+            )
+            logger.info(f"✅ Pipeline terminé avec succès!")
+            logger.info(f"📊 {counts['rows_out']} tweets traités ({counts['rows_in']} lignes lues)")
+            return
+        
         df_result = run_full_pipeline(
             input_path=input_path,
             output_path=output_path,
             text_col=args.text_col,
-            checkpoint_path=checkpoint_path
+            checkpoint_path=checkpoint_path,
+            incremental=args.incremental,
+            local_model_path=LOCAL_CLF_PATH if args.local_model else None,
+            from_stage=args.from_stage,
+            to_stage=args.to_stage,
+            use_cache=not args.no_cache
         )
         
         logger.info(f"✅ Pipeline terminé avec succès!")
@@ -86,6 +157,12 @@ def main():
     except Exception as e:
         logger.error(f"❌ Erreur lors de l'exécution du pipeline: {e}", exc_info=True)
         raise
+    
+    finally:
+        if profiler is not None:
+            disable_profiling()
+            profiler.write_report(output_path.with_name(f"{output_path.stem}_profile.json"))
+            print("\n" + profiler.summary_table())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,191 @@
+"""
+Détection des pics horaires de tweets négatifs ou urgents, par motif
+
+Pour chaque série (métrique, motif) et chaque heure de la journée, la
+baseline est une moyenne mobile exponentielle (et sa variance) des
+comptages de cette heure les jours précédents: 14h est comparé aux 14h
+précédents. Une heure est en alerte quand son comptage dépasse la baseline
+de ALERT_Z écarts-types (au moins ALERT_MIN_COUNT tweets).
+
+L'état (baselines, dernière heure traitée) est persisté: un nouveau
+chargement des données ne traite que les heures postérieures, sans
+reparcourir l'historique. La dernière heure des données, peut-être
+incomplète, n'est pas intégrée aux baselines: elle est évaluée à titre
+provisoire et retraitée au chargement suivant.
+"""
+import logging
+import pickle
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.config import ALERT_ALPHA, ALERT_MIN_COUNT, ALERT_WARMUP_DAYS, ALERT_Z
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ALL_MOTIFS = "(Tous)"
+
+# Métrique -> (colonne, valeur comptée)
+ALERT_METRICS = {
+    "negatif": ("sentiment_norm", "Négatif"),
+    "urgent": ("is_urgent", True),
+}
+
+
+def hourly_counts(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Comptages par heure (index) et par série (colonnes metric, motif),
+    motif "(Tous)" compris
+    """
+    hours = df["created_at"].dt.floor("h").to_numpy()
+    motifs = df["motif"].to_numpy(dtype=object) if "motif" in df.columns else np.full(len(df), None, dtype=object)
+    parts = []
+    for metric, (column, value) in ALERT_METRICS.items():
+        if column not in df.columns:
+            continue
+        hit = (df[column] == value).to_numpy(dtype=bool)
+        part = pd.DataFrame({"hour": hours[hit], "metric": metric, "motif": motifs[hit]})
+        parts += [part.dropna(subset=["motif"]), part.assign(motif=ALL_MOTIFS)]
+    if not parts:
+        return pd.DataFrame()
+    long = pd.concat(parts, ignore_index=True)
+    return long.groupby(["hour", "metric", "motif"]).size().unstack(["metric", "motif"], fill_value=0)
+
+
+class SpikeDetector:
+    """
+    Baselines par (heure de la journée, série) et alertes déjà détectées
+    """
+
+    def __init__(
+        self,
+        alpha: float = ALERT_ALPHA,
+        z: float = ALERT_Z,
+        min_count: int = ALERT_MIN_COUNT,
+        warmup: int = ALERT_WARMUP_DAYS
+    ):
+        self.alpha = alpha
+        self.z = z
+        self.min_count = min_count
+        self.warmup = warmup
+        self.next_hour: Optional[pd.Timestamp] = None  # première heure non intégrée
+        self.columns = pd.MultiIndex.from_tuples([], names=["metric", "motif"])
+        # Moyenne, moyenne des carrés et nombre de jours observés: tableaux (24, séries)
+        self.mean = np.zeros((24, 0))
+        self.sq = np.zeros((24, 0))
+        self.n = np.zeros((24, 0), dtype=int)
+        self.alerts: List[Dict] = []
+        self.provisional: List[Dict] = []
+
+    def _extend(self, columns: pd.MultiIndex) -> None:
+        # Nouvelles séries (nouveau motif): baselines vides
+        new = columns.difference(self.columns)
+        if len(new):
+            self.columns = self.columns.append(new)
+            pad = np.zeros((24, len(new)))
+            self.mean = np.hstack([self.mean, pad])
+            self.sq = np.hstack([self.sq, pad])
+            self.n = np.hstack([self.n, pad.astype(int)])
+
+    def _flag(self, hours: pd.DatetimeIndex, counts: np.ndarray, mean: np.ndarray, sq: np.ndarray, n: np.ndarray) -> List[Dict]:
+        """
+        Alertes d'heures (lignes) x séries (colonnes) face à leurs baselines
+        """
+        # Écart-type plancher de Poisson: pas d'alerte sur une série presque constante
+        std = np.sqrt(np.maximum(sq - mean ** 2, np.maximum(mean, 1.0)))
+        zscore = (counts - mean) / std
+        flagged = (n >= self.warmup) & (counts >= self.min_count) & (zscore >= self.z)
+        return [
+            {
+                "hour": hours[t],
+                "metric": self.columns[k][0],
+                "motif": self.columns[k][1],
+                "count": int(counts[t, k]),
+                "expected": round(float(mean[t, k]), 1),
+                "zscore": round(float(zscore[t, k]), 1),
+            }
+            for t, k in zip(*np.nonzero(flagged))
+        ]
+
+    def _advance(self, counts: pd.DataFrame) -> List[Dict]:
+        """
+        Intègre des heures complètes aux baselines et retourne leurs alertes
+        """
+        new_alerts = []
+        for h in range(24):
+            rows = counts[counts.index.hour == h]
+            if rows.empty:
+                continue
+            x = rows.to_numpy(dtype=float)
+            # Série jamais observée à cette heure: la baseline part du premier comptage
+            seed = np.where(self.n[h] > 0, self.mean[h], x[0])
+            seed_sq = np.where(self.n[h] > 0, self.sq[h], x[0] ** 2)
+            mean = pd.DataFrame(np.vstack([seed, x])).ewm(alpha=self.alpha, adjust=False).mean().to_numpy()
+            sq = pd.DataFrame(np.vstack([seed_sq, x ** 2])).ewm(alpha=self.alpha, adjust=False).mean().to_numpy()
+            # Baseline d'une heure = état avant son propre comptage
+            n = self.n[h] + np.arange(len(rows))[:, None]
+            new_alerts += self._flag(rows.index, x, mean[:-1], sq[:-1], n)
+            self.mean[h], self.sq[h] = mean[-1], sq[-1]
+            self.n[h] += len(rows)
+        return sorted(new_alerts, key=lambda a: a["hour"])
+
+    def update(self, df: pd.DataFrame) -> List[Dict]:
+        """
+        Traite les tweets postérieurs à la dernière heure intégrée et retourne
+        les nouvelles alertes (les heures déjà intégrées sont ignorées)
+        """
+        if df is None or df.empty or "created_at" not in df.columns:
+            return []
+        recent = df[df["created_at"] >= self.next_hour] if self.next_hour is not None else df
+        counts = hourly_counts(recent)
+        if counts.empty:
+            return []
+
+        # Heures sans tweet comptées à zéro, dernière heure gardée ouverte
+        open_hour = counts.index.max()
+        start = self.next_hour if self.next_hour is not None else counts.index.min()
+        self._extend(counts.columns)
+        counts = counts.reindex(index=pd.date_range(start, open_hour, freq="h"), columns=self.columns, fill_value=0)
+
+        new_alerts = self._advance(counts.iloc[:-1])
+        self.alerts.extend(new_alerts)
+        self.next_hour = open_hour
+
+        h = open_hour.hour
+        last = counts.iloc[-1:]
+        self.provisional = [
+            {**alert, "provisional": True}
+            for alert in self._flag(last.index, last.to_numpy(dtype=float), self.mean[h:h + 1], self.sq[h:h + 1], self.n[h:h + 1])
+        ]
+        if new_alerts:
+            logger.info(f"{len(new_alerts)} nouvelles alertes jusqu'à {open_hour}")
+        return new_alerts
+
+    def current_alerts(self) -> List[Dict]:
+        """
+        Alertes détectées (plus récentes d'abord), alertes provisoires comprises
+        """
+        confirmed = [{**alert, "provisional": False} for alert in reversed(self.alerts)]
+        return self.provisional + confirmed
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            pickle.dump(self, f)
+
+    @staticmethod
+    def load(path: Path) -> "SpikeDetector":
+        """
+        État sauvegardé par un chargement précédent, ou détecteur vide
+        """
+        if not path.exists():
+            return SpikeDetector()
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.warning(f"État des alertes illisible ({e}), historique retraité")
+            return SpikeDetector()
@@ -4,29 +4,16 @@ Module de nettoyage et préprocessing des tweets
 import pandas as pd
 import numpy as np
 import re
-from typing import Dict, Optional, Tuple
+from typing import Dict, Optional, Set, Tuple
 import logging
+from collections import Counter
+from functools import lru_cache
+from importlib import metadata, util
+from itertools import chain
 from tqdm import tqdm
 
-# Imports optionnels avec gestion d'erreur
-try:
-    import spacy
-except ImportError:
-    spacy = None
-    logging.warning("spacy non installé. Installez-le avec: pip install spacy")
-
-try:
-    from langdetect import detect, LangDetectException
-except ImportError:
-    detect = None
-    LangDetectException = Exception
-    logging.warning("langdetect non installé. Installez-le avec: pip install langdetect")
-
-try:
-    from deep_translator import GoogleTranslator
-except ImportError:
-    GoogleTranslator = None
-    logging.warning("deep-translator non installé. Installez-le avec: pip install deep-translator")
+# spaCy, langdetect et deep-translator sont chargés au premier usage
+# (get_nlp, get_language_detector, get_translator): importer ce module reste léger
 
 try:
     from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
@@ -41,20 +28,18 @@ except ImportError:
     wait_exponential = lambda **kwargs: None
     retry_if_exception_type = lambda *args: None
 
-try:
-    import emoji
-except ImportError:
-    emoji = None
-    logging.warning("emoji non installé. Installez-le avec: pip install emoji")
-
+from src.profiling import profile_stage, substep
+from src.config import OFFICIAL_ACCOUNT_PATTERN, SPACY_MODEL
 from src.utils import safe_str, normalize_whitespace
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Regex pour emojis
-_EMOJI_RE = re.compile(
-    "["
+# Comptes officiels Free (nom contenant "free", insensible à la casse)
+_OFFICIAL_ACCOUNT_RE = re.compile(OFFICIAL_ACCOUNT_PATTERN, re.IGNORECASE)
+
+# Plages Unicode des emojis
+_EMOJI_CHARS = (
     "\U0001F300-\U0001F5FF"
     "\U0001F600-\U0001F64F"
     "\U0001F680-\U0001F6FF"
@@ -66,9 +51,16 @@ _EMOJI_RE = re.compile(
     "\U0001FA70-\U0001FAFF"
     "\u2600-\u26FF"
     "\u2700-\u27BF"
-    "]+"
 )
 
+# Regex pour emojis (groupe capturant: re.split alterne texte et emojis)
+_EMOJI_RE = re.compile(f"([{_EMOJI_CHARS}]+)")
+
+# Ponctuation remplacée par un espace; le reste (hors lettres, chiffres, espaces) est supprimé
+_PUNCT_RE = re.compile(r"[.,;!?()\[\]{}\"'`:/\\|^~_=+*«»—–-]")
+_NON_WORD_RE = re.compile(r"[^\w ]")
+_NON_WORD_KEEP_EMOJI_RE = re.compile(f"[^\\w {_EMOJI_CHARS}]")
+
 # Dictionnaire d'abréviations
 ABBREV_DICT = {
     "mdr": "mort de rire",
@@ -92,32 +84,113 @@ ABBREV_DICT = {
     "lol": "mort de rire"
 }
 
-# Chargement spaCy
-if spacy is not None:
+NEGATIONS_TO_KEEP = {"pas", "plus", "jamais", "rien", "aucun", "personne"}
+
+
+@lru_cache(maxsize=None)
+def get_nlp():
+    """
+    Modèle spaCy, chargé au premier appel puis réutilisé (None si spaCy absent)
+    """
+    try:
+        import spacy
+    except ImportError:
+        logger.error("spacy n'est pas installé. Installez-le avec: pip install spacy")
+        return None
+    
     try:
-        nlp = spacy.load("fr_core_news_sm")
+        return spacy.load(SPACY_MODEL)
     except OSError:
-        logger.warning("Modèle spaCy fr_core_news_sm non trouvé. Utilisation du modèle blank.")
+        logger.warning(f"Modèle spaCy {SPACY_MODEL} non trouvé. Utilisation du modèle blank.")
         try:
-            nlp = spacy.blank("fr")
+            return spacy.blank("fr")
         except Exception:
-            nlp = None
-            logger.error("Impossible de charger spaCy. Installez-le avec: pip install spacy && python -m spacy download fr_core_news_sm")
-else:
-    nlp = None
-    logger.error("spacy n'est pas installé. Installez-le avec: pip install spacy")
-
-if nlp is not None:
-    STOP_WORDS = set(nlp.Defaults.stop_words) if hasattr(nlp.Defaults, "stop_words") else set()
-else:
-    STOP_WORDS = set()
-NEGATIONS_TO_KEEP = {"pas", "plus", "jamais", "rien", "aucun", "personne"}
-STOP_WORDS = STOP_WORDS.difference(NEGATIONS_TO_KEEP)
+            logger.error(f"Impossible de charger spaCy. Installez-le avec: pip install spacy && python -m spacy download {SPACY_MODEL}")
+            return None
+
+
+@lru_cache(maxsize=None)
+def get_stop_words() -> frozenset:
+    """
+    Stopwords du modèle spaCy, négations conservées
+    """
+    nlp = get_nlp()
+    stop_words = getattr(nlp.Defaults, "stop_words", set()) if nlp is not None else set()
+    return frozenset(stop_words).difference(NEGATIONS_TO_KEEP)
+
+
+def nlp_model_id() -> Optional[str]:
+    """
+    Identifiant du modèle spaCy qui sera utilisé, sans le charger
+    """
+    if util.find_spec("spacy") is None:
+        return None
+    try:
+        return f"{SPACY_MODEL}=={metadata.version(SPACY_MODEL)}"
+    except metadata.PackageNotFoundError:
+        return "blank:fr"
+
+
+@lru_cache(maxsize=None)
+def get_language_detector():
+    """
+    Fonction detect de langdetect et son exception (None si absent)
+    """
+    try:
+        from langdetect import detect, LangDetectException
+    except ImportError:
+        logging.warning("langdetect non installé. Installez-le avec: pip install langdetect")
+        return None, Exception
+    return detect, LangDetectException
+
+
+@lru_cache(maxsize=32)
+def get_translator(source: str = "auto"):
+    """
+    Traducteur vers le français, un par langue source (None si deep-translator absent)
+    """
+    try:
+        from deep_translator import GoogleTranslator
+    except ImportError:
+        logging.warning("deep-translator non installé. Installez-le avec: pip install deep-translator")
+        return None
+    return GoogleTranslator(source=source, target="fr")
+
+
+def __getattr__(name):
+    # Compatibilité: cleaning.nlp et cleaning.STOP_WORDS restent accessibles (chargement au premier accès)
+    if name == "nlp":
+        return get_nlp()
+    if name == "STOP_WORDS":
+        return get_stop_words()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def split_emojis(text: str) -> Tuple[str, str]:
+    """
+    Sépare emojis et texte en un seul passage
+    Retourne: (emojis concaténés, texte avec chaque séquence d'emojis remplacée par un espace)
+    """
+    parts = _EMOJI_RE.split(safe_str(text))
+    return "".join(parts[1::2]), " ".join(parts[0::2])
 
 
 def extract_emojis(text: str) -> str:
     """Extrait les emojis d'un texte"""
-    return "".join(_EMOJI_RE.findall(safe_str(text)))
+    return split_emojis(text)[0]
+
+
+def emoji_frequencies(emojis: pd.Series, top_n: Optional[int] = None) -> pd.DataFrame:
+    """
+    Fréquence de chaque emoji dans une colonne emojis (nombre d'occurrences et de tweets)
+    """
+    occurrences = Counter(chain.from_iterable(emojis.dropna().astype(str)))
+    tweets = Counter(chain.from_iterable(set(e) for e in emojis.dropna().astype(str)))
+    stats = pd.DataFrame(
+        {"emoji": list(occurrences), "count": list(occurrences.values()), "tweets": [tweets[e] for e in occurrences]},
+        columns=["emoji", "count", "tweets"]
+    ).sort_values(["count", "emoji"], ascending=[False, True], ignore_index=True)
+    return stats.head(top_n) if top_n else stats
 
 
 def reduce_repetitions(text: str) -> str:
@@ -136,17 +209,8 @@ def split_camel_case(word: str) -> str:
 
 def remove_punctuation(text: str, keep_emoji: bool = False) -> str:
     """Supprime la ponctuation"""
-    out = []
-    for c in safe_str(text):
-        if c == " ":
-            out.append(c)
-        elif c.isalnum():
-            out.append(c)
-        elif keep_emoji and _EMOJI_RE.match(c):
-            out.append(c)
-        elif c in ".,;!?()[]{}\"'`:/\\|^~_=+*«»—–-":
-            out.append(" ")
-    return "".join(out)
+    t = _PUNCT_RE.sub(" ", safe_str(text))
+    return (_NON_WORD_KEEP_EMOJI_RE if keep_emoji else _NON_WORD_RE).sub("", t)
 
 
 def expand_abbreviations(text: str, abbrev_dict: Dict[str, str]) -> str:
@@ -157,6 +221,36 @@ def expand_abbreviations(text: str, abbrev_dict: Dict[str, str]) -> str:
     return t
 
 
+# Colonnes d'identifiant source possibles dans les exports (par ordre de préférence)
+SOURCE_ID_COLUMNS = ("id_str", "tweet_id", "id")
+
+
+def compute_tweet_ids(
+    df: pd.DataFrame,
+    text_col: str = "full_text",
+    user_col: str = "screen_name",
+    date_col: str = "created_at"
+) -> pd.Series:
+    """
+    Identifiant déterministe d'un tweet: id source si disponible,
+    sinon hash du contenu (auteur, date, texte)
+    """
+    content_cols = [c for c in (user_col, date_col, text_col) if c in df.columns]
+    hashed = pd.util.hash_pandas_object(df[content_cols].astype(str), index=False)
+    tweet_ids = hashed.map("{:016x}".format)
+    
+    for col in SOURCE_ID_COLUMNS:
+        if col in df.columns:
+            source = df[col]
+            if pd.api.types.is_float_dtype(source):
+                source = source.astype("Int64")
+            source = source.astype("string")
+            tweet_ids = source.where(source.notna(), tweet_ids).astype(str)
+            break
+    
+    return tweet_ids
+
+
 def filter_tweets(
     df: pd.DataFrame, 
     text_col: str = "full_text",
@@ -166,44 +260,53 @@ def filter_tweets(
     """
     Filtre les tweets: supprime RT, doublons, NaN, et optionnellement les tweets de Free
     
+    Un seul masque booléen puis une seule sélection de lignes: pas de copie
+    intermédiaire du DataFrame.
+    
     Args:
         df: DataFrame à filtrer
         text_col: Colonne contenant le texte des tweets
         user_col: Colonne contenant le nom d'utilisateur (pour exclure Free)
         exclude_free: Si True, exclut les tweets des comptes Free
     """
-    df_filtered = df.dropna(subset=[text_col]).copy()
+    text = df[text_col]
+    if not pd.api.types.is_string_dtype(text):
+        text = text.astype(str)
     
-    # Supprimer les RT
-    df_filtered = df_filtered[
-        ~df_filtered[text_col].astype(str).str.startswith(("RT", "rt"), na=False)
-    ].copy()
+    # NaN et RT
+    keep = df[text_col].notna().to_numpy() & ~text.str.startswith(("RT", "rt"), na=False).to_numpy()
     
-    # Exclure les tweets de Free (comptes contenant "free" dans le nom)
-    if exclude_free and user_col in df_filtered.columns:
-        initial_count = len(df_filtered)
-        # Normaliser en minuscules pour la recherche
-        df_filtered["_user_lower"] = df_filtered[user_col].astype(str).str.lower()
-        # Exclure les comptes contenant "free" (free, freebox, free_assistance, etc.)
-        df_filtered = df_filtered[
-            ~df_filtered["_user_lower"].str.contains("free", na=False)
-        ].copy()
-        df_filtered = df_filtered.drop(columns=["_user_lower"])
-        free_count = initial_count - len(df_filtered)
+    # Exclure les tweets de Free (free, freebox, free_assistance, etc.)
+    if exclude_free and user_col in df.columns:
+        official = df[user_col].astype(str).str.contains(_OFFICIAL_ACCOUNT_RE, na=False).to_numpy()
+        free_count = int((keep & official).sum())
+        keep &= ~official
         if free_count > 0:
             logger.info(f"Tweets Free exclus: {free_count}")
     
-    # Supprimer les doublons
-    df_filtered = df_filtered.drop_duplicates(subset=[text_col])
+    # Supprimer les doublons (texte puis tweet_id, première occurrence conservée)
+    positions = np.flatnonzero(keep)
+    positions = _first_occurrences(text, positions)
+    if "tweet_id" in df.columns:
+        positions = _first_occurrences(df["tweet_id"], positions)
     
-    logger.info(f"Tweets filtrés: {len(df_filtered)}/{len(df)} (clients uniquement)")
-    return df_filtered
+    logger.info(f"Tweets filtrés: {len(positions)}/{len(df)} (clients uniquement)")
+    return df.take(positions)
+
+
+def _first_occurrences(values: pd.Series, positions: np.ndarray) -> np.ndarray:
+    """
+    Positions (parmi celles données) des premières occurrences de chaque valeur
+    (table de hachage de duplicated, sur la seule colonne concernée)
+    """
+    return positions[~values.take(positions).duplicated().to_numpy()]
 
 
 def detect_language(text: str) -> str:
     """
     Détecte la langue d'un texte
     """
+    detect, LangDetectException = get_language_detector()
     if detect is None:
         logger.warning("langdetect non disponible, détection basique")
         s = safe_str(text).lower()
@@ -234,11 +337,12 @@ class TranslationError(Exception):
 )
 def _translate_once(text: str, src: Optional[str]) -> str:
     """Traduit un texte une fois avec retry"""
-    if GoogleTranslator is None:
+    translator = get_translator(src or "auto")
+    if translator is None:
         raise TranslationError("deep-translator non installé")
     
     try:
-        out = GoogleTranslator(source=src or "auto", target="fr").translate(text)
+        out = translator.translate(text)
         if not isinstance(out, str) or not out.strip():
             raise TranslationError("Empty translation")
         return out
@@ -263,35 +367,58 @@ def translate_to_french(text: str, lang_hint: Optional[str]) -> str:
         return safe_str(text)
 
 
-def cleaning_with_translation(text: str) -> Tuple[str, str, str]:
+def basic_cleanup(text: str) -> str:
     """
-    Nettoie et traduit un texte
+    Supprime URLs, mentions, # et retours à la ligne
+    """
+    t = safe_str(text)
+    with substep("regex_cleanup"):
+        t = re.sub(r"http\S+|www\.\S+", " ", t)
+        t = re.sub(r"@\w+", " ", t)
+        t = t.replace("#", " ")
+        t = t.replace("\n", " ").replace("\\n", " ")
+    return t
+
+
+def translate_and_normalize(text: str) -> Tuple[str, str, str]:
+    """
+    Détecte la langue, traduit en français puis normalise un texte déjà nettoyé
     Retourne: (langue, texte_traduit_fr, texte_nettoyé)
     """
     t = safe_str(text)
     
-    # Nettoyage de base
-    t = re.sub(r"http\S+|www\.\S+", " ", t)
-    t = re.sub(r"@\w+", " ", t)
-    t = t.replace("#", " ")
-    t = t.replace("\n", " ").replace("\\n", " ")
-    
     # Détection langue et traduction
-    lang = detect_language(t)
-    t_fr_raw = translate_to_french(t, lang)
+    with substep("language_detection"):
+        lang = detect_language(t)
+    with substep("translation"):
+        t_fr_raw = translate_to_french(t, lang)
     
-    # Normalisation
-    t_fr = t_fr_raw.lower()
-    t_fr = reduce_repetitions(t_fr)
-    t_fr = " ".join(split_camel_case(w) for w in t_fr.split())
-    t_fr = remove_punctuation(t_fr, keep_emoji=False)
-    t_fr = expand_abbreviations(t_fr, ABBREV_DICT)
-    t_fr = _EMOJI_RE.sub(" ", t_fr)
-    t_fr = normalize_whitespace(t_fr)
+    with substep("normalization"):
+        t_fr = normalize_text(t_fr_raw)
     
     return lang, t_fr_raw, t_fr
 
 
+def normalize_text(text: str) -> str:
+    """
+    Minuscules, répétitions, camelCase, ponctuation, abréviations et espaces
+    """
+    t = safe_str(text).lower()
+    t = reduce_repetitions(t)
+    t = " ".join(split_camel_case(w) for w in t.split())
+    t = remove_punctuation(t, keep_emoji=False)
+    t = expand_abbreviations(t, ABBREV_DICT)
+    return normalize_whitespace(t)
+
+
+def cleaning_with_translation(text: str) -> Tuple[str, str, str]:
+    """
+    Nettoie et traduit un texte
+    Retourne: (langue, texte_traduit_fr, texte_nettoyé)
+    """
+    return translate_and_normalize(basic_cleanup(text))
+
+
 def preprocess_text(text: str, keep_numbers: bool = False) -> str:
     """
     Préprocessing avec spaCy: tokenisation, lemmatisation, stopwords
@@ -299,10 +426,12 @@ def preprocess_text(text: str, keep_numbers: bool = False) -> str:
     if pd.isna(text) or not safe_str(text):
         return ""
     
+    nlp = get_nlp()
     if nlp is None:
         logger.warning("spaCy non disponible, retour du texte original")
         return safe_str(text)
     
+    stop_words = get_stop_words()
     doc = nlp(safe_str(text))
     tokens = []
     
@@ -310,7 +439,7 @@ def preprocess_text(text: str, keep_numbers: bool = False) -> str:
         if not (tok.is_alpha or (keep_numbers and tok.like_num)):
             continue
         lemma = (tok.lemma_ or tok.text).lower()
-        if not lemma or lemma == "nan" or lemma in STOP_WORDS:
+        if not lemma or lemma == "nan" or lemma in stop_words:
             continue
         tokens.append(lemma)
     
@@ -321,9 +450,9 @@ def pipeline_cleaning(text: str) -> Dict[str, str]:
     """
     Pipeline complet de nettoyage
     """
-    raw = safe_str(text)
-    emojis = extract_emojis(raw)
-    lang, t_fr_raw, t_clean = cleaning_with_translation(raw)
+    with substep("emojis"):
+        emojis, stripped = split_emojis(text)
+    lang, t_fr_raw, t_clean = cleaning_with_translation(stripped)
     
     return {
         "lang": lang,
@@ -333,11 +462,75 @@ def pipeline_cleaning(text: str) -> Dict[str, str]:
     }
 
 
+def prepare_tweets(
+    df: pd.DataFrame,
+    text_col: str = "full_text",
+    user_col: str = "screen_name",
+    exclude_free: bool = True,
+    skip_ids: Optional[Set[str]] = None
+) -> pd.DataFrame:
+    """
+    Ajoute tweet_id, filtre (RT, doublons, comptes Free) et écarte les
+    tweet_id déjà traités (skip_ids)
+    """
+    assert text_col in df.columns, f"Colonne '{text_col}' absente"
+    
+    df = df.copy()
+    df["tweet_id"] = compute_tweet_ids(df, text_col=text_col, user_col=user_col)
+    df[text_col] = df[text_col].astype(str)
+    df_filtered = filter_tweets(df, text_col=text_col, user_col=user_col, exclude_free=exclude_free)
+    
+    if skip_ids:
+        df_filtered = df_filtered[~df_filtered["tweet_id"].isin(skip_ids)]
+        logger.info(f"Exécution incrémentale: {len(df_filtered)} nouveaux tweets à nettoyer")
+    
+    return df_filtered.reset_index(drop=True)
+
+
+def apply_basic_cleanup(df: pd.DataFrame, text_col: str = "full_text") -> pd.DataFrame:
+    """
+    Colonnes emojis et text_stripped (texte sans emojis, URLs ni mentions)
+    """
+    df = df.copy()
+    tqdm.pandas(desc="Nettoyage")
+    with substep("emojis"):
+        # Un seul passage par tweet: emojis extraits et retirés du texte
+        parts = [split_emojis(t) for t in df[text_col]]
+        df["emojis"] = [emojis for emojis, _ in parts]
+        stripped = pd.Series([t for _, t in parts], index=df.index, dtype=object)
+    df["text_stripped"] = stripped.progress_apply(basic_cleanup)
+    return df
+
+
+def apply_translation(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Colonnes lang, text_translated_fr et text_clean depuis text_stripped
+    """
+    df = df.copy()
+    tqdm.pandas(desc="Traduction")
+    res = df["text_stripped"].progress_apply(translate_and_normalize)
+    df["lang"] = [r[0] for r in res]
+    df["text_translated_fr"] = [r[1] for r in res]
+    df["text_clean"] = [r[2] for r in res]
+    return df.drop(columns=["text_stripped"])
+
+
+def apply_lemmatization(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Colonne text_preproc (lemmes spaCy sans stopwords)
+    """
+    df = df.copy()
+    tqdm.pandas(desc="Lemmatisation")
+    df["text_preproc"] = df["text_clean"].progress_apply(lambda x: preprocess_text(x))
+    return df
+
+
 def run_cleaning_on_df(
     df: pd.DataFrame, 
     text_col: str = "full_text",
     user_col: str = "screen_name",
-    exclude_free: bool = True
+    exclude_free: bool = True,
+    skip_ids: Optional[Set[str]] = None
 ) -> pd.DataFrame:
     """
     Applique le pipeline de nettoyage sur un DataFrame
@@ -347,29 +540,27 @@ def run_cleaning_on_df(
         text_col: Colonne contenant le texte des tweets
         user_col: Colonne contenant le nom d'utilisateur (pour exclure Free)
         exclude_free: Si True, exclut les tweets des comptes Free
+        skip_ids: tweet_id déjà traités lors d'un run précédent (exécution incrémentale)
     """
-    assert text_col in df.columns, f"Colonne '{text_col}' absente"
+    with profile_stage("filter", rows_in=len(df)) as stage:
+        df_filtered = prepare_tweets(df, text_col=text_col, user_col=user_col, exclude_free=exclude_free, skip_ids=skip_ids)
+        stage["rows_out"] = len(df_filtered)
     
-    df = df.copy()
-    df[text_col] = df[text_col].astype(str)
-    df_filtered = filter_tweets(df, text_col=text_col, user_col=user_col, exclude_free=exclude_free)
+    if df_filtered.empty:
+        logger.info("Aucun tweet à nettoyer")
+        return df_filtered
     
     logger.info("Début du nettoyage...")
-    tqdm.pandas(desc="Nettoyage")
-    res = df_filtered[text_col].progress_apply(
-        lambda s: pd.Series(pipeline_cleaning(s))
-    )
+    with profile_stage("clean", rows_in=len(df_filtered)):
+        df_filtered = apply_basic_cleanup(df_filtered, text_col=text_col)
     
-    for col in ["lang", "text_translated_fr", "text_clean", "emojis"]:
-        df_filtered[col] = res[col].values
+    with profile_stage("translate", rows_in=len(df_filtered)):
+        df_filtered = apply_translation(df_filtered)
     
     logger.info("Préprocessing avec spaCy...")
-    df_filtered["text_preproc"] = df_filtered["text_clean"].progress_apply(
-        lambda x: preprocess_text(x)
-    )
+    with profile_stage("lemmatize", rows_in=len(df_filtered)):
+        df_filtered = apply_lemmatization(df_filtered)
     
-    df_filtered = df_filtered.reset_index(drop=True)
     logger.info(f"Nettoyage terminé: {len(df_filtered)} tweets")
     
     return df_filtered
-
@@ -17,15 +17,46 @@ ROOT_DIR = Path(__file__).resolve().parents[1]
 DATA_DIR = ROOT_DIR / "data"
 RAW_DIR = DATA_DIR / "raw"
 PROCESSED_DIR = DATA_DIR / "processed"
+INTERIM_DIR = DATA_DIR / "interim"  # artefacts des étapes du pipeline (cache)
+
+# Lecture des exports CSV
+CSV_COLUMNS = ["created_at", "screen_name", "id_str", "tweet_id", "id"]  # + colonne texte; seules colonnes brutes utilisées en aval
+CSV_CHUNK_SIZE = int(os.getenv("CSV_CHUNK_SIZE", "100000"))
+
+# Écriture parquet: triée par date pour filtrer les row groups à la lecture
+PARQUET_SORT_COLUMN = "created_at"
+PARQUET_ROW_GROUP_SIZE = 50_000
+PARQUET_COMPRESSION = "zstd"
+PARQUET_DICTIONARY_COLUMNS = [
+    "motif", "sentiment", "urgence", "risque_churn", "lang", "label_source", "screen_name"
+]
 
 # API Mistral
 MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY", "")
 MISTRAL_MODEL = os.getenv("MISTRAL_MODEL", "mistral-medium-latest")
+MISTRAL_SERVER_URL = os.getenv("MISTRAL_SERVER_URL") or None  # ex: serveur simulé tools/mock_mistral_server.py
 
 # Configuration LLM
 LLM_BATCH_SIZE = 20
 LLM_MAX_RETRIES = 3
-LLM_TIMEOUT = 60
+LLM_TIMEOUT = 60  # secondes, lecture d'une réponse
+LLM_CONNECT_TIMEOUT = 10
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "4"))  # connexions keep-alive, >= appels LLM simultanés
+LLM_RESPONSE_FORMAT = os.getenv("LLM_RESPONSE_FORMAT", "json_schema")  # json_schema | json_object | text
+LLM_REASK_ROUNDS = 1  # nouvelles demandes pour les réponses invalides
+LLM_METRICS_PATH = PROCESSED_DIR / "llm_run_metrics.jsonl"
+
+# Quasi-doublons: un seul appel LLM par cluster de tweets similaires
+NEAR_DUP_ENABLED = True
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.8"))  # Jaccard estimée
+NEAR_DUP_NUM_PERM = 64
+NEAR_DUP_SHINGLE_SIZE = 4
+NEAR_DUP_AUDIT_SAMPLE = int(os.getenv("NEAR_DUP_AUDIT_SAMPLE", "0"))  # 0 = pas d'audit
+
+# Classifieur local: labellise les tweets évidents sans appel LLM
+MODELS_DIR = DATA_DIR / "models"
+LOCAL_CLF_PATH = MODELS_DIR / "local_classifier.joblib"
+LOCAL_CLF_THRESHOLD = float(os.getenv("LOCAL_CLF_THRESHOLD", "0.9"))  # confiance minimale
 
 # Configuration preprocessing
 SPACY_MODEL = "fr_core_news_sm"
@@ -38,6 +69,36 @@ USER_COLUMN = "screen_name"  # Colonne pour identifier les comptes (exclure Free
 
 # Filtrage
 EXCLUDE_FREE_ACCOUNTS = True  # Exclure automatiquement les tweets des comptes Free
+OFFICIAL_ACCOUNT_PATTERN = r"free"  # Regex (insensible à la casse) des comptes exclus
+
+# Prévision du taux de churn (API /api/churn-trend)
+FORECAST_HORIZON = 2  # mois prévus
+FORECAST_INTERVAL = 0.8  # niveau de l'intervalle de prévision
+FORECAST_MIN_MONTHS = 3  # historique minimal pour prévoir
+FORECAST_SEASON_LENGTH = 12  # saisonnalité annuelle (utilisée à partir de 2 ans d'historique)
+
+# Ingestion temps réel (API /api/ingest): segment en mémoire compacté en parquet
+INGEST_DIR = PROCESSED_DIR / "ingested"  # un fichier parquet par compaction, relus au chargement de l'API
+INGEST_COMPACT_ROWS = int(os.getenv("INGEST_COMPACT_ROWS", "5000"))
+INGEST_COMPACT_SECONDS = int(os.getenv("INGEST_COMPACT_SECONDS", "600"))
+
+# Alertes de pics horaires (API /api/alerts): tweets négatifs ou urgents par motif
+ALERTS_STATE_PATH = PROCESSED_DIR / "alerts_state.pkl"  # baselines reprises au chargement suivant
+ALERT_ALPHA = 0.1  # poids d'un nouveau jour dans la moyenne mobile exponentielle (même heure)
+ALERT_Z = 3.0  # écarts-types au-dessus de la baseline
+ALERT_MIN_COUNT = 5  # tweets minimum dans l'heure pour alerter
+ALERT_WARMUP_DAYS = 7  # jours d'historique d'une heure avant d'alerter
+
+# Exemples de tweets (API /api/examples): réservoirs par (mois, motif, sentiment)
+EXAMPLES_PER_BUCKET = int(os.getenv("EXAMPLES_PER_BUCKET", "10"))  # tweets gardés par réservoir et par type
+
+# Thèmes des tweets négatifs (étape topics, python -m src.topics, API /api/topics)
+TOPIC_MODEL_PATH = MODELS_DIR / "topic_model.joblib"
+TOPICS_PATH = PROCESSED_DIR / "topics.json"  # mots-clés et taille de chaque thème, lus par l'API
+TOPIC_COUNT = int(os.getenv("TOPIC_COUNT", "20"))
+TOPIC_FEATURES = 2 ** 18  # colonnes du TF-IDF haché
+TOPIC_BATCH_SIZE = 4096  # tweets par pas de MiniBatchKMeans
+TOPIC_TOP_TERMS = 10
 
 # Couleurs pour le dashboard
 COLORS = {
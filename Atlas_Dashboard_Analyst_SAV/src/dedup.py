@@ -0,0 +1,198 @@
+"""
+Détection de quasi-doublons avant l'enrichissement LLM
+MinHash sur des shingles de caractères + LSH par bandes, regroupement union-find
+
+Doublons exacts sur de très gros exports: ensemble de hashs persistant sur disque
+"""
+import sqlite3
+import zlib
+import logging
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.config import NEAR_DUP_THRESHOLD, NEAR_DUP_NUM_PERM, NEAR_DUP_SHINGLE_SIZE
+from src.utils import normalize_whitespace, safe_str
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Plus petit nombre premier > 2^32 : a*x + b tient dans un uint64
+_PRIME = np.uint64(4294967311)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+
+def _shingle_hashes(text: str, shingle_size: int) -> np.ndarray:
+    """
+    Hache les shingles de caractères d'un texte (crc32, stable entre exécutions)
+    """
+    t = normalize_whitespace(safe_str(text).lower())
+    if len(t) <= shingle_size:
+        shingles = {t}
+    else:
+        shingles = {t[i:i + shingle_size] for i in range(len(t) - shingle_size + 1)}
+    return np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles)
+    )
+
+
+def minhash_signatures(
+    texts: Sequence[str],
+    num_perm: int = NEAR_DUP_NUM_PERM,
+    shingle_size: int = NEAR_DUP_SHINGLE_SIZE,
+    seed: int = 42
+) -> np.ndarray:
+    """
+    Calcule la signature MinHash (num_perm entiers) de chaque texte
+    """
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, 2**31 - 1, size=num_perm).astype(np.uint64)
+    b = rng.randint(0, 2**31 - 1, size=num_perm).astype(np.uint64)
+
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint64)
+    for i, text in enumerate(texts):
+        hashes = _shingle_hashes(text, shingle_size)
+        permuted = (np.outer(hashes, a) + b) % _PRIME & _MAX_HASH
+        signatures[i] = permuted.min(axis=0)
+    return signatures
+
+
+def _find(parent: np.ndarray, i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def cluster_near_duplicates(
+    texts: Sequence[str],
+    threshold: float = NEAR_DUP_THRESHOLD,
+    num_perm: int = NEAR_DUP_NUM_PERM,
+    bands: int = 16
+) -> np.ndarray:
+    """
+    Regroupe les textes dont la similarité de Jaccard estimée dépasse le seuil
+
+    Retourne pour chaque texte la position de son représentant (le premier
+    texte du cluster), un texte isolé étant son propre représentant.
+    """
+    n = len(texts)
+    parent = np.arange(n)
+    if n < 2:
+        return parent
+
+    signatures = minhash_signatures(texts, num_perm=num_perm)
+    rows = num_perm // bands
+
+    # LSH: deux textes partageant une bande complète deviennent candidats
+    for band in range(bands):
+        buckets: Dict[bytes, int] = {}
+        chunk = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        for i in range(n):
+            key = chunk[i].tobytes()
+            first = buckets.setdefault(key, i)
+            if first == i:
+                continue
+            root_i, root_first = _find(parent, i), _find(parent, first)
+            if root_i == root_first:
+                continue
+            similarity = float(np.mean(signatures[i] == signatures[first]))
+            if similarity >= threshold:
+                # Le représentant est toujours la plus petite position
+                parent[max(root_i, root_first)] = min(root_i, root_first)
+
+    clusters = np.array([_find(parent, i) for i in range(n)])
+    n_clusters = len(np.unique(clusters))
+    logger.info(f"Quasi-doublons: {n} tweets regroupés en {n_clusters} clusters (seuil {threshold})")
+    return clusters
+
+
+def sample_cluster_members(clusters: np.ndarray, sample_size: int, seed: int = 42) -> np.ndarray:
+    """
+    Tire un échantillon de membres non représentants pour l'audit des labels propagés
+    """
+    members = np.flatnonzero(clusters != np.arange(len(clusters)))
+    if sample_size <= 0 or len(members) == 0:
+        return np.array([], dtype=int)
+    rng = np.random.RandomState(seed)
+    return np.sort(rng.choice(members, size=min(sample_size, len(members)), replace=False))
+
+
+def label_agreement(
+    propagated: List[Dict[str, str]],
+    reference: List[Dict[str, str]],
+    fields: Sequence[str] = ("motif", "sentiment", "urgence", "risque_churn")
+) -> Dict[str, float]:
+    """
+    Taux d'accord par champ entre labels propagés et labels obtenus directement
+    """
+    n = len(reference)
+    report = {"n": n}
+    for field in fields:
+        if n == 0:
+            report[field] = float("nan")
+            continue
+        same = sum(p.get(field) == r.get(field) for p, r in zip(propagated, reference))
+        report[field] = round(same / n, 3)
+    return report
+
+
+def hash_values(values: pd.Series) -> np.ndarray:
+    """
+    Hash 64 bits signé (stockable en INTEGER SQLite) de chaque valeur
+    """
+    return pd.util.hash_pandas_object(values.astype(str), index=False).to_numpy().view(np.int64)
+
+
+class PersistentHashSet:
+    """
+    Ensemble de hashs stocké dans SQLite: mémoire bornée quel que soit le
+    nombre de tweets déjà vus (traitement par blocs d'un export complet)
+    """
+
+    def __init__(self, path: Path, namespaces: Sequence[str] = ("text", "tweet_id"), reset: bool = True):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if reset and path.exists():
+            path.unlink()
+        self.namespaces = list(namespaces)
+        self.con = sqlite3.connect(str(path))
+        self.con.execute("PRAGMA journal_mode=WAL")
+        self.con.execute("PRAGMA synchronous=OFF")
+        for ns in self.namespaces:
+            self.con.execute(f"CREATE TABLE IF NOT EXISTS seen_{ns} (h INTEGER PRIMARY KEY) WITHOUT ROWID")
+        cols = ", ".join(f"{ns} INTEGER" for ns in self.namespaces)
+        self.con.execute(f"CREATE TEMP TABLE batch (pos INTEGER PRIMARY KEY, {cols})")
+
+    def add_new(self, hashes: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Retourne un masque des lignes jamais vues (pour aucun espace de noms)
+        et les marque comme vues; les lignes déjà vues ne sont pas ajoutées
+        """
+        n = len(next(iter(hashes.values())))
+        columns = [hashes[ns].tolist() for ns in self.namespaces]
+        with self.con:
+            self.con.execute("DELETE FROM batch")
+            self.con.executemany(
+                f"INSERT INTO batch VALUES (?{', ?' * len(self.namespaces)})",
+                zip(range(n), *columns)
+            )
+            seen = " OR ".join(
+                f"EXISTS (SELECT 1 FROM seen_{ns} s WHERE s.h = b.{ns})" for ns in self.namespaces
+            )
+            self.con.execute(f"DELETE FROM batch WHERE pos IN (SELECT pos FROM batch b WHERE {seen})")
+            new_positions = [row[0] for row in self.con.execute("SELECT pos FROM batch")]
+            for ns in self.namespaces:
+                self.con.execute(f"INSERT OR IGNORE INTO seen_{ns} SELECT {ns} FROM batch")
+        mask = np.zeros(n, dtype=bool)
+        mask[new_positions] = True
+        return mask
+
+    def __len__(self) -> int:
+        return self.con.execute(f"SELECT COUNT(*) FROM seen_{self.namespaces[0]}").fetchone()[0]
+
+    def close(self) -> None:
+        self.con.close()
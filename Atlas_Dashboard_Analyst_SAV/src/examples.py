@@ -0,0 +1,102 @@
+"""
+Exemples de tweets par motif et sentiment pour le dashboard
+
+Pour chaque (mois, motif, sentiment), deux réservoirs de EXAMPLES_PER_BUCKET
+lignes: les plus récentes (clé created_at) et un échantillon représentatif
+(clé pseudo-aléatoire dérivée du tweet_id, soit un tirage uniforme stable
+d'un chargement à l'autre). Un réservoir garde les k plus grandes clés, ce
+qui se fusionne: les k plus grandes clés d'une union de réservoirs sont
+celles de l'union des lignes. Un lot ingéré est ainsi fusionné sans
+recalcul, et une requête (tous motifs, plusieurs mois) ne lit que les
+réservoirs concernés, quelques milliers de lignes au plus.
+
+Les filtres de dates sont exacts au mois près; dans un mois partiellement
+couvert, seules les lignes du réservoir comprises dans la période restent.
+"""
+from datetime import date
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.config import EXAMPLES_PER_BUCKET
+
+EXAMPLE_DIMENSIONS = ["month", "motif", "sentiment_norm"]
+EXAMPLE_KINDS = ["representative", "recent"]
+
+ALL_VALUES = "(Tous)"
+
+_COLUMNS = EXAMPLE_DIMENSIONS + ["date", "kind", "key", "row"]
+
+
+def _empty() -> pd.DataFrame:
+    return pd.DataFrame(columns=_COLUMNS).astype({"key": np.int64, "row": np.int64})
+
+
+def _example_keys(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    # Hash signé: l'ordre des clés reste uniforme
+    ids = df["tweet_id"] if "tweet_id" in df.columns else df["full_text"]
+    return {
+        "representative": pd.util.hash_pandas_object(ids, index=False).to_numpy().view(np.int64),
+        "recent": df["created_at"].to_numpy().astype("datetime64[ns]").view(np.int64),
+    }
+
+
+def build_examples(df: pd.DataFrame, k: int = EXAMPLES_PER_BUCKET, offset: int = 0) -> pd.DataFrame:
+    """
+    Réservoirs des lignes de df (une ligne par exemple: dimensions, date,
+    type, clé et position, décalée de offset, dans le frame servi)
+    """
+    dims = [c for c in EXAMPLE_DIMENSIONS if c in df.columns]
+    if df.empty or "month" not in dims or "created_at" not in df.columns:
+        return _empty()
+
+    groups = df.groupby(dims, dropna=False, observed=True).indices.values()
+    parts = []
+    for kind, keys in _example_keys(df).items():
+        # k plus grandes clés de chaque groupe, sans tri complet
+        selected = [idx if len(idx) <= k else idx[np.argpartition(-keys[idx], k - 1)[:k]] for idx in groups]
+        positions = np.concatenate(selected) if selected else np.array([], dtype=np.int64)
+        part = df[dims + ["date"]].iloc[positions].reset_index(drop=True)
+        parts.append(part.assign(kind=kind, key=keys[positions], row=positions + offset))
+    return pd.concat(parts, ignore_index=True).reindex(columns=_COLUMNS)
+
+
+def merge_examples(*tables: pd.DataFrame, k: int = EXAMPLES_PER_BUCKET) -> pd.DataFrame:
+    """
+    Réservoirs de l'union des lignes de plusieurs tables (réservoir vers
+    lot ingéré par exemple)
+    """
+    tables = [t for t in tables if t is not None and not t.empty]
+    if not tables:
+        return _empty()
+    merged = pd.concat(tables, ignore_index=True).sort_values("key", ascending=False, kind="stable")
+    return merged.groupby(EXAMPLE_DIMENSIONS + ["kind"], dropna=False, observed=True).head(k).reset_index(drop=True)
+
+
+def select_examples(
+    examples: pd.DataFrame,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    motif: Optional[str] = None,
+    sentiment: Optional[str] = None,
+    n: int = EXAMPLES_PER_BUCKET
+) -> Dict[str, List[int]]:
+    """
+    Positions des n exemples de chaque type pour la sélection, par clé
+    décroissante (plus récents d'abord pour "recent")
+    """
+    mask = pd.Series(True, index=examples.index)
+    if start_date:
+        mask &= examples["date"] >= start_date
+    if end_date:
+        mask &= examples["date"] <= end_date
+    if motif and motif != ALL_VALUES:
+        mask &= examples["motif"] == motif
+    if sentiment and sentiment != ALL_VALUES:
+        mask &= examples["sentiment_norm"] == sentiment
+    selected = examples[mask]
+    return {
+        kind: selected.loc[selected["kind"] == kind].nlargest(n, "key")["row"].astype(int).tolist()
+        for kind in EXAMPLE_KINDS
+    }
@@ -0,0 +1,110 @@
+"""
+Cube de comptages pour les filtres du dashboard
+
+Le cube agrège les tweets par (date, motif, sentiment, urgence, risque churn):
+quelques milliers de lignes au plus, quelle que soit la taille du dataset.
+Les listes d'options, les bornes de dates et les comptages par option
+(facettes) sont calculés sur le cube plutôt que sur les tweets.
+"""
+from datetime import date
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+FACET_DIMENSIONS = ["date", "motif", "sentiment_norm", "is_urgent", "churn_risk"]
+
+# Paramètre de filtre de l'API -> dimension du cube
+FILTER_DIMENSIONS = {
+    "motif": "motif",
+    "sentiment": "sentiment_norm",
+    "urgent": "is_urgent",
+    "churn": "churn_risk",
+}
+
+ALL_VALUES = "(Tous)"
+
+
+def build_facet_cube(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Comptage des tweets par combinaison des dimensions présentes
+    """
+    dims = [c for c in FACET_DIMENSIONS if c in df.columns]
+    if df.empty or not dims:
+        return pd.DataFrame(columns=dims + ["count"])
+    return df.groupby(dims, dropna=False, observed=True).size().rename("count").reset_index()
+
+
+def filter_cube(
+    cube: pd.DataFrame,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    motif: Optional[str] = None,
+    sentiment: Optional[str] = None,
+    urgent: bool = False,
+    churn: Optional[str] = None,
+    exclude: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Mêmes règles que les filtres de l'API; exclude ignore le filtre d'un paramètre
+    (comptages d'une facette en fonction des autres filtres)
+    """
+    mask = pd.Series(True, index=cube.index)
+    if "date" in cube.columns:
+        if start_date:
+            mask &= cube["date"] >= start_date
+        if end_date:
+            mask &= cube["date"] <= end_date
+
+    selected = {"motif": motif, "sentiment": sentiment, "churn": churn}
+    for param, value in selected.items():
+        dim = FILTER_DIMENSIONS[param]
+        if param != exclude and value and value != ALL_VALUES and dim in cube.columns:
+            mask &= cube[dim] == value
+    if urgent and exclude != "urgent" and "is_urgent" in cube.columns:
+        mask &= cube["is_urgent"].astype(bool)
+    return cube[mask]
+
+
+def _counts(cube: pd.DataFrame, dim: str) -> List[Dict]:
+    if dim not in cube.columns or cube.empty:
+        return []
+    counts = cube.groupby(dim, observed=True)["count"].sum().sort_values(ascending=False)
+    return [{"value": v.item() if hasattr(v, "item") else v, "count": int(c)} for v, c in counts.items() if c > 0]
+
+
+def facet_counts(cube: pd.DataFrame, **filters) -> Dict:
+    """
+    Total filtré et comptage par option de chaque dimension, chaque facette
+    étant calculée avec tous les filtres sauf le sien
+    """
+    result = {"total": int(filter_cube(cube, **filters)["count"].sum())}
+    for param, dim in FILTER_DIMENSIONS.items():
+        result[param] = _counts(filter_cube(cube, exclude=param, **filters), dim)
+    return result
+
+
+def filter_options(cube: pd.DataFrame) -> Dict:
+    """
+    Options des filtres, bornes de dates et facettes sans filtre
+    """
+    dates = cube["date"].dropna() if "date" in cube.columns else pd.Series(dtype=object)
+    options = lambda dim: sorted(cube[dim].dropna().unique().tolist()) if dim in cube.columns else []
+    return {
+        "min_date": dates.min() if len(dates) else None,
+        "max_date": dates.max() if len(dates) else None,
+        "motifs": options("motif"),
+        "churn_risks": options("churn_risk"),
+        "facets": facet_counts(cube),
+    }
+
+
+def merge_cubes(*cubes: pd.DataFrame) -> pd.DataFrame:
+    """
+    Somme de cubes de mêmes dimensions (cube existant + cube d'un lot ingéré)
+    """
+    cubes = [c for c in cubes if not c.empty]
+    if not cubes:
+        return build_facet_cube(pd.DataFrame())
+    merged = pd.concat(cubes, ignore_index=True)
+    dims = [c for c in FACET_DIMENSIONS if c in merged.columns]
+    return merged.groupby(dims, dropna=False, observed=True)["count"].sum().reset_index()
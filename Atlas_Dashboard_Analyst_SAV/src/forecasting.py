@@ -0,0 +1,209 @@
+"""
+Prévision du taux de churn mensuel (global et par motif)
+
+Lissage exponentiel de Holt-Winters: niveau + tendance amortie, plus une
+saisonnalité annuelle additive dès que l'historique couvre deux ans. Les
+paramètres sont choisis par recherche sur grille (erreur de prévision à un
+mois), l'intervalle de prévision vient de la dispersion de ces erreurs.
+
+Les prévisions sont calculées au chargement des données et servies telles
+quelles par l'API; le backtest compare le modèle à l'ancienne extrapolation
+(dernier écart mois sur mois) sur les mois historiques.
+"""
+import itertools
+import logging
+from statistics import NormalDist
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.config import FORECAST_HORIZON, FORECAST_INTERVAL, FORECAST_MIN_MONTHS, FORECAST_SEASON_LENGTH
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ALL_MOTIFS = "(Tous)"
+
+_ALPHAS = (0.2, 0.4, 0.6, 0.8)
+_BETAS = (0.05, 0.1, 0.3)
+_PHIS = (0.8, 0.9, 0.98)
+_GAMMAS = (0.1, 0.3)
+
+
+def _smooth(y: np.ndarray, alpha: float, beta: float, phi: float, gamma: float, m: int):
+    """
+    Passe de Holt-Winters: prévisions à un pas et état final (niveau, tendance, saisons)
+    """
+    seasonal = m > 0
+    if seasonal:
+        level = y[:m].mean()
+        trend = (y[m:2 * m].mean() - level) / m
+        season = list(y[:m] - level)
+    else:
+        level, trend, season = y[0], y[1] - y[0], []
+
+    start = m if seasonal else 1
+    one_step = np.full(len(y), np.nan)
+    for t in range(start, len(y)):
+        s = season[t - m] if seasonal else 0.0
+        one_step[t] = level + phi * trend + s
+        prev_level = level
+        level = alpha * (y[t] - s) + (1 - alpha) * (prev_level + phi * trend)
+        trend = beta * (level - prev_level) + (1 - beta) * phi * trend
+        if seasonal:
+            season.append(gamma * (y[t] - level) + (1 - gamma) * s)
+    return one_step, (level, trend, season)
+
+
+def fit_forecast(
+    y: np.ndarray,
+    horizon: int = FORECAST_HORIZON,
+    season_length: int = FORECAST_SEASON_LENGTH,
+    interval: float = FORECAST_INTERVAL,
+    bounds=(0.0, 100.0)
+) -> Optional[Dict]:
+    """
+    Ajuste le modèle sur une série et prévoit les horizon prochaines valeurs
+
+    Retourne predicted/lower/upper (listes), les paramètres retenus et
+    l'écart-type des erreurs à un pas; None si la série est trop courte.
+    """
+    y = np.asarray(y, dtype=float)
+    if len(y) < max(FORECAST_MIN_MONTHS, 2):
+        return None
+    m = season_length if season_length and len(y) >= 2 * season_length else 0
+
+    best = None
+    for alpha, beta, phi, gamma in itertools.product(_ALPHAS, _BETAS, _PHIS, _GAMMAS if m else (0.0,)):
+        one_step, state = _smooth(y, alpha, beta, phi, gamma, m)
+        errors = (y - one_step)[~np.isnan(one_step)]
+        sse = float(np.sum(errors ** 2))
+        if best is None or sse < best[0]:
+            best = (sse, (alpha, beta, phi, gamma), state, errors)
+
+    _, (alpha, beta, phi, gamma), (level, trend, season), errors = best
+    sigma = float(np.sqrt(np.mean(errors ** 2))) if len(errors) else 0.0
+    z = NormalDist().inv_cdf(0.5 + interval / 2)
+
+    predicted, lower, upper = [], [], []
+    damped = 0.0
+    for h in range(1, horizon + 1):
+        damped += phi ** h
+        value = level + damped * trend + (season[len(season) - m + (h - 1) % m] if m else 0.0)
+        # L'incertitude croît avec l'horizon (approximation en racine de h)
+        width = z * sigma * np.sqrt(h)
+        predicted.append(float(np.clip(value, *bounds)))
+        lower.append(float(np.clip(value - width, *bounds)))
+        upper.append(float(np.clip(value + width, *bounds)))
+
+    return {
+        "predicted": predicted,
+        "lower": lower,
+        "upper": upper,
+        "params": {"alpha": alpha, "beta": beta, "phi": phi, "gamma": gamma, "season_length": m},
+        "sigma": sigma,
+    }
+
+
+def _naive_delta(y: np.ndarray, horizon: int) -> List[float]:
+    # Ancienne méthode de l'API: dernier écart mois sur mois prolongé
+    delta = y[-1] - y[-2]
+    return [max(0.0, y[-1] + delta * h) for h in range(1, horizon + 1)]
+
+
+def backtest(y: np.ndarray, horizon: int = FORECAST_HORIZON, min_train: int = FORECAST_MIN_MONTHS) -> Dict:
+    """
+    Prévisions à origine glissante sur l'historique: erreur absolue moyenne
+    par horizon du modèle et de l'ancienne extrapolation, couverture de l'intervalle
+    """
+    y = np.asarray(y, dtype=float)
+    model_err = [[] for _ in range(horizon)]
+    naive_err = [[] for _ in range(horizon)]
+    covered = []
+    for t in range(max(min_train, 2), len(y)):
+        fc = fit_forecast(y[:t], horizon=horizon)
+        if fc is None:
+            continue
+        naive = _naive_delta(y[:t], horizon)
+        for h in range(min(horizon, len(y) - t)):
+            actual = y[t + h]
+            model_err[h].append(abs(fc["predicted"][h] - actual))
+            naive_err[h].append(abs(naive[h] - actual))
+            covered.append(fc["lower"][h] <= actual <= fc["upper"][h])
+
+    mean = lambda errors: round(float(np.mean(errors)), 2) if errors else None
+    return {
+        "origins": len(model_err[0]),
+        "mae": [mean(e) for e in model_err],
+        "naive_mae": [mean(e) for e in naive_err],
+        "interval_coverage": round(float(np.mean(covered)), 2) if covered else None,
+    }
+
+
+def monthly_churn_rates(df: pd.DataFrame, by_motif: bool = True) -> pd.DataFrame:
+    """
+    Taux de churn (%) par mois, global (motif "(Tous)") et par motif
+    """
+    if df.empty or "month" not in df.columns:
+        return pd.DataFrame(columns=["motif", "month", "total", "churn", "rate"])
+    frames = [df[["month", "is_churn"]].assign(_motif=ALL_MOTIFS)]
+    if by_motif and "motif" in df.columns:
+        frames.append(df[["month", "is_churn", "motif"]].dropna(subset=["motif"]).rename(columns={"motif": "_motif"}))
+    monthly = (
+        pd.concat(frames, ignore_index=True)
+        .groupby(["_motif", "month"])["is_churn"].agg(total="count", churn="sum")
+        .reset_index()
+        .rename(columns={"_motif": "motif"})
+    )
+    monthly["rate"] = (monthly["churn"] / monthly["total"] * 100).fillna(0)
+    return monthly
+
+
+def _month_series(monthly: pd.DataFrame) -> pd.Series:
+    # Mois sans tweet interpolés pour que la série soit régulière
+    rates = monthly.set_index(pd.PeriodIndex(monthly["month"], freq="M"))["rate"].sort_index()
+    full = pd.period_range(rates.index.min(), rates.index.max(), freq="M")
+    return rates.reindex(full).interpolate(limit_direction="both")
+
+
+def forecast_series(monthly: pd.DataFrame, horizon: int = FORECAST_HORIZON, with_backtest: bool = True) -> Dict:
+    """
+    Historique, prévision et backtest d'une série mensuelle (colonnes month, rate)
+    """
+    if monthly.empty:
+        return {"history": [], "forecast": [], "params": None, "backtest": None}
+    observed = dict(zip(monthly["month"].astype(str), monthly["rate"]))
+    series = _month_series(monthly)
+    history = [{"month": m, "actual": round(float(observed[m]), 1)} for m in series.index.astype(str) if m in observed]
+
+    forecast = []
+    fc = fit_forecast(series.to_numpy(), horizon=horizon)
+    if fc is not None:
+        last = series.index[-1]
+        for h in range(horizon):
+            forecast.append({
+                "month": str(last + h + 1),
+                "predicted": round(fc["predicted"][h], 1),
+                "lower": round(fc["lower"][h], 1),
+                "upper": round(fc["upper"][h], 1),
+            })
+    return {
+        "history": history,
+        "forecast": forecast,
+        "params": fc["params"] if fc else None,
+        "backtest": backtest(series.to_numpy(), horizon=horizon) if with_backtest else None,
+    }
+
+
+def build_churn_forecasts(df: pd.DataFrame, horizon: int = FORECAST_HORIZON) -> Dict[str, Dict]:
+    """
+    Prévisions de tous les motifs (et du global), à calculer une fois par version des données
+    """
+    monthly = monthly_churn_rates(df)
+    forecasts = {
+        motif: forecast_series(group, horizon=horizon)
+        for motif, group in monthly.groupby("motif", sort=False)
+    }
+    logger.info(f"Prévisions de churn calculées pour {len(forecasts)} séries")
+    return forecasts
@@ -0,0 +1,179 @@
+"""
+Ingestion temps réel des tweets pour l'API du dashboard
+
+Un lot reçu est soit déjà enrichi (sortie du pipeline: motif, sentiment...),
+soit brut et passé par un chemin rapide: filtre (RT, comptes Free, doublons),
+nettoyage sans détection de langue ni traduction, labels du classifieur
+local. Les tweets négatifs reçoivent le thème prédit par le modèle du
+pipeline (src.topics), s'il a été entraîné. Les lots sont gardés dans un segment en mémoire, compacté en fichier
+parquet dans INGEST_DIR dès qu'il dépasse INGEST_COMPACT_ROWS lignes ou
+INGEST_COMPACT_SECONDS secondes; l'API relit ces fichiers à son démarrage.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from src import cleaning
+from src.config import INGEST_COMPACT_ROWS, INGEST_COMPACT_SECONDS, INGEST_DIR, LOCAL_CLF_PATH, TOPIC_MODEL_PATH
+from src.serving import NO_TOPIC, SERVING_COLUMNS
+from src.utils import load_dataframe, save_dataframe
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = ["full_text", "created_at"]
+
+
+def records_to_frame(records: List[Dict]) -> pd.DataFrame:
+    """
+    DataFrame d'un lot de tweets reçus, avec tweet_id
+
+    Lève ValueError si un champ requis (full_text, created_at) manque.
+    """
+    df = pd.DataFrame.from_records(records)
+    missing = [c for c in REQUIRED_FIELDS if c not in df.columns or df[c].isna().any()]
+    if missing:
+        raise ValueError(f"Champs requis manquants: {', '.join(missing)}")
+    df["tweet_id"] = cleaning.compute_tweet_ids(df)
+    return df.drop_duplicates(subset=["tweet_id"]).reset_index(drop=True)
+
+
+def clean_fast(df: pd.DataFrame, text_col: str = "full_text") -> pd.DataFrame:
+    """
+    Colonnes emojis et text_clean sans détection de langue ni traduction
+    """
+    df = df.copy()
+    parts = [cleaning.split_emojis(t) for t in df[text_col].astype(str)]
+    df["emojis"] = [emojis for emojis, _ in parts]
+    df["text_clean"] = [cleaning.normalize_text(cleaning.basic_cleanup(text)) for _, text in parts]
+    return df
+
+
+@lru_cache(maxsize=1)
+def get_local_model(path: Path = LOCAL_CLF_PATH):
+    """
+    Classifieur local du chemin rapide (None s'il n'a pas été entraîné)
+    """
+    if not path.exists():
+        return None
+    # Import différé: scikit-learn n'est chargé qu'à la première ingestion brute
+    from src.local_classifier import LocalClassifier
+    return LocalClassifier.load(path)
+
+
+@lru_cache(maxsize=1)
+def get_topic_model(path: Path = TOPIC_MODEL_PATH):
+    """
+    Modèle de thèmes du pipeline (None s'il n'a pas été entraîné)
+    """
+    if not path.exists():
+        return None
+    # Import différé, comme pour le classifieur local
+    from src.topics import TopicModel
+    return TopicModel.load(path)
+
+
+def add_topics(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Colonne topic_id d'un lot qui n'en a pas (modèle non mis à jour;
+    NO_TOPIC partout sans modèle)
+    """
+    if "topic_id" in df.columns:
+        return df
+    model = get_topic_model()
+    if model is None:
+        return df.assign(topic_id=NO_TOPIC)
+    from src.topics import assign_topics
+    return assign_topics(df, model)
+
+
+def enrich_raw_tweets(df: pd.DataFrame, model, text_col: str = "full_text") -> pd.DataFrame:
+    """
+    Chemin rapide pour des tweets bruts: filtre, nettoyage et labels du
+    classifieur local (pas d'appel LLM, label_source = "local_fast")
+    """
+    from src.local_classifier import LABEL_FIELDS
+    df = cleaning.prepare_tweets(df, text_col=text_col, exclude_free=True)
+    if df.empty:
+        return df
+    df = clean_fast(df, text_col=text_col)
+    pred = model.predict(df["text_clean"].tolist())
+    for field in LABEL_FIELDS:
+        df[field] = pred[field].to_numpy()
+    df["label_source"] = "local_fast"
+    return df
+
+
+def load_ingested(directory: Path = INGEST_DIR) -> List[pd.DataFrame]:
+    """
+    Lots compactés lors des exécutions précédentes de l'API, dans l'ordre d'écriture
+    """
+    if not directory.exists():
+        return []
+    return [load_dataframe(path) for path in sorted(directory.glob("*.parquet"))]
+
+
+class DeltaSegment:
+    """
+    Tweets ingérés depuis la dernière compaction (lignes préparées pour l'API)
+    """
+
+    def __init__(
+        self,
+        directory: Path = INGEST_DIR,
+        max_rows: int = INGEST_COMPACT_ROWS,
+        max_seconds: float = INGEST_COMPACT_SECONDS
+    ):
+        self.directory = directory
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+        self._frames: List[pd.DataFrame] = []
+        self._rows = 0
+        self._since: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def append(self, df: pd.DataFrame) -> None:
+        with self._lock:
+            self._frames.append(df)
+            self._rows += len(df)
+            if self._since is None:
+                self._since = time.monotonic()
+
+    def frame(self) -> pd.DataFrame:
+        with self._lock:
+            return pd.concat(self._frames, ignore_index=True) if self._frames else pd.DataFrame()
+
+    def compaction_due(self) -> bool:
+        """
+        Vrai si le segment a atteint max_rows lignes ou max_seconds secondes
+        """
+        if not self._rows:
+            return False
+        return self._rows >= self.max_rows or time.monotonic() - self._since >= self.max_seconds
+
+    def compact(self) -> Optional[Path]:
+        """
+        Écrit le segment dans un nouveau fichier parquet (colonnes d'origine,
+        sans les colonnes dérivées par l'API) puis le vide
+        """
+        with self._lock:
+            if not self._frames:
+                return None
+            df = pd.concat(self._frames, ignore_index=True).drop(columns=SERVING_COLUMNS, errors="ignore")
+            path = self.directory / f"ingested_{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}.parquet"
+            # Fichier temporaire renommé: un lot à moitié écrit n'est jamais relu
+            tmp_path = path.with_name(path.name + ".tmp")
+            save_dataframe(df, tmp_path)
+            tmp_path.replace(path)
+            self._frames, self._rows, self._since = [], 0, None
+        logger.info(f"Segment ingéré compacté: {len(df)} tweets -> {path}")
+        return path
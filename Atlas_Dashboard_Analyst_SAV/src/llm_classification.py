@@ -1,12 +1,6 @@
 import json
 import logging
-from typing import List, Dict, Optional
-
-try:
-    from mistralai import Mistral
-except ImportError:
-    Mistral = None
-    logging.warning("mistralai non installé. Installez-le avec: pip install mistralai")
+from typing import Callable, List, Dict, Optional
 
 try:
     from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
@@ -20,12 +14,25 @@ except ImportError:
     wait_exponential = lambda **kwargs: None
     retry_if_exception_type = lambda *args: None
 
-from src.config import MISTRAL_API_KEY, MISTRAL_MODEL, LLM_BATCH_SIZE, LLM_MAX_RETRIES
+from src.config import (
+    MISTRAL_MODEL, LLM_BATCH_SIZE, LLM_MAX_RETRIES,
+    LLM_RESPONSE_FORMAT, LLM_REASK_ROUNDS
+)
+from src.mistral_client import Mistral, get_mistral_client
+from src.parse_llm_outputs import (
+    VALID_MOTIFS, VALID_SENTIMENTS, VALID_URGENCES, VALID_CHURN, is_valid_llm_response
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class LLMClassificationError(Exception):
+    """Erreur d'appel API (réseau, 429, 5xx...), retentée avec backoff"""
+    pass
+
+
+class LLMResponseError(Exception):
+    """Réponse reçue mais inexploitable: pas de retry, elle sera redemandée"""
     pass
 
 SYSTEM_PROMPT = """Tu es un expert en analyse de tweets clients pour un opérateur télécom.
@@ -50,44 +57,156 @@ USER_PROMPT_TEMPLATE = """Analyse ce tweet client et renvoie le JSON:
 
 JSON:"""
 
+REASK_PROMPT = """Ta réponse précédente n'est pas un JSON valide avec les valeurs autorisées.
+Renvoie UNIQUEMENT le JSON avec les champs motif, sentiment, urgence et risque_churn."""
+
+
 def create_prompt(tweet_text: str) -> str:
     return USER_PROMPT_TEMPLATE.format(tweet_text=tweet_text[:500])
 
 
-@retry(reraise=True, stop=stop_after_attempt(LLM_MAX_RETRIES), wait=wait_exponential(multiplier=1, min=2, max=30), retry=retry_if_exception_type((LLMClassificationError, Exception)))
-def classify_one(client: Mistral, tweet_text: str) -> str:
+def build_response_format(mode: str = LLM_RESPONSE_FORMAT) -> Optional[Dict]:
+    """
+    Format de réponse structuré demandé à l'API
+    
+    - "json_schema": schéma strict dont les enums viennent de VALID_*
+    - "json_object": JSON garanti, valeurs non contraintes
+    - "text": pas de contrainte (comportement historique)
+    """
+    if mode == "json_object":
+        return {"type": "json_object"}
+    if mode != "json_schema":
+        return None
+    
+    schema = {
+        "type": "object",
+        "properties": {
+            "motif": {"type": "string", "enum": VALID_MOTIFS},
+            "sentiment": {"type": "string", "enum": VALID_SENTIMENTS},
+            "urgence": {"type": "string", "enum": VALID_URGENCES},
+            "risque_churn": {"type": "string", "enum": VALID_CHURN},
+        },
+        "required": ["motif", "sentiment", "urgence", "risque_churn"],
+        "additionalProperties": False,
+    }
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": "tweet_classification", "schema": schema, "strict": True},
+    }
+
+
+RESPONSE_FORMAT = build_response_format()
+
+
+@retry(reraise=True, stop=stop_after_attempt(LLM_MAX_RETRIES), wait=wait_exponential(multiplier=1, min=2, max=30), retry=retry_if_exception_type(LLMClassificationError))
+def classify_one(client: Mistral, tweet_text: str, previous_response: Optional[str] = None) -> str:
+    """
+    Classifie un tweet; previous_response (réponse invalide) déclenche une
+    nouvelle demande avec rappel du format attendu
+    """
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": create_prompt(tweet_text)}]
+    if previous_response is not None:
+        messages += [{"role": "assistant", "content": previous_response}, {"role": "user", "content": REASK_PROMPT}]
+    
+    kwargs = {"response_format": RESPONSE_FORMAT} if RESPONSE_FORMAT else {}
     try:
-        prompt = create_prompt(tweet_text)
-        
-        response = client.chat.complete(model=MISTRAL_MODEL, messages=[{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": prompt}], temperature=0.1, max_tokens=200)
-        
-        content = response.choices[0].message.content.strip()
-        
-        if not content:
-            raise LLMClassificationError("Réponse vide")
-        
-        return content
-        
+        response = client.chat.complete(model=MISTRAL_MODEL, messages=messages, temperature=0.1, max_tokens=200, **kwargs)
     except Exception as e:
         logger.error(f"Erreur classification tweet: {e}")
         raise LLMClassificationError(str(e))
+    
+    content = (response.choices[0].message.content or "").strip()
+    
+    if not content:
+        raise LLMResponseError("Réponse vide")
+    
+    return content
 
 
-def classify_tweets(client: Mistral, tweets: List[str]) -> List[Dict[str, Optional[str]]]:
+def classify_tweets(
+    client: Mistral,
+    tweets: List[str],
+    previous_responses: Optional[List[Optional[str]]] = None
+) -> List[Dict[str, Optional[str]]]:
     results = []
+    previous_responses = previous_responses or [None] * len(tweets)
     
-    for tweet in tweets:
+    for tweet, previous in zip(tweets, previous_responses):
         try:
-            raw_response = classify_one(client, tweet)
+            raw_response = classify_one(client, tweet, previous_response=previous)
             results.append({"raw_response": raw_response, "tweet": tweet})
+        except LLMResponseError as e:
+            results.append({"raw_response": None, "tweet": tweet, "error": str(e)})
         except Exception as e:
             logger.warning(f"Échec classification pour un tweet: {e}")
-            results.append({"raw_response": None, "tweet": tweet, "error": str(e)})
+            results.append({"raw_response": None, "tweet": tweet, "error": str(e), "api_error": True})
     
     return results
 
 
-def classify_batch(client: Mistral, texts: List[str], batch_size: int = LLM_BATCH_SIZE) -> List[Dict[str, Optional[str]]]:
+def new_run_stats() -> Dict[str, int]:
+    """
+    Compteurs d'un run de classification (taux d'échec de parsing, re-demandes)
+    """
+    return {"responses": 0, "api_errors": 0, "invalid_first_pass": 0, "reasked": 0, "still_invalid": 0}
+
+
+def _needs_reask(result: Dict) -> bool:
+    return not result.get("api_error") and not is_valid_llm_response(result.get("raw_response"))
+
+
+def reask_invalid(
+    client: Mistral,
+    results: List[Dict[str, Optional[str]]],
+    rounds: int = LLM_REASK_ROUNDS,
+    stats: Optional[Dict[str, int]] = None
+) -> List[Dict[str, Optional[str]]]:
+    """
+    Redemande uniquement les réponses invalides du batch (petit sous-batch),
+    au plus `rounds` fois
+    """
+    results = list(results)
+    invalid = [k for k, r in enumerate(results) if _needs_reask(r)]
+    if stats is not None:
+        stats["responses"] += len(results)
+        stats["api_errors"] += sum(1 for r in results if r.get("api_error"))
+        stats["invalid_first_pass"] += len(invalid)
+    
+    for _ in range(rounds):
+        if not invalid:
+            break
+        if stats is not None:
+            stats["reasked"] += len(invalid)
+        retried = classify_tweets(
+            client,
+            [results[k]["tweet"] for k in invalid],
+            previous_responses=[results[k].get("raw_response") or None for k in invalid]
+        )
+        for k, result in zip(invalid, retried):
+            if result.get("raw_response") is not None:
+                results[k] = result
+        invalid = [k for k in invalid if _needs_reask(results[k])]
+    
+    if stats is not None:
+        stats["still_invalid"] += len(invalid)
+    return results
+
+
+def classify_batch(
+    client: Mistral,
+    texts: List[str],
+    batch_size: int = LLM_BATCH_SIZE,
+    on_batch: Optional[Callable[[int, List[Dict[str, Optional[str]]]], None]] = None,
+    stats: Optional[Dict[str, int]] = None
+) -> List[Dict[str, Optional[str]]]:
+    """
+    Classifie les textes par batches
+
+    Les réponses invalides d'un batch sont redemandées avant de passer au
+    suivant. on_batch(start, results) est appelé après chaque batch avec la
+    position du premier texte du batch, pour permettre une sauvegarde
+    incrémentale. stats (voir new_run_stats) est complété en place.
+    """
     all_results = []
     total_batches = (len(texts) + batch_size - 1) // batch_size
     
@@ -100,26 +219,24 @@ def classify_batch(client: Mistral, texts: List[str], batch_size: int = LLM_BATC
         logger.info(f"Traitement batch {batch_num}/{total_batches} ({len(batch)} tweets)...")
         
         try:
-            batch_results = classify_tweets(client, batch)
-            all_results.extend(batch_results)
-            
-            if i + batch_size < len(texts):
-                import time
-                time.sleep(1)
-                
+            batch_results = reask_invalid(client, classify_tweets(client, batch), stats=stats)
         except Exception as e:
             logger.error(f"Erreur batch {batch_num}: {e}")
-            for _ in batch:
-                all_results.append({"raw_response": None, "tweet": "", "error": str(e)})
+            batch_results = [{"raw_response": None, "tweet": "", "error": str(e)} for _ in batch]
+        
+        all_results.extend(batch_results)
+        if on_batch is not None:
+            on_batch(i, batch_results)
+        
+        if i + batch_size < len(texts):
+            import time
+            time.sleep(1)
     
     return all_results
 
 
 def initialize_mistral_client() -> Mistral:
-    if Mistral is None:
-        raise ImportError("mistralai n'est pas installé. Installez-le avec: pip install mistralai")
-    
-    if not MISTRAL_API_KEY:
-        raise ValueError("MISTRAL_API_KEY non définie. Définissez-la dans .env ou variables d'environnement")
-    
-    return Mistral(api_key=MISTRAL_API_KEY)
+    """
+    Client partagé (voir src.mistral_client), réutilisé entre les runs
+    """
+    return get_mistral_client()
@@ -0,0 +1,207 @@
+"""
+Classifieur local (CPU) entraîné sur les labels LLM déjà obtenus
+TF-IDF + régression logistique par champ; seuls les tweets à faible
+confiance sont envoyés au LLM
+"""
+import argparse
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import joblib
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.model_selection import train_test_split
+except ImportError:
+    joblib = None
+    TfidfVectorizer = None
+    LogisticRegression = None
+    train_test_split = None
+    logging.warning("scikit-learn non installé. Installez-le avec: pip install scikit-learn")
+
+from src.config import PROCESSED_DIR, LOCAL_CLF_PATH, LOCAL_CLF_THRESHOLD
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LABEL_FIELDS = ["motif", "sentiment", "urgence", "risque_churn"]
+
+
+class _ConstantModel:
+    """
+    Champ n'ayant qu'une seule valeur dans les données d'entraînement
+    """
+
+    def __init__(self, label: str):
+        self.classes_ = np.array([label])
+
+    def predict_proba(self, X) -> np.ndarray:
+        return np.ones((X.shape[0], 1))
+
+
+class LocalClassifier:
+    """
+    Un vectoriseur TF-IDF partagé et un modèle linéaire par champ LLM
+    """
+
+    def __init__(self, min_df: int = 2, max_features: int = 50000):
+        if TfidfVectorizer is None:
+            raise ImportError("scikit-learn n'est pas installé. Installez-le avec: pip install scikit-learn")
+        self.vectorizer = TfidfVectorizer(
+            ngram_range=(1, 2), min_df=min_df, max_features=max_features, sublinear_tf=True
+        )
+        self.models: Dict[str, LogisticRegression] = {}
+
+    def fit(self, texts: List[str], labels: pd.DataFrame) -> "LocalClassifier":
+        X = self.vectorizer.fit_transform(texts)
+        for field in LABEL_FIELDS:
+            y = labels[field].astype(str).to_numpy()
+            if len(np.unique(y)) < 2:
+                self.models[field] = _ConstantModel(y[0])
+                continue
+            model = LogisticRegression(max_iter=1000, class_weight="balanced")
+            model.fit(X, y)
+            self.models[field] = model
+        return self
+
+    def predict(self, texts: List[str]) -> pd.DataFrame:
+        """
+        Labels prédits par champ + colonne `confidence` (probabilité minimale
+        sur les champs, un tweet n'est fiable que si tous ses champs le sont)
+        """
+        X = self.vectorizer.transform(texts)
+        out = pd.DataFrame(index=range(len(texts)))
+        confidence = np.ones(len(texts))
+        for field, model in self.models.items():
+            proba = model.predict_proba(X)
+            best = proba.argmax(axis=1)
+            out[field] = model.classes_[best]
+            confidence = np.minimum(confidence, proba[np.arange(len(texts)), best])
+        out["confidence"] = confidence
+        return out
+
+    def save(self, path: Path = LOCAL_CLF_PATH) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump(self, path)
+        logger.info(f"Classifieur local sauvegardé: {path}")
+
+    @staticmethod
+    def load(path: Path = LOCAL_CLF_PATH) -> "LocalClassifier":
+        if joblib is None:
+            raise ImportError("scikit-learn n'est pas installé. Installez-le avec: pip install scikit-learn")
+        return joblib.load(path)
+
+
+def _training_frame(df: pd.DataFrame, text_col: str) -> pd.DataFrame:
+    """
+    Ne garde que les tweets réellement labellisés par le LLM
+    """
+    df = df.dropna(subset=[text_col] + LABEL_FIELDS)
+    if "label_source" in df.columns:
+        df = df[df["label_source"].fillna("llm") == "llm"]
+    if "raw_llm_response" in df.columns:
+        df = df[df["raw_llm_response"].notna()]
+    return df
+
+
+def train_local_classifier(
+    df: pd.DataFrame,
+    text_col: str = "text_clean",
+    test_size: float = 0.2,
+    threshold: float = LOCAL_CLF_THRESHOLD
+) -> Tuple[LocalClassifier, Dict]:
+    """
+    Entraîne le classifieur sur les labels LLM et évalue coût/précision
+    sur un échantillon de validation
+    """
+    df = _training_frame(df, text_col)
+    train_df, test_df = train_test_split(df, test_size=test_size, random_state=42)
+    logger.info(f"Entraînement du classifieur local sur {len(train_df)} tweets...")
+
+    clf = LocalClassifier().fit(train_df[text_col].astype(str).tolist(), train_df)
+    thresholds = sorted({0.6, 0.7, 0.8, 0.9, 0.95, threshold})
+    report = cost_accuracy_report(clf, test_df, text_col=text_col, thresholds=thresholds)
+    return clf, report
+
+
+def cost_accuracy_report(
+    clf: LocalClassifier,
+    df: pd.DataFrame,
+    text_col: str = "text_clean",
+    thresholds: Optional[List[float]] = None
+) -> Dict:
+    """
+    Pour chaque seuil: part des tweets labellisés localement (appels LLM
+    évités) et accord avec les labels LLM sur cette part
+    """
+    thresholds = thresholds or [0.6, 0.7, 0.8, 0.9, 0.95]
+    pred = clf.predict(df[text_col].astype(str).tolist())
+    truth = df[LABEL_FIELDS].astype(str).reset_index(drop=True)
+
+    rows = []
+    for threshold in thresholds:
+        confident = (pred["confidence"] >= threshold).to_numpy()
+        row = {
+            "threshold": threshold,
+            "coverage": round(float(confident.mean()), 3) if len(df) else 0.0,
+            "llm_calls_saved": int(confident.sum())
+        }
+        for field in LABEL_FIELDS:
+            if confident.any():
+                row[f"accuracy_{field}"] = round(float((pred.loc[confident, field] == truth.loc[confident, field]).mean()), 3)
+            else:
+                row[f"accuracy_{field}"] = None
+        rows.append(row)
+
+    return {"n_eval": len(df), "thresholds": rows}
+
+
+def label_confident(
+    clf: LocalClassifier,
+    texts: List[str],
+    threshold: float = LOCAL_CLF_THRESHOLD
+) -> Dict[int, str]:
+    """
+    Labellise localement les tweets dont la confiance dépasse le seuil
+
+    Retourne {position: réponse JSON} au format des réponses LLM, pour que
+    le parsing en aval reste identique.
+    """
+    if not texts:
+        return {}
+    pred = clf.predict(texts)
+    confident = pred.index[pred["confidence"] >= threshold]
+    logger.info(f"Classifieur local: {len(confident)}/{len(texts)} tweets labellisés (seuil {threshold})")
+    return {
+        int(pos): json.dumps(
+            {field: pred.at[pos, field] for field in LABEL_FIELDS},
+            ensure_ascii=False
+        )
+        for pos in confident
+    }
+
+
+def main():
+    from src.utils import load_dataframe
+
+    parser = argparse.ArgumentParser(description="Classifieur local pour labellisation à bas coût")
+    parser.add_argument("--input", type=str, default=str(PROCESSED_DIR / "tweets_enriched.parquet"))
+    parser.add_argument("--output", type=str, default=str(LOCAL_CLF_PATH))
+    parser.add_argument("--threshold", type=float, default=LOCAL_CLF_THRESHOLD)
+    args = parser.parse_args()
+
+    df = load_dataframe(Path(args.input))
+    clf, report = train_local_classifier(df, threshold=args.threshold)
+    clf.save(Path(args.output))
+
+    # Rapport coût/précision sur l'échantillon de validation
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
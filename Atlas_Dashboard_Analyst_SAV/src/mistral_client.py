@@ -1,11 +1,92 @@
-import os
-from dotenv import load_dotenv
-from mistralai import Mistral
+"""
+Client Mistral partagé
 
-load_dotenv()
+Un seul client, créé au premier appel et réutilisé par tout le pipeline,
+avec un transport HTTP keep-alive (pool de connexions) et des timeouts
+explicites. L'import du module ne nécessite ni clé API ni SDK installé.
+"""
+import logging
+import threading
+from typing import Optional
 
-API_KEY = os.getenv("MISTRAL_API_KEY")
-if not API_KEY:
-    raise ValueError("MISTRAL_API_KEY manquant. Ajoute-le dans un fichier .env à la racine du projet.")
+try:
+    from mistralai import Mistral
+except ImportError:
+    Mistral = None
+    logging.warning("mistralai non installé. Installez-le avec: pip install mistralai")
 
-client = Mistral(api_key=API_KEY)
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from src.config import (
+    MISTRAL_API_KEY, MISTRAL_SERVER_URL, LLM_TIMEOUT, LLM_CONNECT_TIMEOUT, LLM_POOL_SIZE
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_client = None
+_http_client = None
+_lock = threading.Lock()
+
+
+def build_http_client(pool_size: int = LLM_POOL_SIZE, timeout: float = LLM_TIMEOUT, connect_timeout: float = LLM_CONNECT_TIMEOUT):
+    """
+    Transport httpx avec pool de connexions persistantes
+    """
+    if httpx is None:
+        raise ImportError("httpx n'est pas installé. Installez-le avec: pip install httpx")
+    
+    return httpx.Client(
+        limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size, keepalive_expiry=60.0),
+        timeout=httpx.Timeout(timeout, connect=connect_timeout),
+    )
+
+
+def get_mistral_client(pool_size: Optional[int] = None):
+    """
+    Retourne le client Mistral partagé (créé au premier appel)
+    
+    pool_size n'est pris en compte qu'à la création du client.
+    """
+    global _client, _http_client
+    if _client is not None:
+        return _client
+    
+    with _lock:
+        if _client is not None:
+            return _client
+        
+        if Mistral is None:
+            raise ImportError("mistralai n'est pas installé. Installez-le avec: pip install mistralai")
+        if not MISTRAL_API_KEY:
+            raise ValueError("MISTRAL_API_KEY non définie. Définissez-la dans .env ou variables d'environnement")
+        
+        _http_client = build_http_client(pool_size or LLM_POOL_SIZE)
+        kwargs = {"server_url": MISTRAL_SERVER_URL} if MISTRAL_SERVER_URL else {}
+        if MISTRAL_SERVER_URL:
+            logger.info(f"Client Mistral pointé sur {MISTRAL_SERVER_URL}")
+        
+        _client = Mistral(api_key=MISTRAL_API_KEY, client=_http_client, timeout_ms=int(LLM_TIMEOUT * 1000), **kwargs)
+        return _client
+
+
+def close_mistral_client():
+    """
+    Ferme le pool de connexions; le prochain appel recrée un client
+    """
+    global _client, _http_client
+    with _lock:
+        if _http_client is not None:
+            _http_client.close()
+        _client = None
+        _http_client = None
+
+
+def __getattr__(name):
+    # Compatibilité: `from src.mistral_client import client` crée le client à la demande
+    if name == "client":
+        return get_mistral_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,7 +4,11 @@ Module de parsing sécurisé des réponses LLM
 import json
 import re
 import logging
-from typing import Dict, Optional, Any
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, Optional, Any, Tuple, Union
+
+import numpy as np
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -23,54 +27,130 @@ VALID_SENTIMENTS = ["positif", "neutre", "négatif"]
 VALID_URGENCES = ["faible", "moyenne", "élevée"]
 VALID_CHURN = ["faible", "modéré", "élevé"]
 
+_JSON_TOKEN_RE = re.compile(r'[{}"\\]')
+_JSON_DECODER = json.JSONDecoder()
 
-def extract_json_from_text(text: str) -> Optional[str]:
+
+def _scan_json_span(text: str, start: int) -> Optional[Tuple[int, int]]:
     """
-    Extrait le JSON d'un texte qui peut contenir du texte avant/après
+    Bornes du premier objet {...} équilibré à partir de start
+    
+    Un seul parcours linéaire avec compteur d'accolades: les accolades
+    présentes dans les chaînes JSON sont ignorées et un objet non refermé
+    (réponse tronquée) donne None, sans retour arrière.
     """
-    if not text:
-        return None
+    depth = 0
+    in_string = False
+    escaped_pos = -1
+    # Seuls { } " et \ comptent: la regex saute le reste du texte en C
+    for m in _JSON_TOKEN_RE.finditer(text, start):
+        i = m.start()
+        c = text[i]
+        if in_string:
+            if i == escaped_pos:
+                continue
+            if c == "\\":
+                escaped_pos = i + 1
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            if depth > 0:
+                in_string = True
+        elif c == "{":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif c == "}" and depth > 0:
+            depth -= 1
+            if depth == 0:
+                return start, i + 1
     
-    # Chercher un bloc JSON (entre { et })
-    json_match = re.search(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', text, re.DOTALL)
-    if json_match:
-        return json_match.group(0)
+    return None
+
+
+def _locate_json(text: str) -> Tuple[Optional[Tuple[int, int]], Optional[dict]]:
+    """
+    Localise le premier objet JSON d'un texte; renvoie (bornes, objet décodé
+    si le chemin rapide a réussi)
+    """
+    if not text:
+        return None, None
     
-    # Si pas trouvé, essayer de trouver entre ```json et ```
-    code_block = re.search(r'```json\s*(.*?)\s*```', text, re.DOTALL)
-    if code_block:
-        return code_block.group(1).strip()
+    start = text.find("{")
+    if start < 0 or text.find("}", start) < 0:
+        return None, None
     
-    # Dernier recours: chercher juste après "JSON:" ou similaire
-    after_json = re.search(r'(?:json|JSON):\s*(\{.*\})', text, re.DOTALL | re.IGNORECASE)
-    if after_json:
-        return after_json.group(1)
+    # Chemin rapide (cas courant): décodeur C à partir de la première accolade,
+    # le texte qui suit l'objet est ignoré
+    try:
+        obj, end = _JSON_DECODER.raw_decode(text, start)
+        if isinstance(obj, dict):
+            return (start, end), obj
+    except ValueError:
+        pass
     
-    return None
+    return _scan_json_span(text, start), None
 
 
-def normalize_value(value: Any, valid_values: list, default: str) -> str:
+def extract_json_from_text(text: str) -> Optional[str]:
     """
-    Normalise une valeur pour qu'elle soit dans la liste valide
+    Extrait le premier objet JSON complet d'un texte (texte avant/après,
+    bloc ```json, préfixe "JSON:"...), en temps linéaire
     """
-    if not value:
-        return default
-    
-    value_str = str(value).lower().strip()
+    span, _ = _locate_json(text)
+    if span is None:
+        return None
+    return text[span[0]:span[1]]
+
+
+def _fold(value: str) -> str:
+    """
+    Minuscules, espaces retirés et accents supprimés ("Négatif " -> "negatif")
+    """
+    decomposed = unicodedata.normalize("NFKD", value.lower().strip())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+@lru_cache(maxsize=32)
+def _build_lookup(valid_values: Tuple[str, ...]) -> Dict[str, str]:
+    """
+    Table forme normalisée -> valeur canonique (exacte et sans accents)
+    """
+    return {_fold(v): v for v in valid_values}
+
+
+@lru_cache(maxsize=4096)
+def _normalize_cached(value_str: str, valid_values: Tuple[str, ...], default: str) -> str:
+    lookup = _build_lookup(valid_values)
     
-    # Correspondance exacte
-    for v in valid_values:
-        if value_str == v.lower():
-            return v
+    # Correspondance exacte (avec ou sans accents)
+    folded = _fold(value_str)
+    if not folded:
+        return default
+    if folded in lookup:
+        return lookup[folded]
     
     # Correspondance partielle
-    for v in valid_values:
-        if v.lower() in value_str or value_str in v.lower():
+    for key, v in lookup.items():
+        if key in folded or folded in key:
             return v
     
     return default
 
 
+def normalize_value(value: Any, valid_values: list, default: str) -> str:
+    """
+    Normalise une valeur pour qu'elle soit dans la liste valide
+    
+    Le vocabulaire renvoyé par le LLM est très réduit: le résultat est mis
+    en cache par (valeur, liste valide), un appel coûte donc un lookup.
+    """
+    if not value:
+        return default
+    
+    return _normalize_cached(str(value), tuple(valid_values), default)
+
+
 def parse_llm_response(raw_response: Optional[str]) -> Dict[str, str]:
     """
     Parse une réponse LLM de manière sécurisée avec fallback
@@ -81,14 +161,15 @@ def parse_llm_response(raw_response: Optional[str]) -> Dict[str, str]:
     
     try:
         # Extraire le JSON
-        json_str = extract_json_from_text(raw_response)
+        span, parsed = _locate_json(raw_response)
         
-        if not json_str:
+        if span is None:
             logger.warning(f"JSON non trouvé dans: {raw_response[:100]}...")
             return DEFAULT_VALUES.copy()
         
-        # Parser le JSON
-        parsed = json.loads(json_str)
+        # Parser le JSON (si le chemin rapide n'a pas déjà décodé l'objet)
+        if parsed is None:
+            parsed = json.loads(raw_response[span[0]:span[1]])
         
         # Extraire et normaliser les valeurs
         motif = normalize_value(
@@ -131,6 +212,40 @@ def parse_llm_response(raw_response: Optional[str]) -> Dict[str, str]:
         return DEFAULT_VALUES.copy()
 
 
+_FIELD_VALUES = {
+    "motif": VALID_MOTIFS,
+    "sentiment": VALID_SENTIMENTS,
+    "urgence": VALID_URGENCES,
+    "risque_churn": VALID_CHURN
+}
+
+
+def is_valid_llm_response(raw_response: Optional[str]) -> bool:
+    """
+    Réponse strictement exploitable: JSON trouvé et chaque champ correspond
+    exactement (à la casse et aux accents près) à une valeur autorisée,
+    sans recours aux valeurs par défaut
+    """
+    if not raw_response:
+        return False
+    try:
+        span, parsed = _locate_json(raw_response)
+        if span is None:
+            return False
+        if parsed is None:
+            parsed = json.loads(raw_response[span[0]:span[1]])
+    except ValueError:
+        return False
+    if not isinstance(parsed, dict):
+        return False
+    
+    for field, valid_values in _FIELD_VALUES.items():
+        value = parsed.get(field)
+        if not isinstance(value, str) or _fold(value) not in _build_lookup(tuple(valid_values)):
+            return False
+    return True
+
+
 def add_churn_risk_flag(df_row: Dict[str, Any]) -> bool:
     """
     Ajoute une colonne is_churn_risk basée sur risque_churn
@@ -139,19 +254,38 @@ def add_churn_risk_flag(df_row: Dict[str, Any]) -> bool:
     return risque in ["modéré", "élevé"]
 
 
-def parse_batch_responses(batch_results: list) -> list:
+def parse_batch_responses(batch_results: list, columnar: bool = False) -> Union[list, Dict[str, np.ndarray]]:
     """
     Parse un batch de réponses LLM
+    
+    Les réponses identiques (ex: propagées à un cluster de quasi-doublons)
+    ne sont parsées qu'une fois. Avec columnar=True, retourne un dict
+    {colonne: np.ndarray} directement assignable à un DataFrame.
     """
-    parsed_results = []
+    cache: Dict[Optional[str], Dict[str, str]] = {}
+    parsed_rows: List[Dict[str, str]] = []
     
     for result in batch_results:
         raw_response = result.get("raw_response")
-        parsed = parse_llm_response(raw_response)
-        
+        parsed = cache.get(raw_response)
+        if parsed is None:
+            parsed = parse_llm_response(raw_response)
+            cache[raw_response] = parsed
+        parsed_rows.append(parsed)
+    
+    if columnar:
+        columns = {
+            field: np.array([row[field] for row in parsed_rows], dtype=object)
+            for field in DEFAULT_VALUES
+        }
+        columns["is_churn_risk"] = np.isin(columns["risque_churn"], ["modéré", "élevé"])
+        return columns
+    
+    parsed_results = []
+    for parsed in parsed_rows:
+        parsed = dict(parsed)
         # Ajouter is_churn_risk
         parsed["is_churn_risk"] = add_churn_risk_flag(parsed)
-        
         parsed_results.append(parsed)
     
     return parsed_results
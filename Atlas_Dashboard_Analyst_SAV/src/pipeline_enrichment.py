@@ -2,147 +2,373 @@
 Pipeline complet d'enrichissement avec LLM
 Gère les batches, retry, sauvegarde incrémentale
 """
+import numpy as np
 import pandas as pd
 import logging
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 from tqdm import tqdm
 
-from src.config import PROCESSED_DIR, LLM_BATCH_SIZE
-from src.llm_classification import initialize_mistral_client, classify_batch
-from src.parse_llm_outputs import parse_batch_responses
-from src.utils import save_dataframe, load_dataframe
+from src.config import (
+    LLM_BATCH_SIZE,
+    NEAR_DUP_ENABLED, NEAR_DUP_THRESHOLD, NEAR_DUP_AUDIT_SAMPLE,
+    LOCAL_CLF_THRESHOLD, LLM_METRICS_PATH
+)
+from src.dedup import cluster_near_duplicates, sample_cluster_members, label_agreement
+from src.llm_classification import initialize_mistral_client, classify_batch, new_run_stats
+from src.parse_llm_outputs import parse_batch_responses, parse_llm_response
+from src.profiling import profile_stage
+from src.utils import load_dataframe
+from src.utils_io import append_jsonl, read_jsonl
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+LLM_COLUMNS = ["motif", "sentiment", "urgence", "risque_churn", "is_churn_risk"]
+
+
+def tweet_keys(df: pd.DataFrame, text_col: str = "text_clean") -> pd.Series:
+    """
+    Clé stable d'un tweet pour la reprise: colonne tweet_id si présente,
+    sinon hash du texte (indépendant de l'ordre et du filtrage des lignes)
+    """
+    if "tweet_id" in df.columns:
+        return df["tweet_id"].astype(str)
+    hashed = pd.util.hash_pandas_object(df[text_col].fillna("").astype(str), index=False)
+    return hashed.map("{:016x}".format)
+
+
 def enrich_with_llm(
     df: pd.DataFrame,
     text_col: str = "text_clean",
     checkpoint_path: Optional[Path] = None,
-    resume: bool = True
+    resume: bool = True,
+    dedup: bool = NEAR_DUP_ENABLED,
+    dedup_threshold: float = NEAR_DUP_THRESHOLD,
+    audit_sample: int = NEAR_DUP_AUDIT_SAMPLE,
+    local_model=None,
+    local_threshold: float = LOCAL_CLF_THRESHOLD
 ) -> pd.DataFrame:
     """
     Enrichit un DataFrame avec les classifications LLM
     
+    Les réponses sont ajoutées après chaque batch à un journal JSONL
+    append-only (checkpoint_path): un crash ne perd que le batch en cours
+    et la reprise se fait par clé de tweet stable.
+    
     Args:
         df: DataFrame avec colonnes nettoyées
         text_col: Colonne contenant le texte à classifier
-        checkpoint_path: Chemin pour sauvegarder les résultats intermédiaires
+        checkpoint_path: Journal JSONL des réponses LLM (créé ou complété)
         resume: Si True, reprend depuis le checkpoint si existant
+        dedup: Si True, classifie un seul représentant par cluster de quasi-doublons
+        dedup_threshold: Similarité minimale (Jaccard estimée) pour regrouper deux tweets
+        audit_sample: Nombre de membres de clusters reclassifiés pour mesurer l'accord des labels
+        local_model: LocalClassifier optionnel; les tweets au-dessus de local_threshold
+            sont labellisés localement et ne sont pas envoyés au LLM
+        local_threshold: Confiance minimale du classifieur local
+    """
+    df = collect_llm_responses(
+        df,
+        text_col=text_col,
+        checkpoint_path=checkpoint_path,
+        resume=resume,
+        dedup=dedup,
+        dedup_threshold=dedup_threshold,
+        audit_sample=audit_sample,
+        local_model=local_model,
+        local_threshold=local_threshold
+    )
+    df = parse_llm_columns(df)
+    logger.info("Enrichissement LLM terminé!")
+    return df
+
+
+def collect_llm_responses(
+    df: pd.DataFrame,
+    text_col: str = "text_clean",
+    checkpoint_path: Optional[Path] = None,
+    resume: bool = True,
+    dedup: bool = NEAR_DUP_ENABLED,
+    dedup_threshold: float = NEAR_DUP_THRESHOLD,
+    audit_sample: int = NEAR_DUP_AUDIT_SAMPLE,
+    local_model=None,
+    local_threshold: float = LOCAL_CLF_THRESHOLD,
+    config_key: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Obtient les réponses brutes (journal + LLM) sans les parser
+    
+    Ajoute raw_llm_response, dup_cluster_id et label_source (voir enrich_with_llm).
+    config_key (empreinte du modèle, du prompt...) est écrit dans chaque
+    enregistrement du journal: la reprise ignore les réponses obtenues avec
+    une autre configuration, ces tweets sont reclassifiés
     """
     df = df.copy()
+    keys = tweet_keys(df, text_col)
+    
+    if checkpoint_path is not None and checkpoint_path.suffix != ".jsonl":
+        checkpoint_path = checkpoint_path.with_suffix(".jsonl")
+        logger.info(f"Le checkpoint est un journal JSONL: {checkpoint_path}")
     
-    # Vérifier si checkpoint existe
-    if resume and checkpoint_path and checkpoint_path.exists():
+    # Réponses déjà obtenues (journal existant)
+    records: List[Dict] = []
+    if resume and checkpoint_path is not None and checkpoint_path.exists():
         logger.info(f"Chargement du checkpoint: {checkpoint_path}")
-        try:
-            df_checkpoint = load_dataframe(checkpoint_path)
-            # Identifier les tweets déjà traités
-            if "raw_llm_response" in df_checkpoint.columns:
-                processed_ids = set(df_checkpoint.index)
-                df_to_process = df[~df.index.isin(processed_ids)]
-                logger.info(f"Reprise: {len(df_to_process)} tweets restants sur {len(df)}")
-            else:
-                df_to_process = df
-        except Exception as e:
-            logger.warning(f"Erreur chargement checkpoint: {e}. Reprise depuis le début.")
-            df_to_process = df
-    else:
-        df_to_process = df
+        records = [r for r in read_jsonl(checkpoint_path) if r.get("config") == config_key]
+    elif checkpoint_path is not None and checkpoint_path.exists():
+        checkpoint_path.unlink()
+    
+    processed_keys = {r["tweet_id"] for r in records}
+    to_process = ~keys.isin(processed_keys).to_numpy()
+    if records:
+        logger.info(f"Reprise: {int(to_process.sum())} tweets restants sur {len(df)}")
     
-    if len(df_to_process) == 0:
+    if to_process.any():
+        with profile_stage("classify", rows_in=int(to_process.sum())) as stage:
+            new_records = _classify_pending(
+                df.loc[to_process, text_col].fillna("").astype(str).tolist(),
+                keys[to_process].tolist(),
+                checkpoint_path,
+                dedup=dedup,
+                dedup_threshold=dedup_threshold,
+                audit_sample=audit_sample,
+                local_model=local_model,
+                local_threshold=local_threshold,
+                config_key=config_key
+            )
+            stage["rows_out"] = len(new_records)
+        records.extend(new_records)
+    else:
         logger.info("Tous les tweets sont déjà traités!")
-        return df
     
-    # Initialiser client Mistral
+    return attach_responses(df, keys, records)
+
+
+def attach_responses(df: pd.DataFrame, keys: pd.Series, records: List[Dict]) -> pd.DataFrame:
+    """
+    Aligne les enregistrements du journal sur les lignes de df (une seule
+    jointure vectorisée sur la clé du tweet)
+    """
+    responses = pd.DataFrame.from_records(
+        records, columns=["tweet_id", "raw_response", "dup_cluster_id", "label_source"]
+    )
+    responses = responses.drop_duplicates(subset=["tweet_id"], keep="last").set_index("tweet_id")
+    aligned = responses.reindex(keys.values)
+    
+    raw = aligned["raw_response"].astype(object).where(aligned["raw_response"].notna(), None)
+    df["raw_llm_response"] = raw.values
+    df["dup_cluster_id"] = aligned["dup_cluster_id"].values
+    df["label_source"] = aligned["label_source"].values
+    return df
+
+
+def parse_llm_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Parse raw_llm_response en colonnes motif, sentiment, urgence, risque_churn, is_churn_risk
+    """
+    logger.info("Parsing des réponses LLM...")
+    df = df.copy()
+    with profile_stage("parse", rows_in=len(df)) as stage:
+        raw = df["raw_llm_response"].astype(object).where(df["raw_llm_response"].notna(), None)
+        parsed = parse_batch_responses([{"raw_response": r} for r in raw], columnar=True)
+        for col in LLM_COLUMNS:
+            df[col] = parsed[col]
+        stage["rows_out"] = len(df)
+    return df
+
+
+def _classify_pending(
+    texts: List[str],
+    keys: List[str],
+    checkpoint_path: Optional[Path],
+    dedup: bool,
+    dedup_threshold: float,
+    audit_sample: int,
+    local_model=None,
+    local_threshold: float = LOCAL_CLF_THRESHOLD,
+    config_key: Optional[str] = None
+) -> List[Dict]:
+    """
+    Classifie les tweets restants et journalise chaque batch dès sa réception
+    (avec config_key si fournie, voir collect_llm_responses)
+    """
+    extra = {"config": config_key} if config_key is not None else {}
+    new_records: List[Dict] = []
+    
+    # Labellisation locale des tweets évidents, le reste part au LLM
+    if local_model is not None:
+        # Import différé: scikit-learn n'est chargé qu'avec --local-model
+        from src.local_classifier import label_confident
+        with profile_stage("local_model", rows_in=len(texts)) as stage:
+            local_responses = label_confident(local_model, texts, threshold=local_threshold)
+            stage["rows_out"] = len(local_responses)
+        local_records = [
+            {"tweet_id": keys[pos], "raw_response": raw, "dup_cluster_id": keys[pos], "label_source": "local", **extra}
+            for pos, raw in local_responses.items()
+        ]
+        new_records.extend(local_records)
+        if checkpoint_path is not None:
+            append_jsonl(checkpoint_path, local_records)
+        
+        remaining = [pos for pos in range(len(texts)) if pos not in local_responses]
+        texts = [texts[pos] for pos in remaining]
+        keys = [keys[pos] for pos in remaining]
+        if not texts:
+            return new_records
+    
     try:
         client = initialize_mistral_client()
     except Exception as e:
         logger.error(f"Erreur initialisation Mistral: {e}")
         raise
     
-    # Préparer les textes
-    texts = df_to_process[text_col].fillna("").astype(str).tolist()
+    # Regroupement des quasi-doublons: un appel LLM par cluster
+    with profile_stage("dedup", rows_in=len(texts)) as stage:
+        if dedup:
+            clusters = cluster_near_duplicates(texts, threshold=dedup_threshold)
+        else:
+            clusters = np.arange(len(texts))
+        rep_positions = np.unique(clusters)
+        stage["rows_out"] = len(rep_positions)
+    members = pd.Series(np.arange(len(texts))).groupby(clusters).apply(list)
     
-    # Classification par batches
-    logger.info(f"Début classification LLM pour {len(texts)} tweets...")
-    batch_results = classify_batch(client, texts, batch_size=LLM_BATCH_SIZE)
+    def _log_batch(start: int, batch_results: List[Dict]) -> None:
+        batch_records = []
+        for rep, result in zip(rep_positions[start:start + len(batch_results)], batch_results):
+            if result.get("raw_response") is None:
+                # Échec: non journalisé pour être retenté à la reprise
+                continue
+            for pos in members[rep]:
+                batch_records.append({
+                    "tweet_id": keys[pos],
+                    "raw_response": result["raw_response"],
+                    "dup_cluster_id": keys[rep],
+                    "label_source": "llm",
+                    **extra
+                })
+        new_records.extend(batch_records)
+        if checkpoint_path is not None:
+            append_jsonl(checkpoint_path, batch_records)
     
-    # Parser les réponses
-    logger.info("Parsing des réponses LLM...")
-    parsed_results = parse_batch_responses(batch_results)
-    
-    # Ajouter les colonnes au DataFrame
-    llm_columns = ["motif", "sentiment", "urgence", "risque_churn", "is_churn_risk"]
-    
-    for col in llm_columns:
-        if col not in df.columns:
-            df[col] = None
-    
-    # Remplir les valeurs pour les tweets traités
-    for idx, parsed in zip(df_to_process.index, parsed_results):
-        for col in llm_columns:
-            if col in parsed:
-                df.loc[idx, col] = parsed[col]
-    
-    # Ajouter les réponses brutes pour debug
-    if "raw_llm_response" not in df.columns:
-        df["raw_llm_response"] = None
+    logger.info(f"Début classification LLM pour {len(rep_positions)} tweets ({len(texts)} avant dédoublonnage)...")
+    stats = new_run_stats()
+    with profile_stage("llm", rows_in=len(rep_positions)) as stage:
+        classify_batch(
+            client,
+            [texts[p] for p in rep_positions],
+            batch_size=LLM_BATCH_SIZE,
+            on_batch=_log_batch,
+            stats=stats
+        )
+        stage["rows_out"] = stats["responses"] - stats["still_invalid"] - stats["api_errors"]
+    _log_run_stats(stats)
     
-    for idx, result in zip(df_to_process.index, batch_results):
-        df.loc[idx, "raw_llm_response"] = result.get("raw_response")
+    if dedup and audit_sample > 0:
+        by_key = {r["tweet_id"]: r for r in new_records if r["label_source"] == "llm"}
+        parsed_results = [parse_llm_response(by_key.get(k, {}).get("raw_response")) for k in keys]
+        _audit_near_duplicates(client, texts, clusters, parsed_results, audit_sample)
     
-    # Sauvegarder checkpoint
-    if checkpoint_path:
-        logger.info(f"Sauvegarde checkpoint: {checkpoint_path}")
-        save_dataframe(df, checkpoint_path)
+    return new_records
+
+
+def _log_run_stats(stats: Dict[str, int]) -> None:
+    """
+    Journalise les métriques du run (taux de réponses invalides au premier
+    passage et après re-demande) dans llm_run_metrics.jsonl
+    """
+    responses = max(stats["responses"], 1)
+    stats = dict(
+        stats,
+        timestamp=pd.Timestamp.now().isoformat(timespec="seconds"),
+        parse_failure_rate=round(stats["invalid_first_pass"] / responses, 4),
+        final_failure_rate=round(stats["still_invalid"] / responses, 4)
+    )
+    logger.info(
+        f"Réponses LLM invalides: {stats['parse_failure_rate']:.1%} au premier passage, "
+        f"{stats['final_failure_rate']:.1%} après re-demande ({stats['reasked']} re-demandes)"
+    )
+    append_jsonl(LLM_METRICS_PATH, [stats])
+
+
+def _audit_near_duplicates(
+    client,
+    texts: List[str],
+    clusters: np.ndarray,
+    parsed_results: List[Dict],
+    sample_size: int
+) -> Dict[str, float]:
+    """
+    Reclassifie un échantillon de membres de clusters et mesure l'accord
+    avec les labels propagés depuis leur représentant
+    """
+    sample = sample_cluster_members(clusters, sample_size)
+    if len(sample) == 0:
+        logger.info("Audit quasi-doublons: aucun membre de cluster à auditer")
+        return {"n": 0}
     
-    logger.info("Enrichissement LLM terminé!")
-    return df
+    logger.info(f"Audit quasi-doublons: reclassification de {len(sample)} tweets...")
+    audit_results = classify_batch(client, [texts[p] for p in sample], batch_size=LLM_BATCH_SIZE)
+    reference = [parse_llm_response(r.get("raw_response")) for r in audit_results]
+    report = label_agreement([parsed_results[p] for p in sample], reference)
+    logger.info(f"Audit quasi-doublons (accord des labels): {report}")
+    return report
+
+
+def _load_previous_output(output_path: Path) -> Optional[pd.DataFrame]:
+    """
+    Charge la sortie d'un run précédent pour une exécution incrémentale
+    """
+    if not output_path.exists():
+        return None
+    df_previous = load_dataframe(output_path)
+    if "tweet_id" not in df_previous.columns:
+        logger.warning("Sortie précédente sans tweet_id: exécution complète")
+        return None
+    logger.info(f"Exécution incrémentale: {len(df_previous)} tweets déjà enrichis")
+    return df_previous
 
 
 def run_full_pipeline(
     input_path: Path,
     output_path: Path,
     text_col: str = "full_text",
-    checkpoint_path: Optional[Path] = None
+    checkpoint_path: Optional[Path] = None,
+    incremental: bool = False,
+    local_model_path: Optional[Path] = None,
+    from_stage: Optional[str] = None,
+    to_stage: Optional[str] = None,
+    use_cache: bool = True
 ) -> pd.DataFrame:
     """
     Pipeline complet: nettoyage + enrichissement LLM
+    
+    Exécuté par étapes (voir src.pipeline_stages): les étapes dont les
+    entrées n'ont pas changé sont relues depuis data/interim.
+    Si incremental=True et que output_path existe, seuls les tweets dont le
+    tweet_id est absent de la sortie précédente sont nettoyés et classifiés.
+    Si local_model_path est fourni, le classifieur local labellise les tweets
+    à forte confiance avant l'appel au LLM.
     """
-    from src.cleaning import run_cleaning_on_df
-    from src.utils import load_csv_with_encoding
+    from src.pipeline_stages import run_stages
     
     logger.info("=== Début du pipeline complet ===")
     
-    # 1. Charger les données
-    logger.info(f"Chargement: {input_path}")
-    df = load_csv_with_encoding(input_path, text_col=text_col)
-    
-    # 2. Nettoyage
-    logger.info("Étape 1: Nettoyage et préprocessing...")
+    df_previous = _load_previous_output(output_path) if incremental else None
     logger.info("⚠️  Exclusion automatique des tweets Free (comptes contenant 'free')")
-    df_clean = run_cleaning_on_df(df, text_col=text_col, exclude_free=True)
-    
-    # Sauvegarder données nettoyées
-    clean_path = PROCESSED_DIR / "tweets_cleaned.parquet"
-    save_dataframe(df_clean, clean_path)
-    logger.info(f"Données nettoyées sauvegardées: {clean_path}")
-    
-    # 3. Enrichissement LLM
-    logger.info("Étape 2: Enrichissement LLM...")
-    df_enriched = enrich_with_llm(
-        df_clean,
-        text_col="text_clean",
+    
+    df_enriched = run_stages(
+        input_path=input_path,
+        output_path=output_path,
+        text_col=text_col,
         checkpoint_path=checkpoint_path,
-        resume=True
+        df_previous=df_previous,
+        local_model_path=local_model_path,
+        from_stage=from_stage,
+        to_stage=to_stage,
+        use_cache=use_cache
     )
     
-    # 4. Sauvegarder résultat final
-    logger.info(f"Sauvegarde résultat final: {output_path}")
-    save_dataframe(df_enriched, output_path)
-    
     logger.info("=== Pipeline terminé avec succès ===")
     return df_enriched
@@ -0,0 +1,254 @@
+"""
+Exécution du pipeline par étapes avec cache des artefacts intermédiaires
+
+Étapes: load -> filter -> clean -> translate -> lemmatize -> classify -> parse -> topics -> finalize
+(finalize écrit la sortie parquet et le snapshot de service de l'API)
+
+Chaque étape écrit un artefact data/interim/<étape>-<empreinte>.parquet.
+L'empreinte combine celle de l'étape précédente, la configuration de
+l'étape et le code source des fonctions qui l'implémentent: une relance
+saute toute étape dont les entrées n'ont pas changé (modifier les règles de
+parsing ne relance ni le nettoyage ni la traduction).
+"""
+import hashlib
+import inspect
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from src.config import (
+    INTERIM_DIR, PROCESSED_DIR, PARQUET_SORT_COLUMN, CSV_COLUMNS, CSV_CHUNK_SIZE, MISTRAL_MODEL, LLM_RESPONSE_FORMAT,
+    NEAR_DUP_ENABLED, NEAR_DUP_THRESHOLD, LOCAL_CLF_THRESHOLD, TOPIC_COUNT, TOPIC_FEATURES, TOPIC_MODEL_PATH, TOPICS_PATH
+)
+from src import cleaning, llm_classification, parse_llm_outputs, pipeline_enrichment, topics
+from src.profiling import profile_stage
+from src.serving import snapshot_path, write_serving_snapshot
+from src.utils import load_csv_with_encoding, sniff_encoding, csv_read_options, prepare_for_parquet, save_dataframe
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+STAGES = ["load", "filter", "clean", "translate", "lemmatize", "classify", "parse", "topics", "finalize"]
+
+
+def file_fingerprint(path: Path, chunk_size: int = 1 << 20) -> str:
+    """
+    Hash du contenu d'un fichier (lecture par blocs)
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _code_hash(*objects) -> str:
+    h = hashlib.sha256()
+    for obj in objects:
+        h.update(inspect.getsource(obj).encode("utf-8") if callable(obj) or inspect.ismodule(obj) else repr(obj).encode("utf-8"))
+    return h.hexdigest()
+
+
+def stage_fingerprint(upstream: str, stage: str, config: Dict) -> str:
+    payload = json.dumps({"upstream": upstream, "stage": stage, "config": config}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def artifact_path(stage: str, fingerprint: str) -> Path:
+    return INTERIM_DIR / f"{stage}-{fingerprint}.parquet"
+
+
+def _write_artifact(df: pd.DataFrame, stage: str, fingerprint: str) -> None:
+    path = artifact_path(stage, fingerprint)
+    try:
+        # Artefact relu tel que l'étape l'a produit (dates en texte comprises: les tweet_id en sont dérivés)
+        save_dataframe(df, path, sort_by=None)
+    except Exception as e:
+        # Colonnes brutes de types mélangés non sérialisables: pas de cache pour cette étape
+        logger.warning(f"Artefact {stage} non écrit ({e})")
+        return
+    for old in INTERIM_DIR.glob(f"{stage}-*.parquet"):
+        if old != path:
+            old.unlink()
+
+
+def _stage_definitions(ctx: Dict) -> List[Dict]:
+    """
+    Étapes: fonction df -> df, configuration et code pris en compte dans l'empreinte
+    """
+    text_col = ctx["text_col"]
+    local_model_path = ctx.get("local_model_path")
+    incremental = ctx.get("skip_ids") is not None
+
+    def load(_):
+        # Lecture par blocs des seules colonnes utiles (CSV_COLUMNS), concaténés: les autres colonnes ne sont jamais chargées
+        chunks = list(load_csv_with_encoding(ctx["input_path"], text_col=text_col, columns=CSV_COLUMNS, chunksize=CSV_CHUNK_SIZE))
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=[text_col])
+
+    def filter_(df):
+        return cleaning.prepare_tweets(df, text_col=text_col, exclude_free=True, skip_ids=ctx.get("skip_ids"))
+
+    def clean(df):
+        return cleaning.apply_basic_cleanup(df, text_col=text_col)
+
+    def translate(df):
+        return cleaning.apply_translation(df)
+
+    def lemmatize(df):
+        df = cleaning.apply_lemmatization(df)
+        save_dataframe(df, PROCESSED_DIR / "tweets_cleaned.parquet")
+        return df
+
+    classify_config = {
+        "model": MISTRAL_MODEL, "response_format": LLM_RESPONSE_FORMAT,
+        "prompt": _code_hash(llm_classification.SYSTEM_PROMPT, llm_classification.USER_PROMPT_TEMPLATE),
+        "dedup": [NEAR_DUP_ENABLED, NEAR_DUP_THRESHOLD],
+        "local_model": file_fingerprint(local_model_path) if local_model_path else None,
+        "local_threshold": LOCAL_CLF_THRESHOLD,
+    }
+
+    def classify(df):
+        local_model = None
+        if local_model_path:
+            from src.local_classifier import LocalClassifier
+            local_model = LocalClassifier.load(local_model_path)
+        # Réponses du journal reprises seulement si obtenues avec la même configuration
+        return pipeline_enrichment.collect_llm_responses(
+            df, text_col="text_clean", checkpoint_path=ctx.get("checkpoint_path"), resume=True, local_model=local_model,
+            config_key=stage_fingerprint("", "classify", classify_config)
+        )
+
+    def parse(df):
+        return pipeline_enrichment.parse_llm_columns(df)
+
+    def topics_(df):
+        # Exécution incrémentale: le modèle du run précédent est mis à jour avec les nouveaux tweets
+        model = topics.topic_model(TOPIC_MODEL_PATH, resume=incremental)
+        df = topics.assign_topics(df, model, update=True)
+        if model is not None and model.fitted:
+            model.save(TOPIC_MODEL_PATH)
+            topics.write_topics(model, TOPICS_PATH)
+        return df
+
+    skip_ids = sorted(ctx.get("skip_ids") or [])
+    return [
+        {"name": "load", "func": load,
+         "config": {"input": file_fingerprint(ctx["input_path"]), "text_col": text_col, "columns": CSV_COLUMNS,
+                    "code": _code_hash(load_csv_with_encoding, sniff_encoding, csv_read_options)}},
+        {"name": "filter", "func": filter_,
+         "config": {"skip_ids": hashlib.sha256("\n".join(skip_ids).encode("utf-8")).hexdigest(),
+                    "code": _code_hash(cleaning.prepare_tweets, cleaning.filter_tweets, cleaning._first_occurrences,
+                                       cleaning.compute_tweet_ids, cleaning.OFFICIAL_ACCOUNT_PATTERN)}},
+        {"name": "clean", "func": clean,
+         "config": {"code": _code_hash(cleaning.apply_basic_cleanup, cleaning.basic_cleanup, cleaning.split_emojis, cleaning._EMOJI_CHARS)}},
+        {"name": "translate", "func": translate,
+         "config": {"code": _code_hash(
+             cleaning.apply_translation, cleaning.translate_and_normalize, cleaning.normalize_text, cleaning.detect_language,
+             cleaning.translate_to_french, cleaning.reduce_repetitions, cleaning.split_camel_case,
+             cleaning.remove_punctuation, cleaning.expand_abbreviations, cleaning.ABBREV_DICT, cleaning._PUNCT_RE)}},
+        {"name": "lemmatize", "func": lemmatize,
+         "config": {"model": cleaning.nlp_model_id(), "code": _code_hash(cleaning.apply_lemmatization, cleaning.preprocess_text)}},
+        # Réponses incomplètes (échecs API) non mises en cache: la relance les retente
+        {"name": "classify", "func": classify,
+         "cacheable": lambda df: df["raw_llm_response"].notna().all(),
+         "config": classify_config},
+        {"name": "parse", "func": parse,
+         "config": {"code": _code_hash(pipeline_enrichment.parse_llm_columns, parse_llm_outputs)}},
+        {"name": "topics", "func": topics_,
+         "config": {"topics": TOPIC_COUNT, "features": TOPIC_FEATURES, "incremental": incremental,
+                    "code": _code_hash(topics)}},
+    ]
+
+
+def run_stages(
+    input_path: Path,
+    output_path: Path,
+    text_col: str = "full_text",
+    checkpoint_path: Optional[Path] = None,
+    df_previous: Optional[pd.DataFrame] = None,
+    local_model_path: Optional[Path] = None,
+    from_stage: Optional[str] = None,
+    to_stage: Optional[str] = None,
+    use_cache: bool = True
+) -> pd.DataFrame:
+    """
+    Exécute les étapes en réutilisant les artefacts dont l'empreinte est inchangée
+
+    Args:
+        from_stage: force le recalcul à partir de cette étape (les précédentes
+            sont lues depuis le cache ou recalculées si absentes)
+        to_stage: s'arrête après cette étape (finalize non exécutée sinon)
+        use_cache: False pour tout recalculer
+        df_previous: sortie d'un run précédent (exécution incrémentale)
+    """
+    for stage in (from_stage, to_stage):
+        if stage is not None and stage not in STAGES:
+            raise ValueError(f"Étape inconnue: {stage} (disponibles: {', '.join(STAGES)})")
+    first_forced = STAGES.index(from_stage) if from_stage else len(STAGES)
+    last = STAGES.index(to_stage) if to_stage else len(STAGES) - 1
+
+    ctx = {
+        "input_path": Path(input_path),
+        "text_col": text_col,
+        "checkpoint_path": checkpoint_path,
+        "local_model_path": local_model_path,
+        "skip_ids": set(df_previous["tweet_id"]) if df_previous is not None else None,
+    }
+
+    df = None
+    fingerprint = ""
+    for i, stage in enumerate(_stage_definitions(ctx)):
+        if i > last:
+            return df
+        name = stage["name"]
+        fingerprint = stage_fingerprint(fingerprint, name, stage["config"])
+        path = artifact_path(name, fingerprint)
+
+        with profile_stage(name, rows_in=None if df is None else len(df)) as record:
+            if use_cache and i < first_forced and path.exists():
+                logger.info(f"[{name}] inchangée, artefact réutilisé: {path.name}")
+                df = pd.read_parquet(path)
+                record["cached"] = True
+            else:
+                logger.info(f"[{name}] exécution...")
+                df = stage["func"](df)
+                if stage.get("cacheable", lambda _: True)(df):
+                    _write_artifact(df, name, fingerprint)
+            record["rows_out"] = len(df)
+
+        if name == "filter" and df.empty:
+            logger.info("Aucun tweet à traiter après filtrage")
+            if df_previous is not None:
+                logger.info("Aucun nouveau tweet: sortie existante conservée")
+                return df_previous
+
+    if last < STAGES.index("finalize"):
+        return df
+
+    with profile_stage("finalize", rows_in=len(df)) as record:
+        if df_previous is not None:
+            df = pd.concat([df_previous, df], ignore_index=True)
+            df = df.drop_duplicates(subset=["tweet_id"], keep="last")
+        df = write_final_output(df, output_path)
+        record["rows_out"] = len(df)
+    return df
+
+
+def write_final_output(df: pd.DataFrame, output_path: Path) -> pd.DataFrame:
+    """
+    Trie df par date une seule fois puis écrit le parquet et le snapshot de
+    service: les deux ont le même ordre de lignes (pagination et index de l'API)
+    """
+    logger.info(f"Sauvegarde résultat final: {output_path}")
+    df = prepare_for_parquet(df, sort_by=PARQUET_SORT_COLUMN).reset_index(drop=True)
+    save_dataframe(df, output_path)
+    # Colonnes préparées pour l'API: démarrage sans relire ni convertir le parquet
+    try:
+        write_serving_snapshot(df, snapshot_path(output_path), source=output_path)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Snapshot de service non écrit ({e}): l'API repartira du parquet")
+    return df
@@ -0,0 +1,230 @@
+"""
+Pipeline en flux pour les très gros exports (mémoire bornée)
+
+L'export est lu par blocs; chaque bloc traverse toutes les étapes (filtre,
+nettoyage, traduction, lemmatisation, classification, parsing, thèmes) puis
+est écrit comme row group d'un parquet temporaire; le modèle de thèmes est
+mis à jour bloc par bloc. Les doublons entre blocs sont
+détectés par un ensemble de hashs SQLite et les réponses déjà journalisées
+sont relues depuis un index SQLite: la mémoire dépend de la taille d'un
+bloc, pas de celle de l'archive.
+
+Finalisation: les blocs ne sont triés qu'individuellement, la sortie
+(filtrée, colonnes élaguées) est donc relue une fois pour être triée par
+date et écrite comme en mode par étapes (parquet et snapshot de l'API).
+Cette dernière étape tient la sortie en mémoire, comme l'API qui la sert.
+"""
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+    logging.warning("pyarrow non installé. Installez-le avec: pip install pyarrow")
+
+from src.config import (
+    INTERIM_DIR, CSV_COLUMNS, CSV_CHUNK_SIZE, NEAR_DUP_ENABLED, NEAR_DUP_THRESHOLD, TOPIC_MODEL_PATH, TOPICS_PATH
+)
+from src import cleaning, topics
+from src.dedup import PersistentHashSet, hash_values
+from src.pipeline_enrichment import attach_responses, parse_llm_columns, tweet_keys, _classify_pending
+from src.pipeline_stages import write_final_output
+from src.profiling import profile_stage, substep
+from src.utils import load_csv_with_encoding, prepare_for_parquet, parquet_write_options
+from src.utils_io import iter_jsonl
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_RESPONSE_FIELDS = ["tweet_id", "raw_response", "dup_cluster_id", "label_source"]
+
+
+def _open_response_index(checkpoint_path: Optional[Path], index_path: Path) -> sqlite3.Connection:
+    """
+    Index SQLite des réponses du journal JSONL (reconstruit à chaque run,
+    le journal reste la source de vérité)
+    """
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    if index_path.exists():
+        index_path.unlink()
+    con = sqlite3.connect(str(index_path))
+    con.execute("PRAGMA synchronous=OFF")
+    con.execute(
+        "CREATE TABLE responses (tweet_id TEXT PRIMARY KEY, raw_response TEXT, dup_cluster_id TEXT, label_source TEXT)"
+    )
+    if checkpoint_path is not None:
+        _index_records(con, iter_jsonl(checkpoint_path))
+    return con
+
+
+def _index_records(con: sqlite3.Connection, records) -> None:
+    with con:
+        con.executemany(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+            ([r.get(f) for f in _RESPONSE_FIELDS] for r in records)
+        )
+
+
+def _lookup_records(con: sqlite3.Connection, keys: List[str]) -> List[Dict]:
+    records = []
+    # Limite du nombre de paramètres SQLite
+    for i in range(0, len(keys), 900):
+        part = keys[i:i + 900]
+        rows = con.execute(
+            f"SELECT tweet_id, raw_response, dup_cluster_id, label_source FROM responses "
+            f"WHERE tweet_id IN ({', '.join('?' * len(part))})", part
+        )
+        records.extend(dict(zip(_RESPONSE_FIELDS, row)) for row in rows)
+    return records
+
+
+def _arrow_table(df: pd.DataFrame, schema=None):
+    """
+    Table Arrow d'un bloc; les colonnes entièrement nulles du premier bloc
+    sont typées texte pour que les blocs suivants restent compatibles
+    """
+    table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+    if schema is None:
+        fields = [pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f for f in table.schema]
+        table = table.cast(pa.schema(fields))
+    return table
+
+
+def _process_chunk(
+    chunk: pd.DataFrame,
+    seen: PersistentHashSet,
+    responses: sqlite3.Connection,
+    text_col: str,
+    checkpoint_path: Optional[Path],
+    local_model,
+    topic_model
+) -> pd.DataFrame:
+    with substep("filter"):
+        df = cleaning.prepare_tweets(chunk, text_col=text_col, exclude_free=True)
+        if df.empty:
+            return df
+        # Doublons avec les blocs précédents (texte ou tweet_id déjà vus)
+        new = seen.add_new({"text": hash_values(df[text_col]), "tweet_id": hash_values(df["tweet_id"])})
+        df = df[new].reset_index(drop=True)
+        if df.empty:
+            return df
+
+    with substep("clean"):
+        df = cleaning.apply_basic_cleanup(df, text_col=text_col)
+    with substep("translate"):
+        df = cleaning.apply_translation(df)
+    with substep("lemmatize"):
+        df = cleaning.apply_lemmatization(df)
+
+    with substep("classify"):
+        keys = tweet_keys(df, "text_clean")
+        records = _lookup_records(responses, keys.tolist())
+        done = {r["tweet_id"] for r in records}
+        pending = ~keys.isin(done).to_numpy()
+        if pending.any():
+            new_records = _classify_pending(
+                df.loc[pending, "text_clean"].fillna("").astype(str).tolist(),
+                keys[pending].tolist(),
+                checkpoint_path,
+                dedup=NEAR_DUP_ENABLED,
+                dedup_threshold=NEAR_DUP_THRESHOLD,
+                audit_sample=0,
+                local_model=local_model
+            )
+            _index_records(responses, new_records)
+            records.extend(new_records)
+        df = attach_responses(df, keys, records)
+
+    with substep("parse"):
+        df = parse_llm_columns(df)
+    with substep("topics"):
+        df = topics.assign_topics(df, topic_model, update=True)
+    return df
+
+
+def run_streaming_pipeline(
+    input_path: Path,
+    output_path: Path,
+    text_col: str = "full_text",
+    checkpoint_path: Optional[Path] = None,
+    chunksize: int = CSV_CHUNK_SIZE,
+    local_model_path: Optional[Path] = None
+) -> Dict[str, int]:
+    """
+    Traite l'export bloc par bloc et écrit la sortie par row groups
+    
+    La sortie est écrite dans un fichier temporaire, trié et réécrit en fin de run.
+    Après un crash, relancer reprend depuis le début du CSV mais les
+    réponses LLM déjà journalisées (checkpoint_path) ne sont pas redemandées.
+    Retourne des compteurs (lignes lues, lignes écrites, blocs).
+    """
+    if pq is None:
+        raise ImportError("pyarrow n'est pas installé. Installez-le avec: pip install pyarrow")
+    
+    logger.info(f"=== Pipeline en flux: {input_path} (blocs de {chunksize} lignes) ===")
+    local_model = None
+    if local_model_path:
+        from src.local_classifier import LocalClassifier
+        local_model = LocalClassifier.load(local_model_path)
+    topic_model = topics.topic_model(resume=False)
+    seen = PersistentHashSet(INTERIM_DIR / "stream_seen_hashes.sqlite")
+    responses = _open_response_index(checkpoint_path, INTERIM_DIR / "stream_responses.sqlite")
+    
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    tmp_path.parent.mkdir(parents=True, exist_ok=True)
+    writer = None
+    schema = None
+    counts = {"rows_in": 0, "rows_out": 0, "chunks": 0}
+    
+    try:
+        with profile_stage("stream") as stage:
+            chunks = load_csv_with_encoding(input_path, text_col=text_col, columns=CSV_COLUMNS, chunksize=chunksize)
+            for chunk in chunks:
+                counts["chunks"] += 1
+                counts["rows_in"] += len(chunk)
+                df = _process_chunk(chunk, seen, responses, text_col, checkpoint_path, local_model, topic_model)
+                if df.empty:
+                    continue
+                
+                with substep("write"):
+                    # Dates typées comme dans la sortie finale (tri global à la finalisation)
+                    table = _arrow_table(prepare_for_parquet(df), schema=schema)
+                    options = parquet_write_options(table.column_names)
+                    if writer is None:
+                        schema = table.schema
+                        writer = pq.ParquetWriter(
+                            tmp_path, schema,
+                            compression=options["compression"],
+                            use_dictionary=options["use_dictionary"],
+                            write_statistics=options["write_statistics"]
+                        )
+                    writer.write_table(table, row_group_size=options["row_group_size"])
+                counts["rows_out"] += len(df)
+                logger.info(
+                    f"Bloc {counts['chunks']}: {counts['rows_out']} tweets écrits / {counts['rows_in']} lus"
+                )
+            stage["rows_in"], stage["rows_out"] = counts["rows_in"], counts["rows_out"]
+    finally:
+        if writer is not None:
+            writer.close()
+        seen.close()
+        responses.close()
+    
+    if writer is None:
+        logger.info("Aucun tweet à écrire")
+        return counts
+    with profile_stage("finalize", rows_in=counts["rows_out"]):
+        write_final_output(pd.read_parquet(tmp_path), output_path)
+    tmp_path.unlink()
+    if topic_model is not None and topic_model.fitted:
+        topic_model.save(TOPIC_MODEL_PATH)
+        topics.write_topics(topic_model, TOPICS_PATH)
+    logger.info(f"=== Pipeline en flux terminé: {counts['rows_out']} tweets -> {output_path} ===")
+    return counts
@@ -1,4 +1,5 @@
 import re
+import numpy as np
 import pandas as pd
 
 OFFICIAL_ACCOUNTS = {
@@ -7,22 +8,37 @@ OFFICIAL_ACCOUNTS = {
     "FreeboxTV", "Freebox_Assistance",
 }
 
+# Regex compilées (sémantique Unicode de re: \w couvre les lettres accentuées)
+_URL_RE = re.compile(r"http\S+")
+_MENTION_RE = re.compile(r"@\w+")
+_HASHTAG_RE = re.compile(r"#(\w+)")
+
 def clean_text(text: str) -> str:
     text = str(text)
-    text = re.sub(r"http\S+", " ", text)      # enlever URLs
-    text = re.sub(r"@\w+", " ", text)         # enlever mentions
-    text = re.sub(r"#(\w+)", r"\1", text)     # #hashtag -> mot
+    # les regex ne tournent que si leur caractère déclencheur est présent
+    if "http" in text:
+        text = _URL_RE.sub(" ", text)         # enlever URLs
+    if "@" in text:
+        text = _MENTION_RE.sub(" ", text)     # enlever mentions
+    if "#" in text:
+        text = _HASHTAG_RE.sub(r"\1", text)   # #hashtag -> mot
     text = text.lower()
-    text = re.sub(r"\s+", " ", text)          # espaces multiples
-    return text.strip()
+    return " ".join(text.split())             # espaces multiples (même classe que \s)
+
+def clean_text_series(texts: pd.Series) -> pd.Series:
+    """
+    clean_text sur une colonne: chaque texte distinct n'est nettoyé qu'une fois
+    """
+    codes, uniques = pd.factorize(texts, use_na_sentinel=False)
+    cleaned = np.array([clean_text(t) for t in uniques], dtype=object)
+    return pd.Series(cleaned[codes], index=texts.index, name=texts.name)
 
 def basic_filter(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
     # enlever RT
-    df = df[~df["full_text"].str.startswith("RT ", na=False)]
+    keep = ~df["full_text"].str.startswith("RT ", na=False)
     # enlever comptes officiels
     if "screen_name" in df.columns:
-        df = df[~df["screen_name"].isin(OFFICIAL_ACCOUNTS)]
-    # texte nettoyé
-    df["full_text_clean"] = df["full_text"].apply(clean_text)
-    return df
+        keep &= ~df["screen_name"].isin(OFFICIAL_ACCOUNTS)
+    # une seule sélection de lignes, texte nettoyé en colonne
+    df = df[keep]
+    return df.assign(full_text_clean=clean_text_series(df["full_text"]))
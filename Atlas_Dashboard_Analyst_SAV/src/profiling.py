@@ -0,0 +1,183 @@
+"""
+Profilage du pipeline par étape
+
+Mesure pour chaque étape le temps réel, le temps CPU et les lignes en
+entrée/sortie. Les sous-étapes exécutées par tweet (traduction, nettoyage
+regex...) sont cumulées dans l'étape englobante.
+
+Le pic mémoire par étape (tracemalloc) est optionnel (--profile-memory):
+tracemalloc ralentit fortement le code qui alloue beaucoup, les temps d'un
+run avec mémoire ne sont donc pas comparables à ceux d'un run --profile.
+
+Sans profiler actif (main.py sans --profile), profile_stage et substep ne
+font rien.
+"""
+import json
+import logging
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_active: Optional["StageProfiler"] = None
+
+
+def _max_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    # ru_maxrss est en Ko sous Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+class StageProfiler:
+    """
+    Collecte les mesures des étapes (imbriquées possibles: "clean/translate")
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.stages: List[Dict] = []
+        self._stack: List[Dict] = []
+        self._started = time.perf_counter()
+
+    def _fold_peak(self) -> None:
+        # Pic depuis la dernière mesure, reporté sur toutes les étapes ouvertes
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        for open_record in self._stack:
+            open_record["_peak"] = max(open_record["_peak"], peak)
+
+    @contextmanager
+    def stage(self, name: str, rows_in: Optional[int] = None):
+        if self._stack and self._stack[-1]["stage"].rsplit("/", 1)[-1] == name:
+            # Étape déjà ouverte par l'appelant (runner d'étapes): pas de "classify/classify"
+            yield {}
+            return
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        record = {
+            "stage": "/".join([s["stage"] for s in self._stack[-1:]] + [name]),
+            "rows_in": rows_in,
+            "rows_out": None,
+            "substeps": {},
+            "_peak": 0,
+        }
+        if self.trace_memory:
+            self._fold_peak()
+        self.stages.append(record)
+        self._stack.append(record)
+
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record["wall_s"] = round(time.perf_counter() - wall, 3)
+            record["cpu_s"] = round(time.process_time() - cpu, 3)
+            if self.trace_memory:
+                self._fold_peak()
+                record["peak_mem_mb"] = round(record["_peak"] / 1024 ** 2, 1)
+            record["max_rss_mb"] = _max_rss_mb()
+            self._stack.pop()
+
+    def add_substep(self, name: str, wall_s: float, cpu_s: float) -> None:
+        if not self._stack:
+            return
+        sub = self._stack[-1]["substeps"].setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0, "calls": 0})
+        sub["wall_s"] += wall_s
+        sub["cpu_s"] += cpu_s
+        sub["calls"] += 1
+
+    def report(self) -> Dict:
+        stages = []
+        for record in self.stages:
+            record = {k: v for k, v in record.items() if not k.startswith("_")}
+            record["substeps"] = {
+                name: {"wall_s": round(s["wall_s"], 3), "cpu_s": round(s["cpu_s"], 3), "calls": s["calls"]}
+                for name, s in record["substeps"].items()
+            }
+            stages.append(record)
+        return {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "total_wall_s": round(time.perf_counter() - self._started, 3),
+            "max_rss_mb": _max_rss_mb(),
+            "stages": stages,
+        }
+
+    def write_report(self, path: Path) -> Dict:
+        report = self.report()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info(f"Rapport de profilage: {path}")
+        return report
+
+    def summary_table(self) -> str:
+        report = self.report()
+        header = f"{'Étape':<32} {'Réel (s)':>9} {'CPU (s)':>9} {'Entrée':>9} {'Sortie':>9} {'Pic (Mo)':>9}"
+        lines = [header, "-" * len(header)]
+        fmt = lambda v: "-" if v is None else str(v)
+        for record in report["stages"]:
+            lines.append(
+                f"{record['stage']:<32} {record['wall_s']:>9.2f} {record['cpu_s']:>9.2f} "
+                f"{fmt(record['rows_in']):>9} {fmt(record['rows_out']):>9} {fmt(record.get('peak_mem_mb')):>9}"
+            )
+            for name, sub in record["substeps"].items():
+                lines.append(f"  · {name:<28} {sub['wall_s']:>9.2f} {sub['cpu_s']:>9.2f} {sub['calls']:>9}")
+        lines.append("-" * len(header))
+        lines.append(f"{'Total':<32} {report['total_wall_s']:>9.2f}   (RSS max: {fmt(report['max_rss_mb'])} Mo)")
+        return "\n".join(lines)
+
+
+def enable_profiling(trace_memory: bool = False) -> StageProfiler:
+    """
+    Active un profiler global, utilisé par profile_stage et substep
+    (trace_memory: pic mémoire par étape, au prix de temps gonflés)
+    """
+    global _active
+    _active = StageProfiler(trace_memory=trace_memory)
+    return _active
+
+
+def disable_profiling() -> Optional[StageProfiler]:
+    global _active
+    profiler, _active = _active, None
+    if profiler is not None and profiler.trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    return profiler
+
+
+@contextmanager
+def profile_stage(name: str, rows_in: Optional[int] = None):
+    """
+    Mesure une étape; le dict retourné accepte rows_out (sans profiler: dict ignoré)
+    """
+    if _active is None:
+        yield {}
+        return
+    with _active.stage(name, rows_in=rows_in) as record:
+        yield record
+
+
+@contextmanager
+def substep(name: str):
+    """
+    Cumule le temps d'une sous-étape exécutée de nombreuses fois (par tweet)
+    """
+    if _active is None:
+        yield
+        return
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        _active.add_substep(name, time.perf_counter() - wall, time.process_time() - cpu)
@@ -0,0 +1,265 @@
+"""
+Index inversé pour la recherche plein texte des tweets servis par l'API
+
+Les mots de text_clean (minuscules, sans accents: "coupée" est trouvé par
+"coupee") et les lemmes de text_preproc, quand le pipeline les a calculés,
+pointent vers les lignes qui les contiennent avec leur nombre
+d'occurrences. Les postings sont des clés entières (mot << 32 | ligne)
+triées: la liste d'un mot est une tranche trouvée par dichotomie, et un lot
+ingéré y est inséré sans reconstruire l'index.
+
+Une requête est une suite de clauses toutes requises: mots, préfixes
+(rembours*) et expressions entre guillemets ("fibre coupée"), vérifiées sur
+le texte des lignes candidates. Les lignes sont classées par score BM25,
+les plus récentes (created_at) d'abord à score égal.
+"""
+import logging
+import re
+import unicodedata
+from bisect import bisect_left
+from itertools import chain
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.word_index import read_arrow_index, write_arrow_index
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LEMMA_COLUMN = "text_preproc"
+
+# Mots distincts au plus par préfixe (les plus fréquents)
+MAX_PREFIX_TERMS = 200
+
+# Paramètres BM25 usuels
+_K1 = 1.2
+_B = 0.75
+
+_ROW_BITS = 32
+_ROW_MASK = (1 << _ROW_BITS) - 1
+_MAX_TF = np.iinfo(np.uint16).max
+
+_WORD_RE = re.compile(r"\w+")
+_QUERY_WORD_RE = re.compile(r"\w+\*?")
+_QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+_ACCENTS_RE = re.compile(r"[\u0300-\u036f]")
+
+
+def fold(text) -> str:
+    """
+    Minuscules sans accents
+    """
+    if not isinstance(text, str):
+        return ""
+    return _ACCENTS_RE.sub("", unicodedata.normalize("NFKD", text.lower()))
+
+
+def search_tokens(text) -> List[str]:
+    """
+    Mots indexés d'un texte (tous, sans filtre de longueur ni mots vides:
+    les expressions en ont besoin)
+    """
+    return _WORD_RE.findall(fold(text))
+
+
+def lemma_texts(df: pd.DataFrame) -> Optional[pd.Series]:
+    """
+    Lemmes des tweets (text_preproc), None si le pipeline ne les a pas calculés
+    """
+    return df[LEMMA_COLUMN] if LEMMA_COLUMN in df.columns else None
+
+
+def parse_query(query: str) -> List[List[str]]:
+    """
+    Clauses d'une requête: un mot par clause hors guillemets, les mots
+    consécutifs d'une expression entre guillemets; un mot finissant par *
+    est un préfixe
+    """
+    clauses = []
+    for phrase, words in _QUERY_RE.findall(query):
+        if phrase:
+            tokens = _QUERY_WORD_RE.findall(fold(phrase))
+            if tokens:
+                clauses.append(tokens)
+        else:
+            clauses.extend([token] for token in _QUERY_WORD_RE.findall(fold(words)))
+    return clauses
+
+
+def _phrase_pattern(tokens: List[str]) -> re.Pattern:
+    parts = [re.escape(t[:-1]) + r"\w*" if t.endswith("*") else re.escape(t) for t in tokens]
+    return re.compile(r"(?<!\w)" + r"\W+".join(parts) + r"(?!\w)")
+
+
+class SearchIndex:
+    """
+    Postings (mot, ligne, occurrences) des tweets, lignes numérotées dans l'ordre d'ajout
+    """
+
+    def __init__(self):
+        self.terms: List[str] = []
+        self.vocabulary: Dict[str, int] = {}
+        self.n_rows = 0
+        self._keys = np.array([], dtype=np.int64)
+        self._tf = np.array([], dtype=np.uint16)
+        self._doc_len = np.array([], dtype=np.int32)
+        self._sorted_terms: Optional[Tuple[List[str], List[int]]] = None
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    def add(self, texts, lemmas=None) -> None:
+        """
+        Indexe un lot de textes (et leurs lemmes) à la suite des lignes déjà indexées
+        """
+        docs = [search_tokens(t) for t in texts]
+        if lemmas is not None:
+            docs = [words + search_tokens(lemma) for words, lemma in zip(docs, lemmas)]
+        lengths = np.fromiter(map(len, docs), dtype=np.int64, count=len(docs))
+        rows = np.repeat(np.arange(self.n_rows, self.n_rows + len(docs), dtype=np.int64), lengths)
+
+        codes, uniques = pd.factorize(pd.Series(list(chain.from_iterable(docs)), dtype=object))
+        for term in uniques:
+            if term not in self.vocabulary:
+                self.vocabulary[term] = len(self.terms)
+                self.terms.append(term)
+        term_ids = np.array([self.vocabulary[t] for t in uniques], dtype=np.int64)[codes]
+
+        # Lignes nouvelles: aucune clé commune avec l'index, insertion à leur rang
+        keys, tf = np.unique((term_ids << _ROW_BITS) | rows, return_counts=True)
+        positions = np.searchsorted(self._keys, keys)
+        self._keys = np.insert(self._keys, positions, keys)
+        self._tf = np.insert(self._tf, positions, np.minimum(tf, _MAX_TF).astype(np.uint16))
+        self._doc_len = np.concatenate([self._doc_len, lengths.astype(np.int32)])
+        self.n_rows += len(docs)
+        self._sorted_terms = None
+
+    def _postings(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        lo, hi = np.searchsorted(self._keys, [term_id << _ROW_BITS, (term_id + 1) << _ROW_BITS])
+        return self._keys[lo:hi] & _ROW_MASK, self._tf[lo:hi]
+
+    def _document_frequencies(self, term_ids: np.ndarray) -> np.ndarray:
+        bounds = np.searchsorted(self._keys, np.concatenate([term_ids << _ROW_BITS, (term_ids + 1) << _ROW_BITS]))
+        return bounds[len(term_ids):] - bounds[:len(term_ids)]
+
+    def _term_ids(self, token: str) -> np.ndarray:
+        """
+        Mot de la requête -> identifiants des mots indexés (plusieurs pour un préfixe)
+        """
+        if not token.endswith("*"):
+            term_id = self.vocabulary.get(token)
+            return np.array([] if term_id is None else [term_id], dtype=np.int64)
+        if self._sorted_terms is None:
+            order = sorted(range(len(self.terms)), key=self.terms.__getitem__)
+            self._sorted_terms = ([self.terms[i] for i in order], order)
+        terms, order = self._sorted_terms
+        prefix = token[:-1]
+        lo, hi = bisect_left(terms, prefix), bisect_left(terms, prefix + "\U0010ffff")
+        ids = np.array(order[lo:hi], dtype=np.int64)
+        if len(ids) > MAX_PREFIX_TERMS:
+            ids = ids[np.argsort(-self._document_frequencies(ids), kind="stable")[:MAX_PREFIX_TERMS]]
+        return ids
+
+    def _token_scores(self, token: str, mask: Optional[np.ndarray], avg_len: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Lignes (triées) contenant le mot et leur score BM25 (somme sur les
+        mots d'un préfixe)
+        """
+        rows, scores = [], []
+        for term_id in self._term_ids(token):
+            term_rows, tf = self._postings(term_id)
+            idf = np.log(1 + (self.n_rows - len(term_rows) + 0.5) / (len(term_rows) + 0.5))
+            if mask is not None:
+                keep = mask[term_rows]
+                term_rows, tf = term_rows[keep], tf[keep]
+            tf = tf.astype(float)
+            norm = _K1 * (1 - _B + _B * self._doc_len[term_rows] / avg_len)
+            rows.append(term_rows)
+            scores.append(idf * tf * (_K1 + 1) / (tf + norm))
+        if not rows:
+            return np.array([], dtype=np.int64), np.array([])
+        if len(rows) == 1:
+            return rows[0], scores[0]
+        rows, inverse = np.unique(np.concatenate(rows), return_inverse=True)
+        return rows, np.bincount(inverse, weights=np.concatenate(scores))
+
+    def search(
+        self,
+        query: str,
+        texts: pd.Series,
+        rows: Optional[np.ndarray] = None,
+        created_at: Optional[pd.Series] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Lignes correspondant à la requête et leurs scores, par pertinence
+        décroissante; rows restreint la recherche à ces positions (filtres
+        du dashboard), texts donne le texte indexé de chaque ligne pour
+        vérifier les expressions, created_at départage les scores égaux
+        (plus récentes d'abord, dates manquantes en dernier)
+        """
+        found, total = np.array([], dtype=np.int64), np.array([])
+        clauses = parse_query(query)
+        if not clauses or not self.n_rows:
+            return found, total
+
+        mask = None
+        if rows is not None:
+            mask = np.zeros(self.n_rows, dtype=bool)
+            mask[np.asarray(rows, dtype=np.int64)] = True
+        avg_len = max(float(self._doc_len.mean()), 1.0)
+
+        for i, clause in enumerate(clauses):
+            clause_rows, clause_scores = self._token_scores(clause[0], mask, avg_len)
+            for token in clause[1:]:
+                token_rows, token_scores = self._token_scores(token, mask, avg_len)
+                clause_rows, a, b = np.intersect1d(clause_rows, token_rows, assume_unique=True, return_indices=True)
+                clause_scores = clause_scores[a] + token_scores[b]
+            if len(clause) > 1 and len(clause_rows):
+                # Mots présents dans la ligne: reste à vérifier qu'ils se suivent
+                pattern = _phrase_pattern(clause)
+                keep = np.fromiter(
+                    (bool(pattern.search(fold(t))) for t in texts.iloc[clause_rows]),
+                    dtype=bool, count=len(clause_rows)
+                )
+                clause_rows, clause_scores = clause_rows[keep], clause_scores[keep]
+
+            if i == 0:
+                found, total = clause_rows, clause_scores
+            else:
+                found, a, b = np.intersect1d(found, clause_rows, assume_unique=True, return_indices=True)
+                total = total[a] + clause_scores[b]
+            if not len(found):
+                break
+
+        keys = (-found, -total)
+        if created_at is not None and len(found):
+            # ~date: ordre décroissant sans débordement, NaT (plus petit entier) en dernier
+            keys = (-found, ~pd.DatetimeIndex(created_at.iloc[found]).asi8, -total)
+        order = np.lexsort(keys)
+        return found[order], total[order]
+
+    def save(self, path: Path, metadata: Optional[Dict] = None) -> None:
+        """
+        Postings en Arrow IPC, vocabulaire et metadata dans le schéma
+        """
+        write_arrow_index(path, {"key": self._keys, "tf": self._tf}, self.terms, self.n_rows, metadata)
+
+    @staticmethod
+    def load(path: Path) -> Tuple["SearchIndex", Dict]:
+        """
+        Index projeté en mémoire (mmap) et metadata passées à save
+        """
+        columns, terms, n_rows, metadata = read_arrow_index(path)
+        index = SearchIndex()
+        index.terms = terms
+        index.vocabulary = {term: i for i, term in enumerate(terms)}
+        index.n_rows = n_rows
+        index._keys, index._tf = columns["key"], columns["tf"]
+        # Longueur de chaque ligne: somme de ses occurrences
+        index._doc_len = np.bincount(
+            index._keys & _ROW_MASK, weights=index._tf, minlength=n_rows
+        ).astype(np.int32)
+        return index, metadata
@@ -0,0 +1,255 @@
+"""
+Préparation des tweets enrichis pour l'API du dashboard
+
+Colonnes dérivées calculées une fois (date, semaine, mois, heure, sentiment
+normalisé, urgence, risque de churn) et colonnes à peu de valeurs
+distinctes codées en catégories.
+
+Le pipeline écrit en fin de run un snapshot de ces colonnes déjà préparées
+au format Arrow IPC (Feather v2, non compressé): l'API le projette en
+mémoire (mmap) au démarrage au lieu de relire le parquet et de refaire les
+conversions; l'index des mots (src.word_index) et l'index de recherche
+(src.search_index) sont écrits à côté. Le
+snapshot porte la taille et la date du parquet source et la version de la
+préparation; s'il ne correspond plus, l'API repart du parquet et réécrit
+le snapshot.
+"""
+import json
+import logging
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+    feather = None
+    logging.warning("pyarrow non installé. Installez-le avec: pip install pyarrow")
+
+from src.search_index import SearchIndex, lemma_texts
+from src.word_index import WordIndex, document_texts
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SERVING_COLUMNS = ["date", "week", "month", "hour", "sentiment_norm", "is_urgent", "churn_risk", "is_churn"]
+
+# Colonnes du pipeline jamais servies par l'API
+UNSERVED_COLUMNS = ["raw_llm_response", "text_preproc", "dup_cluster_id"]
+
+# Colonnes codées en catégories (catégories triées)
+CATEGORY_COLUMNS = [
+    "motif", "sentiment", "urgence", "risque_churn", "lang", "label_source",
+    "sentiment_norm", "churn_risk", "week", "month"
+]
+
+# À incrémenter quand la préparation change: les snapshots existants sont ignorés
+SNAPSHOT_VERSION = 3
+_SNAPSHOT_METADATA_KEY = b"atlas_serving"
+
+# Noms de colonnes capitalisés de certains exports
+COLUMN_ALIASES = {
+    "Motif": "motif",
+    "Sentiment": "sentiment",
+    "Urgence": "urgence",
+    "Risque_churn": "risque_churn",
+    "Risque Churn": "risque_churn",
+}
+
+# topic_id des tweets sans thème (src.topics)
+NO_TOPIC = -1
+
+SENTIMENT_LABELS = {
+    "positif": "Positif", "positive": "Positif",
+    "negatif": "Négatif", "négatif": "Négatif",
+    "neutre": "Neutre",
+}
+
+
+def _date_column(created_at: pd.Series) -> pd.Series:
+    # Jour calendaire en date32 Arrow: pas d'objet datetime.date par ligne
+    days = pa.array(created_at.to_numpy().astype("datetime64[D]"), type=pa.date32())
+    return pd.Series(pd.array(days, dtype=pd.ArrowDtype(pa.date32())), index=created_at.index)
+
+
+def _period_column(created_at: pd.Series, freq: str) -> pd.Categorical:
+    # Périodes factorisées avant conversion en texte (une chaîne par période, pas par ligne)
+    codes, periods = pd.factorize(created_at.dt.to_period(freq), sort=True)
+    return pd.Categorical.from_codes(codes, categories=periods.astype(str))
+
+
+def _encode_categories(df: pd.DataFrame) -> pd.DataFrame:
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    return df
+
+
+def prepare_serving_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Dates en UTC sans fuseau, colonnes normalisées, dérivées et codées; l'index
+    est remis à zéro (les positions servent d'identifiants de ligne)
+    """
+    df = df.rename(columns=COLUMN_ALIASES)
+
+    if "created_at" in df.columns:
+        df["created_at"] = pd.to_datetime(df["created_at"], errors="coerce", utc=True).dt.tz_convert(None)
+        df = df.dropna(subset=["created_at"])
+        df["date"] = _date_column(df["created_at"])
+        df["week"] = _period_column(df["created_at"], "W")
+        df["month"] = _period_column(df["created_at"], "M")
+        df["hour"] = df["created_at"].dt.hour.astype(np.int8)
+
+    if "sentiment" in df.columns:
+        df["sentiment_norm"] = df["sentiment"].astype(str).str.lower().map(SENTIMENT_LABELS).fillna("Neutre")
+    else:
+        df["sentiment_norm"] = "Neutre"
+
+    if "urgence" in df.columns:
+        df["is_urgent"] = df["urgence"].astype(str).str.contains("élev", case=False, na=False)
+    else:
+        df["is_urgent"] = False
+
+    if "risque_churn" in df.columns:
+        df["churn_risk"] = df["risque_churn"].astype(str)
+    elif "is_churn_risk" in df.columns:
+        df["churn_risk"] = df["is_churn_risk"].apply(lambda x: "élevé" if x else "faible")
+    else:
+        df["churn_risk"] = "faible"
+    df["is_churn"] = df["churn_risk"].str.lower().str.contains("élev", na=False)
+
+    if "topic_id" in df.columns:
+        df["topic_id"] = df["topic_id"].fillna(NO_TOPIC).astype(np.int16)
+
+    return _encode_categories(df.reset_index(drop=True))
+
+
+def append_rows(df: pd.DataFrame, rows: pd.DataFrame) -> pd.DataFrame:
+    """
+    Ajoute des lignes préparées à la suite de df en gardant ses catégories
+    (étendues aux nouvelles valeurs) plutôt que de repasser en objets
+    """
+    if rows.empty:
+        return df
+    rows = rows.copy()
+    extended = {}
+    for col in df.columns.intersection(rows.columns):
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            categories = df[col].cat.categories
+            new = pd.Index(rows[col].astype(object).dropna().unique()).difference(categories)
+            if len(new):
+                categories = categories.append(new).sort_values()
+                extended[col] = df[col].cat.set_categories(categories)
+            rows[col] = pd.Categorical(rows[col].astype(object), categories=categories)
+    if extended:
+        df = df.assign(**extended)
+    return pd.concat([df, rows], ignore_index=True)
+
+
+def snapshot_path(data_path: Path) -> Path:
+    """
+    Snapshot associé à un parquet: tweets_enriched.parquet -> tweets_enriched_serving.arrow
+    """
+    return data_path.with_name(f"{data_path.stem}_serving.arrow")
+
+
+# Index écrits à côté du snapshot, lignes dans l'ordre du snapshot
+_INDEX_FILES = {"words": WordIndex, "search": SearchIndex}
+
+
+def _index_path(path: Path, name: str) -> Path:
+    return path.with_name(f"{path.stem}_{name}.arrow")
+
+
+def build_indexes(df: pd.DataFrame) -> Tuple[WordIndex, SearchIndex]:
+    """
+    Index des mots et index de recherche des lignes de df (avant retrait
+    de text_preproc, indexé par la recherche)
+    """
+    words = WordIndex()
+    words.add(document_texts(df))
+    search = SearchIndex()
+    search.add(document_texts(df), lemma_texts(df))
+    return words, search
+
+
+def _source_signature(source: Path) -> str:
+    stat = source.stat()
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def write_serving_snapshot(
+    df: pd.DataFrame,
+    path: Path,
+    source: Optional[Path] = None,
+    indexes: Optional[Tuple[WordIndex, SearchIndex]] = None
+) -> Path:
+    """
+    Prépare df (si ce n'est pas déjà fait) et l'écrit en Arrow IPC non
+    compressé avec ses index (construits si indexes est None); source est
+    le parquet dont il est dérivé
+    """
+    if pa is None:
+        raise ImportError("pyarrow n'est pas installé. Installez-le avec: pip install pyarrow")
+    if not all(c in df.columns for c in SERVING_COLUMNS):
+        df = prepare_serving_frame(df)
+    if indexes is None:
+        indexes = build_indexes(df)
+    df = df.drop(columns=UNSERVED_COLUMNS, errors="ignore")
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = {
+        "version": SNAPSHOT_VERSION,
+        "source": str(source) if source else None,
+        "source_signature": _source_signature(source) if source else None,
+    }
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        _SNAPSHOT_METADATA_KEY: json.dumps(metadata).encode(),
+    })
+
+    for name, index in zip(_INDEX_FILES, indexes):
+        index.save(_index_path(path, name), metadata=metadata)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    feather.write_feather(table, tmp_path, compression="uncompressed")
+    tmp_path.replace(path)
+    logger.info(f"Snapshot de service écrit: {path} ({len(df)} tweets)")
+    return path
+
+
+def read_serving_snapshot(
+    path: Path,
+    source: Optional[Path] = None
+) -> Optional[Tuple[pd.DataFrame, WordIndex, SearchIndex]]:
+    """
+    Snapshot et index projetés en mémoire, ou None s'ils sont absents,
+    d'une autre version de la préparation ou plus anciens que le parquet
+    source
+    """
+    index_paths = {name: _index_path(path, name) for name in _INDEX_FILES}
+    if pa is None or not path.exists() or not all(p.exists() for p in index_paths.values()):
+        return None
+    reader = pa.ipc.open_file(pa.memory_map(str(path), "r"))
+    metadata = json.loads((reader.schema.metadata or {}).get(_SNAPSHOT_METADATA_KEY, b"{}"))
+    if metadata.get("version") != SNAPSHOT_VERSION:
+        logger.info(f"Snapshot {path.name} d'une autre version, ignoré")
+        return None
+    if source is not None and (not source.exists() or metadata.get("source_signature") != _source_signature(source)):
+        logger.info(f"Snapshot {path.name} périmé (parquet source modifié), ignoré")
+        return None
+
+    df = reader.read_all().to_pandas()
+    indexes = []
+    for name, index_class in _INDEX_FILES.items():
+        index, index_metadata = index_class.load(index_paths[name])
+        if index_metadata != metadata or len(index) != len(df):
+            logger.info(f"Index {index_paths[name].name} incohérent avec le snapshot, ignoré")
+            return None
+        indexes.append(index)
+    return (df, *indexes)
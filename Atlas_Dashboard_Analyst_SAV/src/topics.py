@@ -0,0 +1,249 @@
+"""
+Thèmes des tweets négatifs (clustering CPU, hors ligne)
+
+Les motifs sont limités aux catégories du LLM: un problème nouveau finit
+dans "Autre". Les tweets négatifs sont regroupés en TOPIC_COUNT thèmes par
+MiniBatchKMeans sur leurs lemmes (text_preproc, text_clean à défaut) en
+TF-IDF creux. Les mots sont hachés sur un nombre fixe de colonnes et les
+fréquences documentaires sont cumulées: une nouvelle partition met le
+modèle à jour (partial_fit) sans revectoriser l'historique. Le mot le plus
+fréquent de chaque colonne sert à nommer les thèmes.
+
+L'étape topics du pipeline met le modèle à jour et écrit topic_id (-1 hors
+thème: tweet non négatif ou sans mot) et TOPICS_PATH (mots-clés et taille
+de chaque thème) lu par l'API; `python -m src.topics` réentraîne le modèle
+sur toute la sortie du pipeline. Les lots ingérés par l'API reçoivent le
+thème prédit par le dernier modèle, sans le mettre à jour.
+"""
+import argparse
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import joblib
+    from scipy import sparse
+    from sklearn.cluster import MiniBatchKMeans
+    from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
+    from sklearn.preprocessing import normalize
+except ImportError:
+    joblib = None
+    MiniBatchKMeans = None
+    logging.warning("scikit-learn non installé. Installez-le avec: pip install scikit-learn")
+
+from src.config import (
+    PROCESSED_DIR, TOPIC_BATCH_SIZE, TOPIC_COUNT, TOPIC_FEATURES, TOPIC_MODEL_PATH, TOPIC_TOP_TERMS, TOPICS_PATH
+)
+from src.serving import NO_TOPIC, SENTIMENT_LABELS
+from src.word_index import STOP_WORDS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Mots d'au moins 3 lettres (les lemmes n'ont plus de mots vides, text_clean si)
+_TOKEN_PATTERN = r"(?u)\b[^\W\d_]{3,}\b"
+_STOP_WORDS = sorted(w for w in STOP_WORDS if len(w) >= 3)
+
+
+def topic_texts(df: pd.DataFrame) -> pd.Series:
+    """
+    Texte regroupé: lemmes (text_preproc) si calculés, sinon text_clean
+    """
+    texts = df["text_clean"].fillna("") if "text_clean" in df.columns else pd.Series("", index=df.index)
+    if "text_preproc" in df.columns:
+        lemmas = df["text_preproc"].fillna("")
+        texts = lemmas.where(lemmas.str.strip() != "", texts)
+    return texts.astype(str)
+
+
+def negative_mask(df: pd.DataFrame) -> np.ndarray:
+    """
+    Tweets négatifs (sentiment normalisé comme dans l'API)
+    """
+    if "sentiment" not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    return (df["sentiment"].astype(str).str.lower().map(SENTIMENT_LABELS) == "Négatif").to_numpy()
+
+
+class TopicModel:
+    """
+    TF-IDF haché (fréquences documentaires cumulées) et MiniBatchKMeans mis à jour par partition
+    """
+
+    def __init__(self, n_topics: int = TOPIC_COUNT, n_features: int = TOPIC_FEATURES, batch_size: int = TOPIC_BATCH_SIZE):
+        if MiniBatchKMeans is None:
+            raise ImportError("scikit-learn n'est pas installé. Installez-le avec: pip install scikit-learn")
+        self.n_topics = n_topics
+        self.n_features = n_features
+        self.batch_size = batch_size
+        self.hasher = HashingVectorizer(
+            n_features=n_features, token_pattern=_TOKEN_PATTERN, stop_words=_STOP_WORDS,
+            alternate_sign=False, norm=None
+        )
+        self.kmeans = MiniBatchKMeans(n_clusters=n_topics, batch_size=batch_size, n_init=3, random_state=42)
+        self.n_docs = 0
+        self.doc_freq = np.zeros(n_features)
+        # Fréquence documentaire de chaque mot vu, pour nommer les colonnes hachées
+        self.word_freq: Dict[str, int] = {}
+        self.sizes = np.zeros(n_topics, dtype=np.int64)
+
+    @property
+    def fitted(self) -> bool:
+        return hasattr(self.kmeans, "cluster_centers_")
+
+    def _counts(self, texts: List[str], learn: bool):
+        """
+        Comptages hachés (documents x colonnes); les mots ne sont tokenisés
+        qu'une fois, puis chaque mot distinct est haché
+        """
+        counter = CountVectorizer(token_pattern=_TOKEN_PATTERN, stop_words=_STOP_WORDS)
+        try:
+            counts = counter.fit_transform(texts)
+        except ValueError:
+            # Aucun mot dans la partition
+            return sparse.csr_matrix((len(texts), self.n_features))
+        words = counter.get_feature_names_out()
+        buckets = self.hasher.transform(words).indices
+        mapping = sparse.csr_matrix((np.ones(len(words)), (np.arange(len(words)), buckets)), shape=(len(words), self.n_features))
+        if learn:
+            df_words = np.asarray((counts > 0).sum(axis=0)).ravel()
+            for word, n in zip(words, df_words.tolist()):
+                self.word_freq[word] = self.word_freq.get(word, 0) + n
+        return (counts @ mapping).tocsr()
+
+    def _tfidf(self, counts):
+        idf = np.log((1 + self.n_docs) / (1 + self.doc_freq)) + 1
+        X = counts.astype(float)
+        X.data = np.log1p(X.data)
+        return normalize(X @ sparse.diags(idf), norm="l2")
+
+    def partial_fit(self, texts: List[str]) -> "TopicModel":
+        """
+        Met à jour fréquences documentaires et centres avec une partition
+        (ignorée tant que le modèle n'a pas vu au moins n_topics textes non vides)
+        """
+        counts = self._counts(texts, learn=True)
+        counts = counts[counts.getnnz(axis=1) > 0]
+        self.n_docs += counts.shape[0]
+        self.doc_freq += counts.getnnz(axis=0)
+        if not self.fitted and counts.shape[0] < self.n_topics:
+            logger.info(f"Thèmes: {counts.shape[0]} textes, pas assez pour {self.n_topics} thèmes")
+            return self
+        X = self._tfidf(counts)
+        order = np.random.default_rng(self.n_docs).permutation(X.shape[0])
+        for start in range(0, X.shape[0], self.batch_size):
+            batch = X[order[start:start + self.batch_size]]
+            # Premier lot: au moins n_topics lignes pour initialiser les centres
+            if self.fitted or batch.shape[0] >= self.n_topics:
+                self.kmeans.partial_fit(batch)
+        return self
+
+    def predict(self, texts: List[str]) -> np.ndarray:
+        """
+        Thème de chaque texte (NO_TOPIC si le texte n'a aucun mot ou si le modèle n'est pas entraîné)
+        """
+        topics = np.full(len(texts), NO_TOPIC, dtype=np.int16)
+        if not self.fitted or not len(texts):
+            return topics
+        counts = self._counts(texts, learn=False)
+        has_words = counts.getnnz(axis=1) > 0
+        if has_words.any():
+            topics[has_words] = self.kmeans.predict(self._tfidf(counts[has_words]))
+        return topics
+
+    def top_terms(self, n: int = TOPIC_TOP_TERMS) -> Dict[int, List[str]]:
+        """
+        Mots-clés de chaque thème: colonnes de plus fort poids du centre,
+        nommées par leur mot le plus fréquent
+        """
+        if not self.fitted or not self.word_freq:
+            return {}
+        words = pd.DataFrame({"word": list(self.word_freq), "freq": list(self.word_freq.values())})
+        words["bucket"] = self.hasher.transform(words["word"]).indices
+        names = words.sort_values("freq", ascending=False).drop_duplicates("bucket").set_index("bucket")["word"]
+        terms = {}
+        for topic, center in enumerate(self.kmeans.cluster_centers_):
+            top = np.argsort(-center)[:n * 2]
+            terms[topic] = [names[b] for b in top if center[b] > 0 and b in names.index][:n]
+        return terms
+
+    def save(self, path: Path = TOPIC_MODEL_PATH) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump(self, path)
+        logger.info(f"Modèle de thèmes sauvegardé: {path}")
+
+    @staticmethod
+    def load(path: Path = TOPIC_MODEL_PATH) -> "TopicModel":
+        if joblib is None:
+            raise ImportError("scikit-learn n'est pas installé. Installez-le avec: pip install scikit-learn")
+        return joblib.load(path)
+
+
+def topic_model(path: Path = TOPIC_MODEL_PATH, resume: bool = True) -> Optional[TopicModel]:
+    """
+    Modèle sauvegardé (resume et fichier présent) ou nouveau modèle; None sans scikit-learn
+    """
+    if MiniBatchKMeans is None:
+        return None
+    if resume and path.exists():
+        return TopicModel.load(path)
+    return TopicModel()
+
+
+def assign_topics(df: pd.DataFrame, model: Optional[TopicModel], update: bool = False) -> pd.DataFrame:
+    """
+    Colonne topic_id des tweets négatifs (NO_TOPIC pour les autres);
+    update=True met d'abord le modèle à jour avec ces tweets
+    """
+    df = df.copy()
+    negative = negative_mask(df)
+    texts = topic_texts(df[negative]).tolist()
+    topics = np.full(len(df), NO_TOPIC, dtype=np.int16)
+    if model is not None and texts:
+        if update:
+            model.partial_fit(texts)
+        assigned = model.predict(texts)
+        topics[negative] = assigned
+        if update:
+            model.sizes += np.bincount(assigned[assigned >= 0], minlength=model.n_topics)
+    df["topic_id"] = topics
+    return df
+
+
+def write_topics(model: TopicModel, path: Path = TOPICS_PATH) -> None:
+    """
+    Mots-clés et taille de chaque thème, en JSON pour l'API
+    """
+    terms = model.top_terms()
+    topics = [{"topic_id": t, "terms": terms.get(t, []), "size": int(model.sizes[t])} for t in range(model.n_topics)]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps({"topics": topics}, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp_path.replace(path)
+
+
+def main():
+    from src.utils import load_dataframe, save_dataframe
+
+    parser = argparse.ArgumentParser(description="Réentraîne les thèmes des tweets négatifs sur toute la sortie du pipeline")
+    parser.add_argument("--input", type=str, default=str(PROCESSED_DIR / "tweets_enriched.parquet"))
+    parser.add_argument("--topics", type=int, default=TOPIC_COUNT)
+    args = parser.parse_args()
+
+    path = Path(args.input)
+    model = TopicModel(n_topics=args.topics)
+    df = assign_topics(load_dataframe(path), model, update=True)
+    model.save()
+    write_topics(model)
+    save_dataframe(df, path)
+    terms = model.top_terms()
+    for topic in range(model.n_topics):
+        print(f"{topic:>3} {model.sizes[topic]:>8}  {', '.join(terms.get(topic, []))}")
+
+
+if __name__ == "__main__":
+    main()
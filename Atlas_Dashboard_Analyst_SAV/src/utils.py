@@ -1,43 +1,187 @@
 """
 Utilitaires généraux
 """
+import codecs
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import re
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 import logging
 
+from src.config import (
+    PARQUET_SORT_COLUMN, PARQUET_ROW_GROUP_SIZE, PARQUET_COMPRESSION, PARQUET_DICTIONARY_COLUMNS
+)
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def load_csv_with_encoding(file_path: Path, text_col: str = "full_text") -> pd.DataFrame:
+CSV_ENCODINGS = ["utf-8", "utf-8-sig", "cp1252", "latin-1"]
+
+# Colonnes lues en texte: identifiants (pas d'arrondi float des ids de 19 chiffres) et auteur
+CSV_STRING_COLUMNS = ["id_str", "tweet_id", "id", "screen_name"]
+
+
+def sniff_encoding(file_path: Path, sample_size: int = 64 * 1024) -> str:
+    """
+    Devine l'encodage sur les premiers Ko du fichier (BOM, puis UTF-8 strict, puis cp1252)
+    """
+    with open(file_path, "rb") as f:
+        sample = f.read(sample_size)
+    
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    for enc in ("utf-8", "cp1252"):
+        try:
+            # Décodeur incrémental: un caractère coupé en fin d'échantillon n'est pas une erreur
+            codecs.getincrementaldecoder(enc)().decode(sample, final=False)
+            return enc
+        except UnicodeDecodeError:
+            continue
+    return "latin-1"
+
+
+def csv_read_options(text_col: str, columns: Optional[List[str]]) -> Dict:
+    """
+    Options de pd.read_csv: identifiants et auteur en texte, colonnes élaguées (columns=None: toutes)
+    """
+    options = {"dtype": {c: "string" for c in CSV_STRING_COLUMNS + [text_col]}}
+    if columns is not None:
+        wanted = set(columns) | {text_col}
+        options["usecols"] = lambda c: c in wanted
+    return options
+
+
+def load_csv_with_encoding(
+    file_path: Path,
+    text_col: str = "full_text",
+    columns: Optional[List[str]] = None,
+    chunksize: Optional[int] = None
+):
     """
-    Charge un CSV en essayant plusieurs encodages
+    Charge un CSV dont l'encodage est deviné sur un échantillon
+    
+    Args:
+        columns: colonnes à lire (text_col toujours incluse), None = toutes
+        chunksize: si fourni, retourne un itérateur de DataFrames (mémoire bornée)
     """
-    encodings = ["utf-8", "utf-8-sig", "latin-1", "cp1252"]
+    encoding = sniff_encoding(file_path)
+    header = pd.read_csv(file_path, encoding=encoding, nrows=0, encoding_errors="replace")
+    if text_col not in header.columns:
+        raise ValueError(f"Colonne '{text_col}' absente du CSV {file_path}")
+    
+    options = csv_read_options(text_col, columns)
+    # L'échantillon peut se tromper: on retente avec les encodages suivants (BOM déjà détecté par sniff_encoding)
+    candidates = [encoding] + [enc for enc in CSV_ENCODINGS if enc not in (encoding, "utf-8-sig")]
+    if chunksize is not None:
+        logger.info(f"Lecture du CSV par blocs de {chunksize} lignes (encoding: {encoding})")
+        return _iter_csv_chunks(file_path, candidates, chunksize, options)
     
-    for enc in encodings:
+    for enc in candidates:
         try:
-            df = pd.read_csv(file_path, encoding=enc, low_memory=False)
-            if text_col in df.columns:
-                logger.info(f"CSV chargé avec succès (encoding: {enc})")
-                return df
-        except Exception as e:
+            df = pd.read_csv(file_path, encoding=enc, low_memory=columns is not None, **options)
+            logger.info(f"CSV chargé avec succès (encoding: {enc}, {len(df.columns)} colonnes)")
+            return df
+        except UnicodeDecodeError as e:
             logger.warning(f"Échec avec encoding {enc}: {e}")
             continue
     
     raise ValueError(f"Impossible de charger le CSV {file_path} avec les encodages testés")
 
 
-def save_dataframe(df: pd.DataFrame, path: Path, format: str = "parquet"):
+def _iter_csv_chunks(file_path: Path, candidates: List[str], chunksize: int, options: Dict) -> Iterator[pd.DataFrame]:
+    """
+    Blocs du CSV lus en décodage strict; un octet invalide en cours de
+    lecture relance la lecture depuis le début avec l'encodage suivant, en
+    sautant les lignes déjà fournies (décodées sans erreur, donc ASCII en
+    pratique et identiques dans les deux encodages)
+    """
+    done = 0
+    for enc in candidates:
+        skip = done
+        try:
+            for chunk in pd.read_csv(file_path, encoding=enc, chunksize=chunksize, **options):
+                if skip >= len(chunk):
+                    skip -= len(chunk)
+                    continue
+                chunk, skip = chunk.iloc[skip:], 0
+                done += len(chunk)
+                yield chunk
+            return
+        except UnicodeDecodeError as e:
+            logger.warning(f"Échec avec encoding {enc} après {done} lignes ({e}), relecture depuis le début")
+    
+    raise ValueError(f"Impossible de charger le CSV {file_path} avec les encodages testés")
+
+
+TWITTER_DATE_FORMAT = "%a %b %d %H:%M:%S %z %Y"
+
+
+def to_utc_datetime(values: pd.Series) -> pd.Series:
+    """
+    Convertit une colonne de dates (format Twitter, ISO 8601 ou mixte) en datetime UTC
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.dt.tz_localize("UTC") if values.dt.tz is None else values.dt.tz_convert("UTC")
+    
+    for fmt in (TWITTER_DATE_FORMAT, "ISO8601"):
+        try:
+            return pd.to_datetime(values, format=fmt, utc=True)
+        except (ValueError, TypeError):
+            continue
+    
+    converted = pd.to_datetime(values, format="mixed", errors="coerce", utc=True)
+    lost = int(converted.isna().sum() - values.isna().sum())
+    if lost > 0:
+        logger.warning(f"{lost} dates illisibles remplacées par NaT")
+    return converted
+
+
+def prepare_for_parquet(df: pd.DataFrame, sort_by: Optional[str] = PARQUET_SORT_COLUMN) -> pd.DataFrame:
+    """
+    Typage et tri avant écriture: la colonne de tri devient un timestamp UTC
+    et les row groups couvrent des plages de dates disjointes (statistiques
+    min/max exploitables pour filtrer à la lecture)
+    """
+    if sort_by and sort_by in df.columns:
+        df = df.assign(**{sort_by: to_utc_datetime(df[sort_by])})
+        df = df.sort_values(sort_by, kind="stable", na_position="last")
+    return df
+
+
+def parquet_write_options(columns: List[str]) -> Dict:
+    """
+    Options pyarrow communes: row groups, compression, dictionnaire limité
+    aux colonnes catégorielles (inutile sur le texte libre), statistiques
+    """
+    return {
+        "row_group_size": PARQUET_ROW_GROUP_SIZE,
+        "compression": PARQUET_COMPRESSION,
+        "use_dictionary": [c for c in PARQUET_DICTIONARY_COLUMNS if c in columns],
+        "write_statistics": True,
+    }
+
+
+def save_dataframe(
+    df: pd.DataFrame,
+    path: Path,
+    format: str = "parquet",
+    sort_by: Optional[str] = PARQUET_SORT_COLUMN
+):
     """
     Sauvegarde un DataFrame dans différents formats
+    
+    sort_by (parquet): colonne de dates triée et typée pour la lecture filtrée
+    par load_dataframe(date_range=...); None écrit les lignes telles quelles
     """
     path.parent.mkdir(parents=True, exist_ok=True)
     
     if format == "parquet":
-        df.to_parquet(path, index=False, engine="pyarrow")
+        df = prepare_for_parquet(df, sort_by)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pq.write_table(table, path, **parquet_write_options(table.column_names))
     elif format == "csv":
         df.to_csv(path, index=False, encoding="utf-8-sig")
     else:
@@ -46,18 +190,86 @@ def save_dataframe(df: pd.DataFrame, path: Path, format: str = "parquet"):
     logger.info(f"Données sauvegardées: {path}")
 
 
-def load_dataframe(path: Path) -> pd.DataFrame:
+def parquet_columns(path: Path) -> List[str]:
+    """
+    Colonnes d'un fichier parquet (lecture du schéma seul)
+    """
+    return pq.read_schema(path).names
+
+
+def _date_bound(value, tz: Optional[str], shift_days: int = 0) -> pd.Timestamp:
+    """
+    Borne de date_range à la journée dans le fuseau tz (None: naïf); une
+    valeur naïve est prise dans ce fuseau, une valeur avec fuseau y est convertie
+    """
+    ts = pd.Timestamp(value).normalize() + pd.Timedelta(days=shift_days)
+    if tz is None:
+        return ts.tz_localize(None) if ts.tz is not None else ts
+    return ts.tz_localize(tz) if ts.tz is None else ts.tz_convert(tz)
+
+
+def _date_filters(path: Path, date_col: str, date_range: Tuple) -> Optional[List[Tuple]]:
+    """
+    Filtres pyarrow (bornes à la journée, fin incluse) si la colonne est un
+    timestamp; None pour les anciens fichiers où elle est stockée en texte
+    """
+    schema = pq.read_schema(path)
+    if date_col not in schema.names or not pa.types.is_timestamp(schema.field(date_col).type):
+        return None
+    tz = schema.field(date_col).type.tz
+    
+    start, end = date_range
+    filters = []
+    if start is not None:
+        filters.append((date_col, ">=", _date_bound(start, tz)))
+    if end is not None:
+        filters.append((date_col, "<", _date_bound(end, tz, shift_days=1)))
+    return filters or None
+
+
+def load_dataframe(
+    path: Path,
+    columns: Optional[List[str]] = None,
+    date_range: Optional[Tuple] = None,
+    date_col: str = PARQUET_SORT_COLUMN
+) -> pd.DataFrame:
     """
     Charge un DataFrame depuis parquet ou CSV
+    
+    Args:
+        columns: projection (seules ces colonnes sont lues)
+        date_range: (début, fin) inclus à la journée, None pour une borne ouverte;
+            en parquet, les row groups hors plage ne sont pas lus
     """
     if path.suffix == ".parquet":
-        return pd.read_parquet(path)
+        filters = _date_filters(path, date_col, date_range) if date_range is not None else None
+        read_columns = columns
+        if date_range is not None and filters is None and columns is not None and date_col not in columns:
+            read_columns = list(columns) + [date_col]
+        df = pd.read_parquet(path, columns=read_columns, filters=filters)
+        if date_range is not None and filters is None and date_col in df.columns:
+            df = _filter_dates(df, date_col, date_range)
+        return df[columns] if columns is not None else df
     elif path.suffix == ".csv":
-        return load_csv_with_encoding(path)
+        df = load_csv_with_encoding(path)
+        if date_range is not None:
+            df = _filter_dates(df, date_col, date_range)
+        return df[columns] if columns else df
     else:
         raise ValueError(f"Format de fichier non supporté: {path.suffix}")
 
 
+def _filter_dates(df: pd.DataFrame, date_col: str, date_range: Tuple) -> pd.DataFrame:
+    dates = to_utc_datetime(df[date_col])
+    start, end = date_range
+    mask = pd.Series(True, index=df.index)
+    if start is not None:
+        mask &= dates >= _date_bound(start, "UTC")
+    if end is not None:
+        mask &= dates < _date_bound(end, "UTC", shift_days=1)
+    return df[mask]
+
+
 def safe_str(value) -> str:
     """
     Convertit une valeur en string de manière sécurisée
@@ -0,0 +1,61 @@
+"""
+Entrées/sorties append-only pour les checkpoints du pipeline
+"""
+import json
+import os
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def append_jsonl(path: Path, records: Iterable[Dict]) -> int:
+    """
+    Ajoute des enregistrements à un journal JSONL et force l'écriture sur disque
+
+    Chaque appel est durable dès son retour: un crash ultérieur ne perd
+    au plus que le batch en cours.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lines = [json.dumps(r, ensure_ascii=False, default=str) for r in records]
+    if not lines:
+        return 0
+    with open(path, "a+b") as f:
+        # Dernière ligne tronquée par un crash: la clore pour ne pas y coller le premier enregistrement
+        f.seek(0, os.SEEK_END)
+        if f.tell():
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+        f.write(("\n".join(lines) + "\n").encode("utf-8"))
+        f.flush()
+        os.fsync(f.fileno())
+    return len(lines)
+
+
+def iter_jsonl(path: Path) -> Iterator[Dict]:
+    """
+    Parcourt un journal JSONL ligne à ligne (mémoire constante), en ignorant
+    une éventuelle dernière ligne tronquée
+    """
+    if not path.exists():
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Ligne {line_no} illisible dans {path} (écriture interrompue?), ignorée")
+
+
+def read_jsonl(path: Path) -> List[Dict]:
+    """
+    Relit un journal JSONL en ignorant une éventuelle dernière ligne tronquée
+    """
+    return list(iter_jsonl(path))
+
@@ -0,0 +1,184 @@
+"""
+Index des mots des tweets servis par l'API (nuage de mots)
+
+Chaque occurrence d'un mot est stockée comme un couple (ligne, mot) en
+entiers: le nuage de mots d'une sélection de tweets est un simple comptage
+sur ces tableaux, sans relire ni retokeniser les textes. Les lots ingérés
+en temps réel sont ajoutés à la suite sans reconstruire l'index.
+
+L'index est sauvegardé avec le snapshot de service (src.serving) pour que
+l'API n'ait pas à retokeniser les textes au démarrage.
+"""
+import json
+import logging
+import re
+from itertools import chain
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+    logging.warning("pyarrow non installé. Installez-le avec: pip install pyarrow")
+
+_WORD_RE = re.compile(r"\w+")
+
+MIN_WORD_LENGTH = 4
+
+# Mots ignorés par le nuage de mots (en plus des mots de moins de 4 lettres)
+STOP_WORDS = frozenset({
+    'le', 'la', 'les', 'de', 'du', 'des', 'un', 'une', 'et', 'est', 'en', 'il', 'elle', 'que', 'qui', 'ce', 'ca',
+    'pour', 'sur', 'dans', 'pas', 'plus', 'mais', 'avec', 'tout', 'fait', 'faire', 'être', 'avoir', 'a', 'au', 'aux',
+    'ne', 'se', 'par', 'je', 'tu', 'nous', 'vous', 'ils', 'elles', 'mon', 'ma', 'mes', 'ton', 'ta', 'tes', 'son',
+    'sa', 'ses', 'notre', 'votre', 'leur', 'leurs', 'free', 'freemobile'
+})
+
+
+def tokenize(text) -> List[str]:
+    """
+    Mots d'un texte (minuscules, au moins 4 lettres, hors mots vides)
+    """
+    if not isinstance(text, str):
+        return []
+    return [w for w in _WORD_RE.findall(text.lower()) if len(w) >= MIN_WORD_LENGTH and w not in STOP_WORDS]
+
+
+def document_texts(df: pd.DataFrame) -> pd.Series:
+    """
+    Texte indexé d'un tweet: text_clean si disponible, sinon full_text
+    """
+    column = "text_clean" if "text_clean" in df.columns else "full_text"
+    return df[column] if column in df.columns else pd.Series([""] * len(df), index=df.index)
+
+
+class WordIndex:
+    """
+    Occurrences (ligne, mot) des tweets, lignes numérotées dans l'ordre d'ajout
+    """
+
+    def __init__(self):
+        self.terms: List[str] = []
+        self.vocabulary: Dict[str, int] = {}
+        self.n_rows = 0
+        self._blocks: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._arrays: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    def add(self, texts) -> None:
+        """
+        Indexe un lot de textes à la suite des lignes déjà indexées
+        """
+        words = [tokenize(t) for t in texts]
+        lengths = np.fromiter(map(len, words), dtype=np.int64, count=len(words))
+        rows = np.repeat(np.arange(self.n_rows, self.n_rows + len(words), dtype=np.int32), lengths)
+
+        codes, uniques = pd.factorize(pd.Series(list(chain.from_iterable(words)), dtype=object))
+        for term in uniques:
+            if term not in self.vocabulary:
+                self.vocabulary[term] = len(self.terms)
+                self.terms.append(term)
+        term_ids = np.array([self.vocabulary[t] for t in uniques], dtype=np.int32)[codes]
+
+        self._blocks.append((rows, term_ids))
+        self._arrays = None
+        self.n_rows += len(words)
+
+    def _occurrences(self) -> Tuple[np.ndarray, np.ndarray]:
+        # Blocs concaténés à la première lecture suivant un ajout
+        if self._arrays is None:
+            if self._blocks:
+                self._arrays = (
+                    np.concatenate([rows for rows, _ in self._blocks]),
+                    np.concatenate([terms for _, terms in self._blocks]),
+                )
+            else:
+                self._arrays = (np.array([], dtype=np.int32), np.array([], dtype=np.int32))
+            self._blocks = [self._arrays]
+        return self._arrays
+
+    def term_counts(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Nombre d'occurrences de chaque mot (ordre de self.terms), sur toutes
+        les lignes ou seulement sur les positions rows
+        """
+        row_ids, term_ids = self._occurrences()
+        if rows is not None:
+            selected = np.zeros(self.n_rows, dtype=bool)
+            selected[np.asarray(rows, dtype=np.int64)] = True
+            term_ids = term_ids[selected[row_ids]]
+        return np.bincount(term_ids, minlength=len(self.terms))
+
+    def top_terms(self, rows: Optional[np.ndarray] = None, n: int = 30) -> List[Tuple[str, int]]:
+        """
+        Les n mots les plus fréquents (mot, occurrences)
+        """
+        counts = self.term_counts(rows)
+        top = np.argsort(-counts, kind="stable")[:n]
+        return [(self.terms[i], int(counts[i])) for i in top if counts[i] > 0]
+
+    def save(self, path: Path, metadata: Optional[Dict] = None) -> None:
+        """
+        Occurrences en Arrow IPC, vocabulaire et metadata dans le schéma
+        """
+        row_ids, term_ids = self._occurrences()
+        write_arrow_index(path, {"row": row_ids, "term": term_ids}, self.terms, self.n_rows, metadata)
+
+    @staticmethod
+    def load(path: Path) -> Tuple["WordIndex", Dict]:
+        """
+        Index projeté en mémoire (mmap) et metadata passées à save
+        """
+        columns, terms, n_rows, metadata = read_arrow_index(path)
+        index = WordIndex()
+        index.terms = terms
+        index.vocabulary = {term: i for i, term in enumerate(terms)}
+        index.n_rows = n_rows
+        index._arrays = (columns["row"], columns["term"])
+        index._blocks = [index._arrays]
+        return index, metadata
+
+
+def write_arrow_index(
+    path: Path,
+    columns: Dict[str, np.ndarray],
+    terms: List[str],
+    n_rows: int,
+    metadata: Optional[Dict] = None
+) -> None:
+    """
+    Tableaux d'un index en Arrow IPC non compressé; vocabulaire, nombre de
+    lignes et metadata (JSON) dans le schéma
+    """
+    table = pa.table(columns).replace_schema_metadata({
+        b"terms": json.dumps(terms, ensure_ascii=False).encode(),
+        b"n_rows": str(n_rows).encode(),
+        b"metadata": json.dumps(metadata or {}).encode(),
+    })
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with pa.OSFile(str(tmp_path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    tmp_path.replace(path)
+
+
+def read_arrow_index(path: Path) -> Tuple[Dict[str, np.ndarray], List[str], int, Dict]:
+    """
+    Tableaux (projetés en mémoire), vocabulaire, nombre de lignes et metadata
+    écrits par write_arrow_index
+    """
+    reader = pa.ipc.open_file(pa.memory_map(str(path), "r"))
+    table = reader.read_all()
+    schema_metadata = reader.schema.metadata
+    columns = {name: table.column(name).to_numpy() for name in table.column_names}
+    return (
+        columns,
+        json.loads(schema_metadata[b"terms"]),
+        int(schema_metadata[b"n_rows"]),
+        json.loads(schema_metadata[b"metadata"]),
+    )
@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.alerts import SpikeDetector, hourly_counts
+
+def make_tweets(days=20, spike=pd.Timestamp("2024-01-15 14:00"), seed=0):
+    """Two negative tweets per hour on Réseau, plus 20 extra at the spike hour"""
+    rng = np.random.default_rng(seed)
+    hours = pd.date_range("2024-01-01", periods=24 * days, freq="h")
+    created = np.repeat(hours, 2).append(pd.DatetimeIndex([spike] * 20))
+    n = len(created)
+    return pd.DataFrame({
+        "created_at": created + pd.to_timedelta(rng.integers(0, 60, n), unit="min"),
+        "motif": rng.choice(["Réseau", "Facturation"], n, p=[0.9, 0.1]),
+        "sentiment_norm": "Négatif",
+        "is_urgent": False,
+    })
+
+class TestHourlyCounts(unittest.TestCase):
+    def test_counts_per_series(self):
+        """Each metric is counted per motif and for all motifs"""
+        df = pd.DataFrame({
+            "created_at": pd.to_datetime(["2024-01-01 10:05", "2024-01-01 10:40", "2024-01-01 11:00"]),
+            "motif": ["Réseau", None, "Réseau"],
+            "sentiment_norm": ["Négatif", "Négatif", "Neutre"],
+            "is_urgent": [True, False, True],
+        })
+        counts = hourly_counts(df)
+        self.assertEqual(counts.loc[pd.Timestamp("2024-01-01 10:00"), ("negatif", "(Tous)")], 2)
+        self.assertEqual(counts.loc[pd.Timestamp("2024-01-01 10:00"), ("negatif", "Réseau")], 1)
+        self.assertEqual(counts.loc[pd.Timestamp("2024-01-01 11:00"), ("urgent", "Réseau")], 1)
+
+class TestSpikeDetector(unittest.TestCase):
+    def test_flags_spike(self):
+        """Only the spike hour is flagged, against a baseline of the same hour on previous days"""
+        alerts = SpikeDetector().update(make_tweets())
+        self.assertTrue(alerts)
+        self.assertEqual({a["hour"] for a in alerts}, {pd.Timestamp("2024-01-15 14:00")})
+        overall = [a for a in alerts if a["motif"] == "(Tous)"][0]
+        self.assertEqual(overall["metric"], "negatif")
+        self.assertEqual(overall["count"], 22)
+        self.assertLess(overall["expected"], 3)
+
+    def test_no_alert_during_warmup(self):
+        """A spike before the warmup period is not flagged"""
+        df = make_tweets(days=5, spike=pd.Timestamp("2024-01-03 14:00"))
+        self.assertEqual(SpikeDetector(warmup=7).update(df), [])
+
+    def test_incremental_matches_full_scan(self):
+        """Updating with successive loads gives the same baselines and alerts as a single scan"""
+        df = make_tweets()
+        full = SpikeDetector()
+        expected = full.update(df)
+
+        incremental = SpikeDetector()
+        alerts = []
+        for cut in ["2024-01-08 10:30", "2024-01-15 14:10", "2024-01-18 00:00"]:
+            alerts += incremental.update(df[df["created_at"] < pd.Timestamp(cut)])
+        alerts += incremental.update(df)
+
+        self.assertEqual(alerts, expected)
+        np.testing.assert_allclose(incremental.mean, full.mean)
+        np.testing.assert_array_equal(incremental.n, full.n)
+
+    def test_state_persisted(self):
+        """A reloaded detector only processes the hours after the saved state"""
+        df = make_tweets()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "alerts_state.pkl"
+            detector = SpikeDetector()
+            detector.update(df[df["created_at"] < pd.Timestamp("2024-01-10")])
+            detector.save(path)
+            reloaded = SpikeDetector.load(path)
+        self.assertEqual(reloaded.next_hour, detector.next_hour)
+        self.assertEqual(len(reloaded.update(df)), len(SpikeDetector().update(df)))
+
+    def test_open_hour_is_provisional(self):
+        """The last hour of the data is evaluated but kept out of the baselines"""
+        df = make_tweets(spike=pd.Timestamp("2024-01-20 23:00"))
+        detector = SpikeDetector()
+        self.assertEqual(detector.update(df), [])
+        self.assertTrue(detector.provisional)
+        self.assertTrue(all(a["provisional"] for a in detector.current_alerts()))
+        self.assertEqual(detector.next_hour, pd.Timestamp("2024-01-20 23:00"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import subprocess
+import sys
+import os
+
+import pandas as pd
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.cleaning import (
+    compute_tweet_ids, filter_tweets, split_emojis, remove_punctuation, emoji_frequencies, apply_basic_cleanup
+)
+
+class TestTweetIds(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            "screen_name": ["alice", "bob", "carol"],
+            "created_at": ["2024-01-01 10:00", "2024-01-01 11:00", "2024-01-02 09:00"],
+            "full_text": ["box en panne", "facture fausse", "box en panne"],
+        })
+
+    def test_content_hash_is_order_independent(self):
+        """Content-hash ids do not depend on row order or index"""
+        ids = compute_tweet_ids(self.df)
+        shuffled = compute_tweet_ids(self.df.iloc[[2, 0, 1]].reset_index(drop=True))
+
+        self.assertEqual(ids.nunique(), 3)
+        self.assertEqual(list(shuffled), [ids[2], ids[0], ids[1]])
+
+    def test_source_id_takes_precedence(self):
+        """Source ids are used when present, content hash fills the gaps"""
+        df = self.df.assign(id=[1.7e18, None, 42.0])
+        ids = compute_tweet_ids(df)
+
+        self.assertEqual(ids[0], "1700000000000000000")
+        self.assertEqual(ids[2], "42")
+        self.assertEqual(ids[1], compute_tweet_ids(self.df)[1])
+
+class TestFilterTweets(unittest.TestCase):
+    def test_filters_rt_free_and_duplicates(self):
+        """RT, Free accounts, missing texts and duplicates are dropped, first occurrence kept"""
+        df = pd.DataFrame({
+            "full_text": ["box en panne", "RT @free: promo", "rt lol", None, "box en panne", "facture", "réseau", "merci"],
+            "screen_name": ["alice", "bob", "carol", "dave", "eve", "FreeBox_Assistance", "frank", "gina"],
+            "tweet_id": ["1", "2", "3", "4", "5", "6", "7", "7"],
+        }, index=[10, 11, 12, 13, 14, 15, 16, 17])
+
+        filtered = filter_tweets(df)
+
+        self.assertEqual(list(filtered.index), [10, 16])
+        self.assertEqual(list(filtered.columns), list(df.columns))
+
+    def test_keeps_free_accounts_when_disabled(self):
+        """exclude_free=False keeps official accounts"""
+        df = pd.DataFrame({"full_text": ["a", "b"], "screen_name": ["free", None]})
+
+        self.assertEqual(len(filter_tweets(df, exclude_free=False)), 2)
+        self.assertEqual(list(filter_tweets(df)["full_text"]), ["b"])
+
+class TestEmojis(unittest.TestCase):
+    def test_split_emojis(self):
+        """Emojis are extracted and stripped in the same pass"""
+        emojis, text = split_emojis("box en panne 😡😡 encore 🔥")
+        self.assertEqual(emojis, "😡😡🔥")
+        self.assertEqual(text.split(), ["box", "en", "panne", "encore"])
+        self.assertEqual(split_emojis(None), ("", ""))
+
+    def test_remove_punctuation(self):
+        """Listed punctuation becomes a space, other symbols are dropped, emojis kept on request"""
+        self.assertEqual(remove_punctuation("ça marche!! (enfin) #ok_2 😀"), "ça marche    enfin  ok 2 ")
+        self.assertEqual(remove_punctuation("top 😀", keep_emoji=True), "top 😀")
+
+    def test_apply_basic_cleanup(self):
+        """emojis column and text_stripped without emojis, URLs or mentions"""
+        df = pd.DataFrame({"full_text": ["@free 😡 panne https://t.co/x", "merci"]})
+        out = apply_basic_cleanup(df)
+        self.assertEqual(list(out["emojis"]), ["😡", ""])
+        self.assertEqual(out["text_stripped"][0].split(), ["panne"])
+
+    def test_emoji_frequencies(self):
+        """Occurrences and number of tweets per emoji, most frequent first"""
+        stats = emoji_frequencies(pd.Series(["😡😡🔥", "🔥", None, "", "👍"]))
+        self.assertEqual(list(stats["emoji"]), ["🔥", "😡", "👍"])
+        self.assertEqual(list(stats["count"]), [2, 2, 1])
+        self.assertEqual(list(stats["tweets"]), [2, 1, 1])
+        self.assertEqual(len(emoji_frequencies(pd.Series([], dtype=object), top_n=5)), 0)
+
+class TestLazyImports(unittest.TestCase):
+    def test_api_does_not_load_nlp_dependencies(self):
+        """Importing src.cleaning or the API loads neither spaCy, langdetect nor deep-translator"""
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+        code = (
+            "import sys, src.cleaning, backend.main; "
+            "print(','.join(m for m in ('spacy', 'langdetect', 'deep_translator') if m in sys.modules))"
+        )
+        out = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+        self.assertEqual(out.stdout.strip(), "")
+
+if __name__ == "__main__":
+    unittest.main()
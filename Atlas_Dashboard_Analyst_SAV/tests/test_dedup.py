@@ -0,0 +1,46 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.dedup import cluster_near_duplicates, sample_cluster_members, label_agreement
+
+class TestNearDuplicates(unittest.TestCase):
+    def test_near_duplicates_share_representative(self):
+        """Tweets differing by a few words are grouped under the first one"""
+        texts = [
+            "ma box ne marche plus depuis ce matin c est pénible",
+            "facture incompréhensible ce mois ci",
+            "ma box ne marche plus depuis ce matin c est pénible vraiment",
+            "ma box ne marche plus depuis ce matin c est pénible",
+        ]
+        clusters = cluster_near_duplicates(texts, threshold=0.7)
+
+        self.assertEqual(clusters[0], 0)
+        self.assertEqual(clusters[2], 0)
+        self.assertEqual(clusters[3], 0)
+        self.assertEqual(clusters[1], 1)
+
+    def test_distinct_tweets_stay_alone(self):
+        """Unrelated tweets are their own representative"""
+        texts = ["fibre coupée depuis trois jours", "merci pour la réactivité du support", ""]
+        clusters = cluster_near_duplicates(texts, threshold=0.8)
+        np.testing.assert_array_equal(clusters, np.arange(3))
+
+    def test_audit_sample_and_agreement(self):
+        """Audit samples only non-representatives and reports agreement per field"""
+        clusters = np.array([0, 0, 0, 3, 3, 5])
+        sample = sample_cluster_members(clusters, sample_size=10)
+        np.testing.assert_array_equal(sample, [1, 2, 4])
+
+        propagated = [{"motif": "Réseau", "sentiment": "négatif"}, {"motif": "Technique", "sentiment": "négatif"}]
+        reference = [{"motif": "Réseau", "sentiment": "négatif"}, {"motif": "Réseau", "sentiment": "négatif"}]
+        report = label_agreement(propagated, reference, fields=("motif", "sentiment"))
+        self.assertEqual(report, {"n": 2, "motif": 0.5, "sentiment": 1.0})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import sys
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.examples import build_examples, merge_examples, select_examples
+from src.serving import append_rows, prepare_serving_frame
+
+def make_tweets(n=600, seed=0, start="2024-01-01"):
+    rng = np.random.default_rng(seed)
+    return prepare_serving_frame(pd.DataFrame({
+        "tweet_id": [f"{seed}-{i}" for i in range(n)],
+        "full_text": [f"tweet {i}" for i in range(n)],
+        "created_at": pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, 90 * 86400, n), unit="s"),
+        "motif": rng.choice(["Réseau", "Facturation", None], n),
+        "sentiment": rng.choice(["négatif", "neutre", "positif"], n),
+    }))
+
+class TestExamples(unittest.TestCase):
+    def test_recent_matches_full_sort(self):
+        """Most recent examples equal a full sort of the selection, whole months and partial ones"""
+        df = make_tweets()
+        examples = build_examples(df, k=5)
+        for filters in [{}, {"motif": "Réseau"}, {"motif": "Facturation", "sentiment": "Négatif"},
+                        {"start_date": date(2024, 2, 1), "end_date": date(2024, 2, 29)}]:
+            rows = select_examples(examples, n=5, **filters)["recent"]
+            mask = pd.Series(True, index=df.index)
+            if "motif" in filters:
+                mask &= df["motif"] == filters["motif"]
+            if "sentiment" in filters:
+                mask &= df["sentiment_norm"] == filters["sentiment"]
+            if "start_date" in filters:
+                mask &= (df["date"] >= filters["start_date"]) & (df["date"] <= filters["end_date"])
+            expected = df[mask].nlargest(5, "created_at").index.tolist()
+            self.assertEqual(rows, expected, filters)
+
+    def test_representative_sample(self):
+        """Representative examples belong to the selection and do not depend on row order"""
+        df = make_tweets()
+        rows = select_examples(build_examples(df, k=5), motif="Réseau", n=5)["representative"]
+        self.assertEqual(len(rows), 5)
+        self.assertTrue((df.loc[rows, "motif"] == "Réseau").all())
+        shuffled = df.sample(frac=1, random_state=1).reset_index(drop=True)
+        rows_shuffled = select_examples(build_examples(shuffled, k=5), motif="Réseau", n=5)["representative"]
+        self.assertEqual(shuffled.loc[rows_shuffled, "tweet_id"].tolist(), df.loc[rows, "tweet_id"].tolist())
+
+    def test_merge_matches_rebuild(self):
+        """Merging the reservoirs of an ingested batch equals building them on all rows"""
+        base, batch = make_tweets(seed=0), make_tweets(n=200, seed=1, start="2024-03-01")
+        merged = merge_examples(build_examples(base, k=5), build_examples(batch, k=5, offset=len(base)), k=5)
+        rebuilt = build_examples(append_rows(base, batch), k=5)
+        for motif in [None, "Réseau"]:
+            self.assertEqual(select_examples(merged, motif=motif, n=5), select_examples(rebuilt, motif=motif, n=5))
+
+    def test_empty(self):
+        """Frames without dates give no examples"""
+        examples = build_examples(pd.DataFrame({"full_text": ["x"]}))
+        self.assertEqual(select_examples(examples), {"representative": [], "recent": []})
+
+if __name__ == "__main__":
+    unittest.main()
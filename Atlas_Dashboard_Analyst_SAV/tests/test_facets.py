@@ -0,0 +1,59 @@
+import unittest
+import sys
+import os
+from datetime import date
+
+import pandas as pd
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.facets import build_facet_cube, facet_counts, filter_cube, filter_options, merge_cubes
+
+class TestFacetCube(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            "date": [date(2024, 1, 1), date(2024, 1, 1), date(2024, 1, 2), date(2024, 1, 3), date(2024, 1, 3)],
+            "motif": ["Réseau", "Réseau", "Facturation", "Réseau", None],
+            "sentiment_norm": ["Négatif", "Négatif", "Neutre", "Positif", "Négatif"],
+            "is_urgent": [True, True, False, False, True],
+            "churn_risk": ["élevé", "élevé", "faible", "faible", "faible"],
+        })
+        self.cube = build_facet_cube(self.df)
+
+    def test_cube_is_aggregated(self):
+        """Identical combinations are counted once, rows with a missing motif are kept"""
+        self.assertEqual(len(self.cube), 4)
+        self.assertEqual(self.cube["count"].sum(), len(self.df))
+
+    def test_filter_options(self):
+        """Options and date bounds match the raw data"""
+        options = filter_options(self.cube)
+        self.assertEqual(options["min_date"], date(2024, 1, 1))
+        self.assertEqual(options["max_date"], date(2024, 1, 3))
+        self.assertEqual(options["motifs"], ["Facturation", "Réseau"])
+        self.assertEqual(options["churn_risks"], ["faible", "élevé"])
+        self.assertEqual(options["facets"]["motif"], [{"value": "Réseau", "count": 3}, {"value": "Facturation", "count": 1}])
+
+    def test_facets_follow_other_filters(self):
+        """Each facet is counted under every filter except its own"""
+        facets = facet_counts(self.cube, motif="Réseau", sentiment="Négatif")
+        self.assertEqual(facets["total"], 2)
+        # motif facet ignores the motif filter but applies the sentiment filter
+        self.assertEqual(facets["motif"], [{"value": "Réseau", "count": 2}])
+        self.assertEqual(facets["sentiment"], [{"value": "Négatif", "count": 2}, {"value": "Positif", "count": 1}])
+
+    def test_matches_row_level_filters(self):
+        """Cube counts equal counts over the filtered tweets"""
+        filtered = filter_cube(self.cube, start_date=date(2024, 1, 2), urgent=True, churn="(Tous)")
+        expected = self.df[(self.df["date"] >= date(2024, 1, 2)) & self.df["is_urgent"]]
+        self.assertEqual(filtered["count"].sum(), len(expected))
+
+    def test_merge_cubes_matches_full_cube(self):
+        """Merging the cubes of two batches gives the cube of the whole dataset"""
+        merged = merge_cubes(build_facet_cube(self.df.iloc[:3]), build_facet_cube(self.df.iloc[3:]))
+        self.assertEqual(facet_counts(merged), facet_counts(self.cube))
+        self.assertEqual(len(merged), len(self.cube))
+
+if __name__ == "__main__":
+    unittest.main()
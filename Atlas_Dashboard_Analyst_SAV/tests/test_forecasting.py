@@ -0,0 +1,56 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.forecasting import ALL_MOTIFS, backtest, build_churn_forecasts, fit_forecast
+
+class TestForecasting(unittest.TestCase):
+    def test_trend_is_extrapolated(self):
+        """A clean linear series is continued, with the interval around the forecast"""
+        fc = fit_forecast(np.arange(10, 22, dtype=float), horizon=2)
+        self.assertAlmostEqual(fc["predicted"][0], 22, delta=0.5)
+        self.assertGreater(fc["predicted"][1], fc["predicted"][0])
+        for lo, p, hi in zip(fc["lower"], fc["predicted"], fc["upper"]):
+            self.assertLessEqual(lo, p)
+            self.assertLessEqual(p, hi)
+
+    def test_seasonality_with_two_years(self):
+        """With two years of history the yearly pattern is used and beats the naive extrapolation"""
+        t = np.arange(36)
+        y = 10 + 4 * np.sin(2 * np.pi * t / 12)
+        fc = fit_forecast(y, horizon=2)
+        self.assertEqual(fc["params"]["season_length"], 12)
+        expected = 10 + 4 * np.sin(2 * np.pi * np.array([36, 37]) / 12)
+        np.testing.assert_allclose(fc["predicted"], expected, atol=1.0)
+
+        report = backtest(y, horizon=2)
+        self.assertGreater(report["origins"], 0)
+        self.assertEqual(len(report["mae"]), 2)
+
+    def test_short_series_has_no_forecast(self):
+        """Fewer than three months: no forecast"""
+        self.assertIsNone(fit_forecast([5.0, 6.0]))
+
+    def test_forecasts_per_motif(self):
+        """Monthly rates per motif and overall, forecast months follow the last observed month"""
+        months = [f"2024-{m:02d}" for m in range(1, 7)]
+        df = pd.DataFrame({
+            "month": np.repeat(months, 4),
+            "motif": ["Réseau", "Réseau", "Facturation", "Facturation"] * 6,
+            "is_churn": [True, False, False, False] * 6,
+        })
+        forecasts = build_churn_forecasts(df, horizon=2)
+
+        self.assertEqual(set(forecasts), {ALL_MOTIFS, "Réseau", "Facturation"})
+        self.assertEqual([p["actual"] for p in forecasts["Réseau"]["history"]], [50.0] * 6)
+        self.assertEqual([p["month"] for p in forecasts[ALL_MOTIFS]["forecast"]], ["2024-07", "2024-08"])
+        self.assertAlmostEqual(forecasts[ALL_MOTIFS]["forecast"][0]["predicted"], 25.0, delta=0.1)
+
+if __name__ == "__main__":
+    unittest.main()
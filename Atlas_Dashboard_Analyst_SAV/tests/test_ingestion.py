@@ -0,0 +1,107 @@
+import unittest
+import sys
+import os
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.ingestion import DeltaSegment, clean_fast, load_ingested, records_to_frame
+from src.serving import prepare_serving_frame
+from src.word_index import WordIndex, tokenize
+
+RECORDS = [
+    {"full_text": "Plus de réseau depuis ce matin https://t.co/x @free 😡", "created_at": "2024-03-01T08:00:00Z",
+     "screen_name": "alice", "motif": "Réseau", "sentiment": "négatif", "urgence": "élevée", "risque_churn": "élevé"},
+    {"full_text": "Facture prélevée deux fois", "created_at": "2024-03-01T09:30:00Z",
+     "screen_name": "bob", "motif": "Facturation", "sentiment": "neutre", "urgence": "faible", "risque_churn": "faible"},
+]
+
+class TestRecords(unittest.TestCase):
+    def test_missing_required_field(self):
+        """A batch without created_at is rejected"""
+        with self.assertRaises(ValueError):
+            records_to_frame([{"full_text": "panne"}])
+
+    def test_ids_and_duplicates(self):
+        """Records get a deterministic tweet_id, duplicates in the batch are dropped"""
+        df = records_to_frame(RECORDS + RECORDS[:1])
+        self.assertEqual(len(df), 2)
+        self.assertTrue(df["tweet_id"].equals(records_to_frame(RECORDS)["tweet_id"]))
+
+    def test_clean_fast(self):
+        """Fast cleaning extracts emojis and normalizes the text without translation"""
+        df = clean_fast(records_to_frame(RECORDS))
+        self.assertEqual(df.loc[0, "emojis"], "😡")
+        self.assertEqual(df.loc[0, "text_clean"], "plus de réseau depuis ce matin")
+
+    def test_serving_columns(self):
+        """Derived columns match the ones computed at API load time"""
+        df = prepare_serving_frame(records_to_frame(RECORDS))
+        self.assertEqual(df["sentiment_norm"].tolist(), ["Négatif", "Neutre"])
+        self.assertEqual(df["is_churn"].tolist(), [True, False])
+        self.assertEqual(str(df.loc[1, "month"]), "2024-03")
+
+class TestDeltaSegment(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_compaction_threshold(self):
+        """The segment is due for compaction once it reaches max_rows"""
+        segment = DeltaSegment(self.dir, max_rows=3, max_seconds=3600)
+        segment.append(prepare_serving_frame(records_to_frame(RECORDS)))
+        self.assertFalse(segment.compaction_due())
+        segment.append(prepare_serving_frame(records_to_frame(RECORDS[:1])))
+        self.assertTrue(segment.compaction_due())
+
+    def test_compact_and_reload(self):
+        """Compacted batches are written without derived columns and reloaded in order"""
+        segment = DeltaSegment(self.dir, max_rows=10, max_seconds=3600)
+        self.assertIsNone(segment.compact())
+        segment.append(prepare_serving_frame(records_to_frame(RECORDS)))
+        path = segment.compact()
+        self.assertTrue(path.exists())
+        self.assertEqual(len(segment), 0)
+        self.assertEqual(list(self.dir.glob("*.tmp")), [])
+
+        parts = load_ingested(self.dir)
+        self.assertEqual(len(parts), 1)
+        self.assertNotIn("sentiment_norm", parts[0].columns)
+        reloaded = prepare_serving_frame(parts[0])
+        self.assertEqual(reloaded["motif"].tolist(), ["Réseau", "Facturation"])
+        self.assertEqual(reloaded["hour"].tolist(), [8, 9])
+
+class TestWordIndex(unittest.TestCase):
+    def setUp(self):
+        self.texts = ["plus de réseau réseau coupé", "facture trop chère", None, "réseau coupé encore", "merci"]
+
+    def test_matches_counter(self):
+        """Counts equal a Counter over the tokenized texts, for all rows or a selection"""
+        index = WordIndex()
+        index.add(self.texts)
+        expected = Counter(w for t in self.texts for w in tokenize(t))
+        self.assertEqual(dict(index.top_terms(n=100)), dict(expected))
+        selected = Counter(w for i in (0, 3) for w in tokenize(self.texts[i]))
+        self.assertEqual(dict(index.top_terms([0, 3], n=100)), dict(selected))
+        self.assertEqual(index.top_terms([0, 3], n=1), [("réseau", 3)])
+
+    def test_incremental_add(self):
+        """Adding batches gives the same index as indexing everything at once"""
+        full = WordIndex()
+        full.add(self.texts)
+        incremental = WordIndex()
+        incremental.add(self.texts[:2])
+        incremental.top_terms()
+        incremental.add(self.texts[2:])
+        self.assertEqual(len(incremental), len(self.texts))
+        self.assertEqual(incremental.top_terms([1, 3], n=100), full.top_terms([1, 3], n=100))
+
+if __name__ == "__main__":
+    unittest.main()
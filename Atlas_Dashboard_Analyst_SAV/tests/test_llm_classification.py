@@ -0,0 +1,68 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import json
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.llm_classification import build_response_format, classify_batch, new_run_stats
+from src.parse_llm_outputs import VALID_MOTIFS
+
+VALID = json.dumps({"motif": "Réseau", "sentiment": "négatif", "urgence": "faible", "risque_churn": "élevé"})
+
+class TestStructuredOutput(unittest.TestCase):
+    def _client(self, answers):
+        client = MagicMock()
+        answers = iter(answers)
+
+        def complete(**kwargs):
+            answer = next(answers)
+            if isinstance(answer, Exception):
+                raise answer
+            response = MagicMock()
+            response.choices[0].message.content = answer
+            return response
+
+        client.chat.complete.side_effect = complete
+        return client
+
+    def test_schema_built_from_valid_values(self):
+        """The JSON schema enums come from the VALID_* lists"""
+        fmt = build_response_format("json_schema")
+        schema = fmt["json_schema"]["schema"]
+        self.assertEqual(schema["properties"]["motif"]["enum"], VALID_MOTIFS)
+        self.assertEqual(build_response_format("json_object"), {"type": "json_object"})
+        self.assertIsNone(build_response_format("text"))
+
+    def test_only_invalid_items_are_reasked(self):
+        """Invalid answers are re-asked once with the previous answer; valid ones are not"""
+        client = self._client([VALID, "Je pense que c'est du réseau", '{"motif": "Météo"}', VALID, VALID])
+        stats = new_run_stats()
+
+        with patch("time.sleep"):
+            results = classify_batch(client, ["a", "b", "c"], batch_size=3, stats=stats)
+
+        self.assertEqual([r["raw_response"] for r in results], [VALID, VALID, VALID])
+        self.assertEqual(client.chat.complete.call_count, 5)
+        reask_messages = client.chat.complete.call_args_list[3].kwargs["messages"]
+        self.assertEqual(reask_messages[2]["content"], "Je pense que c'est du réseau")
+        self.assertEqual(stats, {"responses": 3, "api_errors": 0, "invalid_first_pass": 2, "reasked": 2, "still_invalid": 0})
+
+    def test_empty_answer_is_not_retried_as_api_error(self):
+        """An empty answer is asked again without an empty assistant message, not retried with backoff"""
+        client = self._client(["", ""])
+        stats = new_run_stats()
+
+        with patch("time.sleep"):
+            results = classify_batch(client, ["a"], stats=stats)
+
+        self.assertIsNone(results[0]["raw_response"])
+        self.assertEqual(client.chat.complete.call_count, 2)
+        reask_messages = client.chat.complete.call_args_list[1].kwargs["messages"]
+        self.assertNotIn("assistant", [m["role"] for m in reask_messages])
+        self.assertEqual(stats["still_invalid"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
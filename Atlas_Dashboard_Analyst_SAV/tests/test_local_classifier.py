@@ -0,0 +1,43 @@
+import unittest
+import json
+import sys
+import os
+
+import pandas as pd
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.local_classifier import train_local_classifier, label_confident
+from src.parse_llm_outputs import parse_llm_response
+
+class TestLocalClassifier(unittest.TestCase):
+    def setUp(self):
+        reseau = ["réseau coupé depuis ce matin", "plus de réseau mobile", "réseau coupé encore", "aucun réseau dans mon quartier"]
+        facture = ["facture trop élevée", "erreur sur ma facture", "facture prélevée deux fois", "ma facture a doublé"]
+        rows = []
+        for i in range(10):
+            for text in reseau:
+                rows.append({"text_clean": f"{text} {i}", "motif": "Réseau", "sentiment": "négatif", "urgence": "élevée", "risque_churn": "élevé"})
+            for text in facture:
+                rows.append({"text_clean": f"{text} {i}", "motif": "Facturation", "sentiment": "négatif", "urgence": "faible", "risque_churn": "faible"})
+        self.df = pd.DataFrame(rows)
+
+    def test_report_and_confident_labels(self):
+        """The holdout report covers each threshold and confident labels parse like LLM answers"""
+        clf, report = train_local_classifier(self.df, threshold=0.5)
+
+        self.assertEqual(report["n_eval"], 16)
+        thresholds = [row["threshold"] for row in report["thresholds"]]
+        self.assertIn(0.5, thresholds)
+        self.assertEqual(report["thresholds"][0]["accuracy_motif"], 1.0)
+
+        labels = label_confident(clf, ["réseau coupé depuis hier", "facture trop élevée ce mois"], threshold=0.5)
+        self.assertEqual(sorted(labels), [0, 1])
+        self.assertEqual(parse_llm_response(labels[0])["motif"], "Réseau")
+        self.assertEqual(json.loads(labels[1])["motif"], "Facturation")
+
+        self.assertEqual(label_confident(clf, ["réseau coupé"], threshold=1.01), {})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import src.mistral_client as mistral_client
+
+class TestMistralClientFactory(unittest.TestCase):
+    def tearDown(self):
+        mistral_client.close_mistral_client()
+
+    def test_missing_key_fails_on_use_not_import(self):
+        """Importing works without a key; asking for the client raises"""
+        with patch.object(mistral_client, "Mistral", MagicMock()), \
+             patch.object(mistral_client, "MISTRAL_API_KEY", ""):
+            with self.assertRaises(ValueError):
+                mistral_client.get_mistral_client()
+
+    def test_single_pooled_client(self):
+        """The client is built once and shares one pooled httpx transport"""
+        sdk = MagicMock()
+        with patch.object(mistral_client, "Mistral", sdk), \
+             patch.object(mistral_client, "MISTRAL_API_KEY", "key"):
+            first = mistral_client.get_mistral_client(pool_size=8)
+            second = mistral_client.get_mistral_client()
+
+        self.assertIs(first, second)
+        sdk.assert_called_once()
+        http_client = sdk.call_args.kwargs["client"]
+        self.assertEqual(http_client._transport._pool._max_connections, 8)
+        self.assertEqual(http_client.timeout.connect, mistral_client.LLM_CONNECT_TIMEOUT)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import json
+import sys
+import os
+import tempfile
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+# Add project root and shared tools to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'tools')))
+
+from mock_mistral_server import MockConfig, start_mock_server
+from src.llm_classification import SYSTEM_PROMPT, create_prompt
+from src.parse_llm_outputs import is_valid_llm_response, parse_llm_response
+
+def post(url, path, payload):
+    request = urllib.request.Request(url + path, data=json.dumps(payload).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"}, method="POST")
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read())
+
+class TestMockMistralServer(unittest.TestCase):
+    def setUp(self):
+        self.servers = []
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        self.tmp.cleanup()
+
+    def _start(self, **kwargs):
+        server, url = start_mock_server(config=MockConfig(seed=0, **kwargs))
+        self.servers.append(server)
+        return url
+
+    def _classify_payload(self, tweet):
+        return {"model": "mistral-medium-latest", "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": create_prompt(tweet)}]}
+
+    def test_canned_classification_and_embeddings(self):
+        """Classification prompts get valid labels; embeddings are deterministic"""
+        url = self._start()
+        body = post(url, "/v1/chat/completions", self._classify_payload("je vais résilier, réseau coupé"))
+        content = body["choices"][0]["message"]["content"]
+        self.assertTrue(is_valid_llm_response(content))
+        self.assertEqual(parse_llm_response(content)["risque_churn"], "élevé")
+
+        first = post(url, "/v1/embeddings", {"model": "mistral-embed", "input": ["a", "b"]})
+        second = post(url, "/v1/embeddings", {"model": "mistral-embed", "input": ["a"]})
+        self.assertEqual(len(first["data"]), 2)
+        self.assertEqual(len(first["data"][0]["embedding"]), 1024)
+        self.assertEqual(first["data"][0]["embedding"], second["data"][0]["embedding"])
+
+    def test_rate_limit(self):
+        """A 429 carries Retry-After"""
+        url = self._start(rate_limit_rate=1.0)
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            post(url, "/v1/embeddings", {"input": ["a"]})
+        self.assertEqual(ctx.exception.code, 429)
+        self.assertEqual(ctx.exception.headers["Retry-After"], "1")
+
+    def test_record_then_replay(self):
+        """Recorded exchanges are replayed by request hash"""
+        upstream = self._start()
+        recording = Path(self.tmp.name) / "recording.jsonl"
+        recorder = self._start(record_path=recording, upstream=upstream)
+        payload = self._classify_payload("facture trop élevée")
+        recorded = post(recorder, "/v1/chat/completions", payload)
+
+        replayer = self._start(replay_path=recording)
+        self.assertEqual(post(replayer, "/v1/chat/completions", payload), recorded)
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            post(replayer, "/v1/chat/completions", self._classify_payload("autre tweet"))
+        self.assertEqual(ctx.exception.code, 404)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.parse_llm_outputs import (
+    extract_json_from_text, normalize_value, parse_llm_response, parse_batch_responses,
+    VALID_SENTIMENTS, VALID_CHURN
+)
+
+class TestParseLLMOutputs(unittest.TestCase):
+    def test_extract_with_surrounding_text(self):
+        """JSON is found inside prose, code fences and after a JSON: prefix"""
+        body = '{"motif": "Réseau", "sentiment": "négatif"}'
+        self.assertEqual(extract_json_from_text(f"Voici:\n```json\n{body}\n```"), body)
+        self.assertEqual(extract_json_from_text(f"JSON: {body} Merci"), body)
+
+    def test_extract_nested_and_braces_in_strings(self):
+        """Nested objects and braces inside strings do not break the scan"""
+        text = 'x {"a": {"b": "}{"}, "c": "\\"{"} y {"d": 1}'
+        self.assertEqual(extract_json_from_text(text), '{"a": {"b": "}{"}, "c": "\\"{"}')
+
+    def test_extract_truncated_or_garbage(self):
+        """Truncated answers and long brace garbage return None"""
+        self.assertIsNone(extract_json_from_text('{"motif": "Réseau", "sentiment": "nég'))
+        self.assertIsNone(extract_json_from_text("{ {{ " * 5000))
+        self.assertIsNone(extract_json_from_text("pas de json"))
+
+    def test_normalize_accent_insensitive(self):
+        """Values match with or without accents, case or partial forms"""
+        self.assertEqual(normalize_value("Negatif", VALID_SENTIMENTS, "neutre"), "négatif")
+        self.assertEqual(normalize_value(" modere ", VALID_CHURN, "faible"), "modéré")
+        self.assertEqual(normalize_value("élevée", VALID_CHURN, "faible"), "élevé")
+        self.assertEqual(normalize_value("inconnu", VALID_CHURN, "faible"), "faible")
+        self.assertEqual(normalize_value("  ", VALID_CHURN, "faible"), "faible")
+
+    def test_batch_columnar_matches_rows(self):
+        """Columnar output holds the same values as the row output"""
+        raw = [
+            '{"motif": "facturation", "sentiment": "negatif", "urgence": "moyenne", "risque_churn": "eleve"}',
+            None,
+            '{"motif": "facturation", "sentiment": "negatif", "urgence": "moyenne", "risque_churn": "eleve"}',
+        ]
+        batch = [{"raw_response": r} for r in raw]
+        rows = parse_batch_responses(batch)
+        columns = parse_batch_responses(batch, columnar=True)
+
+        self.assertEqual(rows[0], parse_llm_response(raw[0]) | {"is_churn_risk": True})
+        for field in rows[0]:
+            self.assertEqual([r[field] for r in rows], list(columns[field]))
+        self.assertEqual(list(columns["motif"]), ["Facturation", "Autre", "Facturation"])
+
+if __name__ == "__main__":
+    unittest.main()
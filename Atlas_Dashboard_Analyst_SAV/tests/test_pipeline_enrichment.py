@@ -0,0 +1,82 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import json
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import src.pipeline_enrichment as pipeline_enrichment
+from src.utils_io import append_jsonl, read_jsonl
+
+class CrashAfter(BaseException):
+    pass
+
+class TestEnrichmentCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.checkpoint = Path(self.tmp.name) / "checkpoint.jsonl"
+        self.df = pd.DataFrame({"text_clean": [
+            "box en panne depuis hier",
+            "facture trop élevée ce mois",
+            "merci le support très réactif",
+            "réseau mobile coupé à paris",
+        ]})
+        self.answer = json.dumps({"motif": "Réseau", "sentiment": "négatif", "urgence": "faible", "risque_churn": "élevé"})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _client(self, crash_after=None):
+        client = MagicMock()
+        calls = {"n": 0}
+
+        def complete(**kwargs):
+            calls["n"] += 1
+            if crash_after is not None and calls["n"] > crash_after:
+                raise CrashAfter()
+            response = MagicMock()
+            response.choices[0].message.content = self.answer
+            return response
+
+        client.chat.complete.side_effect = complete
+        return client
+
+    def _enrich(self, client, df):
+        with patch.object(pipeline_enrichment, "initialize_mistral_client", return_value=client), \
+             patch.object(pipeline_enrichment, "LLM_BATCH_SIZE", 2), \
+             patch.object(pipeline_enrichment, "LLM_METRICS_PATH", Path(self.tmp.name) / "metrics.jsonl"), \
+             patch("time.sleep"):
+            return pipeline_enrichment.enrich_with_llm(df, checkpoint_path=self.checkpoint, dedup=False)
+
+    def test_crash_keeps_completed_batches_and_resume_finishes(self):
+        """A crash mid-run keeps finished batches; resume only classifies the rest"""
+        with self.assertRaises(CrashAfter):
+            self._enrich(self._client(crash_after=3), self.df)
+        self.assertEqual(len(read_jsonl(self.checkpoint)), 2)
+
+        client = self._client()
+        # Input order changed: resume must rely on tweet keys, not positions
+        result = self._enrich(client, self.df.iloc[::-1])
+
+        self.assertEqual(client.chat.complete.call_count, 2)
+        self.assertEqual(len(read_jsonl(self.checkpoint)), 4)
+        self.assertTrue((result["motif"] == "Réseau").all())
+        self.assertTrue(result["is_churn_risk"].all())
+        self.assertEqual(list(result.index), [3, 2, 1, 0])
+
+    def test_append_after_truncated_line(self):
+        """Records appended after a crash-truncated line are not glued to it"""
+        append_jsonl(self.checkpoint, [{"key": "a"}])
+        with open(self.checkpoint, "a", encoding="utf-8") as f:
+            f.write('{"key": "b", "mot')
+        append_jsonl(self.checkpoint, [{"key": "c"}, {"key": "d"}])
+        self.assertEqual([r["key"] for r in read_jsonl(self.checkpoint)], ["a", "c", "d"])
+
+if __name__ == "__main__":
+    unittest.main()
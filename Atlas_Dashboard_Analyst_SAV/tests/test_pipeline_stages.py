@@ -0,0 +1,109 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import json
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import src.llm_classification as llm_classification
+import src.pipeline_enrichment as pipeline_enrichment
+import src.pipeline_stages as pipeline_stages
+from src.profiling import enable_profiling, disable_profiling
+from src.serving import read_serving_snapshot, snapshot_path
+
+class TestPipelineStages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.input = self.dir / "tweets.csv"
+        pd.DataFrame({
+            "full_text": [
+                "Ma box est en panne depuis trois jours @free https://t.co/x",
+                "Je vais résilier mon abonnement, la facture est trop élevée",
+                "RT merci pour la réponse",
+            ],
+            "screen_name": ["alice", "bob", "carol"],
+            "created_at": ["2024-01-01 11:00", "2024-01-01 10:00", "2024-01-02 09:00"],
+        }).to_csv(self.input, index=False)
+        self.output = self.dir / "out.parquet"
+        self.client = MagicMock()
+        self.client.chat.complete.return_value.choices[0].message.content = json.dumps(
+            {"motif": "Technique", "sentiment": "négatif", "urgence": "moyenne", "risque_churn": "faible"})
+
+    def tearDown(self):
+        disable_profiling()
+        self.tmp.cleanup()
+
+    def _run(self, **kwargs):
+        profiler = enable_profiling(trace_memory=False)
+        with patch.object(pipeline_stages, "INTERIM_DIR", self.dir / "interim"), \
+             patch.object(pipeline_stages, "PROCESSED_DIR", self.dir), \
+             patch.object(pipeline_enrichment, "initialize_mistral_client", return_value=self.client), \
+             patch.object(pipeline_enrichment, "LLM_METRICS_PATH", self.dir / "metrics.jsonl"), \
+             patch("time.sleep"):
+            df = pipeline_stages.run_stages(self.input, self.output, checkpoint_path=self.dir / "ck.jsonl", **kwargs)
+        cached = {r["stage"]: r.get("cached", False) for r in profiler.report()["stages"] if "/" not in r["stage"]}
+        return df, cached
+
+    def test_rerun_reuses_artifacts(self):
+        """A second run reads every stage from data/interim"""
+        df, cached = self._run()
+        self.assertEqual(len(df), 2)
+        self.assertEqual(set(df["motif"]), {"Technique"})
+        self.assertFalse(any(cached.values()))
+        self.assertEqual(len(list((self.dir / "interim").glob("*.parquet"))), 8)
+        calls = self.client.chat.complete.call_count
+
+        _, cached = self._run()
+        self.assertTrue(all(v for k, v in cached.items() if k != "finalize"))
+        self.assertEqual(self.client.chat.complete.call_count, calls)
+
+    def test_prompt_change_reclassifies(self):
+        """A new system prompt re-classifies every tweet instead of reusing the checkpoint log"""
+        self._run()
+        calls = self.client.chat.complete.call_count
+        with patch.object(llm_classification, "SYSTEM_PROMPT", "Nouveau prompt"):
+            _, cached = self._run()
+        self.assertFalse(cached["classify"])
+        self.assertEqual(self.client.chat.complete.call_count, 2 * calls)
+
+        # Same configuration again: the log is reused without calling the LLM
+        with patch.object(llm_classification, "SYSTEM_PROMPT", "Nouveau prompt"):
+            self._run(use_cache=False)
+        self.assertEqual(self.client.chat.complete.call_count, 2 * calls)
+
+    def test_finalize_writes_serving_snapshot(self):
+        """finalize writes the API serving snapshot next to the parquet output, with the same row order"""
+        df, _ = self._run()
+        served = read_serving_snapshot(snapshot_path(self.output), source=self.output)
+        self.assertIsNotNone(served)
+        snapshot, words, search = served
+        self.assertEqual(snapshot["tweet_id"].tolist(), pd.read_parquet(self.output)["tweet_id"].tolist())
+        self.assertEqual(snapshot["tweet_id"].tolist(), df["tweet_id"].tolist())
+        self.assertTrue(snapshot["created_at"].is_monotonic_increasing)
+        self.assertNotIn("raw_llm_response", snapshot.columns)
+        self.assertEqual(len(words), len(snapshot))
+        self.assertEqual(len(search), len(snapshot))
+
+    def test_from_and_to_stage(self):
+        """from_stage recomputes only downstream stages; to_stage stops early"""
+        self._run()
+        _, cached = self._run(from_stage="parse")
+        self.assertTrue(cached["translate"] and cached["classify"])
+        self.assertFalse(cached["parse"])
+
+        self.output.unlink()
+        df, cached = self._run(to_stage="translate")
+        self.assertIn("text_clean", df.columns)
+        self.assertNotIn("text_stripped", df.columns)
+        self.assertNotIn("classify", cached)
+        self.assertFalse(self.output.exists())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import json
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import src.pipeline_enrichment as pipeline_enrichment
+import src.pipeline_streaming as pipeline_streaming
+from src.serving import read_serving_snapshot, snapshot_path
+
+class TestStreamingPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.input = self.dir / "tweets.csv"
+        texts = [
+            "Ma box est en panne depuis trois jours",
+            "La facture de ce mois est beaucoup trop élevée",
+            "RT la box est en panne",
+            "Ma box est en panne depuis trois jours",      # doublon d'un bloc précédent
+            "Le réseau mobile est coupé dans tout le quartier",
+            "Réponse du support",
+            "Je vais résilier mon abonnement très bientôt",
+        ]
+        pd.DataFrame({
+            "id_str": [str(1000 + i) for i in range(len(texts))],
+            "full_text": texts,
+            "screen_name": ["alice", "bob", "carol", "dave", "erin", "free_assistance", "gus"],
+            "created_at": [f"2024-01-0{len(texts) - i} 10:00" for i in range(len(texts))],
+            "ignored": range(len(texts)),
+        }).to_csv(self.input, index=False)
+        self.output = self.dir / "out.parquet"
+        self.checkpoint = self.dir / "ck.jsonl"
+        self.client = MagicMock()
+        self.client.chat.complete.return_value.choices[0].message.content = json.dumps(
+            {"motif": "Réseau", "sentiment": "négatif", "urgence": "faible", "risque_churn": "élevé"})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _run(self):
+        with patch.object(pipeline_streaming, "INTERIM_DIR", self.dir / "interim"), \
+             patch.object(pipeline_enrichment, "initialize_mistral_client", return_value=self.client), \
+             patch.object(pipeline_enrichment, "LLM_METRICS_PATH", self.dir / "metrics.jsonl"), \
+             patch("time.sleep"):
+            return pipeline_streaming.run_streaming_pipeline(
+                self.input, self.output, checkpoint_path=self.checkpoint, chunksize=2
+            )
+
+    def test_chunks_dedup_and_final_sort(self):
+        """Chunks are filtered and deduplicated across chunks; the output is date-sorted with its snapshot"""
+        counts = self._run()
+        self.assertEqual(counts, {"rows_in": 7, "rows_out": 4, "chunks": 4})
+
+        df = pq.read_table(self.output).to_pandas()
+        self.assertEqual(df["id_str"].tolist(), ["1006", "1004", "1001", "1000"])
+        served = read_serving_snapshot(snapshot_path(self.output), source=self.output)
+        self.assertIsNotNone(served)
+        self.assertEqual(served[0]["tweet_id"].tolist(), df["tweet_id"].tolist())
+        self.assertNotIn("ignored", df.columns)
+        self.assertTrue(df["is_churn_risk"].all())
+        self.assertFalse(self.output.with_name("out.parquet.tmp").exists())
+
+    def test_rerun_reuses_journal(self):
+        """A second run reads responses from the journal instead of calling the LLM"""
+        self._run()
+        calls = self.client.chat.complete.call_count
+        counts = self._run()
+        self.assertEqual(counts["rows_out"], 4)
+        self.assertEqual(self.client.chat.complete.call_count, calls)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+import sys
+import os
+
+import pandas as pd
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.preprocessing import basic_filter, clean_text
+
+class TestBasicFilter(unittest.TestCase):
+    def test_clean_text(self):
+        """URLs and mentions removed, hashtags kept as words, whitespace collapsed"""
+        text = "  @Free ma #Box  plante  https://t.co/x #réseau @andré "
+        self.assertEqual(clean_text(text), "ma box plante réseau")
+        self.assertEqual(clean_text("#http://t.co"), "#")
+
+    def test_filter_and_clean_column(self):
+        """RT and official accounts dropped, cleaned text matches clean_text row by row"""
+        df = pd.DataFrame({
+            "full_text": ["RT @free: promo", "Panne #Fibre", "Panne #Fibre", "merci", None],
+            "screen_name": ["bob", "alice", "carol", "Freebox", "dave"],
+        })
+
+        filtered = basic_filter(df)
+
+        self.assertEqual(list(filtered.index), [1, 2, 4])
+        self.assertEqual(list(filtered["full_text_clean"]), [clean_text(t) for t in df["full_text"][[1, 2, 4]]])
+        self.assertNotIn("full_text_clean", df.columns)
+
+if __name__ == "__main__":
+    unittest.main()
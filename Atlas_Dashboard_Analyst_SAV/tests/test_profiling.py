@@ -0,0 +1,65 @@
+import unittest
+import json
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.profiling import enable_profiling, disable_profiling, profile_stage, substep
+
+class TestProfiling(unittest.TestCase):
+    def tearDown(self):
+        disable_profiling()
+
+    def test_nested_stages_and_substeps(self):
+        """Nested stages are named parent/child; substeps accumulate in the open stage"""
+        profiler = enable_profiling(trace_memory=True)
+        with profile_stage("clean", rows_in=10) as stage:
+            for _ in range(3):
+                with substep("translation"):
+                    pass
+            with profile_stage("lemmatize") as inner:
+                inner["rows_out"] = 8
+            blob = [0] * 200000
+            stage["rows_out"] = 9
+            del blob
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "run_profile.json"
+            profiler.write_report(path)
+            report = json.loads(path.read_text(encoding="utf-8"))
+
+        clean, lemmatize = report["stages"]
+        self.assertEqual((clean["stage"], clean["rows_in"], clean["rows_out"]), ("clean", 10, 9))
+        self.assertEqual(lemmatize["stage"], "clean/lemmatize")
+        self.assertEqual(clean["substeps"]["translation"]["calls"], 3)
+        self.assertGreaterEqual(clean["peak_mem_mb"], 1.0)
+        self.assertIn("clean/lemmatize", profiler.summary_table())
+
+    def test_same_name_is_not_nested(self):
+        """A stage reopened under the same name stays one stage, without memory tracing by default"""
+        profiler = enable_profiling()
+        with profile_stage("classify", rows_in=4) as stage:
+            with profile_stage("classify", rows_in=2) as inner:
+                inner["rows_out"] = 2
+            with profile_stage("llm"):
+                pass
+            stage["rows_out"] = 4
+        report = profiler.report()
+        self.assertEqual([s["stage"] for s in report["stages"]], ["classify", "classify/llm"])
+        self.assertEqual((report["stages"][0]["rows_in"], report["stages"][0]["rows_out"]), (4, 4))
+        self.assertNotIn("peak_mem_mb", report["stages"][0])
+
+    def test_disabled_is_noop(self):
+        """Without an active profiler, stages yield a throwaway dict"""
+        with profile_stage("load") as stage:
+            stage["rows_out"] = 1
+            with substep("x"):
+                pass
+        self.assertIsNone(disable_profiling())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.search_index import SearchIndex, parse_query, search_tokens
+
+TEXTS = pd.Series([
+    "fibre coupée depuis hier à lyon",
+    "la fibre est coupee encore",
+    "coupure de fibre ce matin",
+    "remboursement demandé au service client",
+    "je veux être remboursé",
+    "merci pour la réactivité",
+])
+LEMMAS = ["fibre couper hier lyon", "fibre couper", "coupure fibre matin", "remboursement demander service client",
+          "vouloir rembourser", "merci réactivité"]
+
+def build_index():
+    index = SearchIndex()
+    index.add(TEXTS[:3], LEMMAS[:3])
+    index.add(TEXTS[3:], LEMMAS[3:])
+    return index
+
+class TestQueries(unittest.TestCase):
+    def test_tokens_are_folded(self):
+        """Indexed words are lowercased and stripped of accents"""
+        self.assertEqual(search_tokens("Fibre COUPÉE à Lyon"), ["fibre", "coupee", "a", "lyon"])
+
+    def test_parse_query(self):
+        """Quoted phrases form one clause, other words one clause each"""
+        self.assertEqual(parse_query('"Fibre coupée" rembours* lyon'), [["fibre", "coupee"], ["rembours*"], ["lyon"]])
+        self.assertEqual(parse_query('"" *'), [])
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = build_index()
+
+    def rows(self, query, rows=None):
+        return self.index.search(query, TEXTS, rows=rows)[0].tolist()
+
+    def test_words_are_all_required(self):
+        """Every word of the query must match, with or without accents"""
+        self.assertEqual(sorted(self.rows("fibre coupée")), [0, 1])
+        self.assertEqual(self.rows("fibre lyon"), [0])
+        self.assertEqual(self.rows("inconnu"), [])
+
+    def test_phrase(self):
+        """A quoted phrase only matches consecutive words"""
+        self.assertEqual(sorted(self.rows('"fibre coupee"')), [0])
+        self.assertEqual(self.rows('"de fibre"'), [2])
+        self.assertEqual(self.rows('"coupee fibre"'), [])
+
+    def test_prefix_and_lemmas(self):
+        """Prefixes expand to indexed words, lemmas match inflected forms"""
+        self.assertEqual(sorted(self.rows("rembours*")), [3, 4])
+        self.assertEqual(sorted(self.rows("coup*")), [0, 1, 2])
+        self.assertEqual(self.rows('"fibre coup*"'), [0])
+        self.assertEqual(sorted(self.rows("couper")), [0, 1])
+
+    def test_ranking_and_filter(self):
+        """Rows are ranked by score, restricted to the filtered rows"""
+        found, scores = self.index.search("fibre", TEXTS)
+        self.assertTrue((scores[:-1] >= scores[1:]).all())
+        self.assertEqual(self.rows("fibre", rows=[0, 1, 3]), [r for r in self.rows("fibre") if r != 2])
+        self.assertEqual(self.rows("merci", rows=[0, 1]), [])
+
+    def test_ties_most_recent_first(self):
+        """Equal scores are ordered by created_at, not by row position"""
+        index = SearchIndex()
+        texts = pd.Series(["panne fibre", "panne fibre", "panne fibre"])
+        index.add(texts)
+        created_at = pd.Series(pd.to_datetime(["2024-03-02", "2024-03-01", None], utc=True))
+        found, scores = index.search("panne", texts, created_at=created_at)
+        self.assertEqual(len(set(scores.tolist())), 1)
+        self.assertEqual(found.tolist(), [0, 1, 2])
+        self.assertEqual(index.search("panne", texts, rows=[1, 2], created_at=created_at)[0].tolist(), [1, 2])
+
+    def test_incremental_add_matches_rebuild(self):
+        """Adding batches gives the same postings as indexing all rows at once"""
+        full = SearchIndex()
+        full.add(TEXTS, LEMMAS)
+        for query in ["fibre", "coup*", '"fibre coupee"', "service"]:
+            a, sa = self.index.search(query, TEXTS)
+            b, sb = full.search(query, TEXTS)
+            self.assertEqual(a.tolist(), b.tolist())
+            self.assertTrue((abs(sa - sb) < 1e-9).all())
+
+    def test_save_load(self):
+        """A saved index is reloaded with the same results and metadata"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "search.arrow"
+            self.index.save(path, metadata={"version": 1})
+            loaded, metadata = SearchIndex.load(path)
+            self.assertEqual(metadata, {"version": 1})
+            self.assertEqual(len(loaded), len(TEXTS))
+            for query in ["fibre", "rembours*", '"de fibre"']:
+                self.assertEqual(loaded.search(query, TEXTS)[0].tolist(), self.rows(query))
+            loaded.add(["fibre rétablie"])
+            self.assertIn(6, loaded.search("fibre", pd.concat([TEXTS, pd.Series(["fibre rétablie"])], ignore_index=True))[0])
+
+if __name__ == "__main__":
+    unittest.main()
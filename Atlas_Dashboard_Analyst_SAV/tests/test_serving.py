@@ -0,0 +1,87 @@
+import unittest
+import sys
+import os
+import tempfile
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import src.serving as serving
+from src.serving import append_rows, prepare_serving_frame, read_serving_snapshot, snapshot_path, write_serving_snapshot
+from src.utils import save_dataframe
+
+def make_tweets():
+    return pd.DataFrame({
+        "tweet_id": ["1", "2", "3", "4"],
+        "full_text": ["Plus de réseau à Lyon", "Facture prélevée deux fois", "Merci pour la fibre", None],
+        "created_at": ["2024-01-01T23:30:00+01:00", "2024-01-02T10:00:00Z", "2024-02-15T08:00:00Z", "pas une date"],
+        "Motif": ["Réseau", "Facturation", None, "Réseau"],
+        "sentiment": ["négatif", "Neutre", "positive", "négatif"],
+        "urgence": ["élevée", "faible", "faible", "élevée"],
+        "risque_churn": ["élevé", "faible", None, "faible"],
+        "raw_llm_response": ["{}", "{}", "{}", "{}"],
+    })
+
+class TestPrepareServingFrame(unittest.TestCase):
+    def test_derived_columns(self):
+        """Dates are converted to UTC, invalid ones dropped, labels normalized"""
+        df = prepare_serving_frame(make_tweets())
+        self.assertEqual(len(df), 3)
+        self.assertEqual(df["date"].tolist(), [date(2023, 12, 31) + pd.Timedelta(days=1), date(2024, 1, 2), date(2024, 2, 15)])
+        self.assertEqual(df["hour"].tolist(), [22, 10, 8])
+        self.assertEqual(df["month"].astype(str).tolist(), ["2024-01", "2024-01", "2024-02"])
+        self.assertEqual(df["sentiment_norm"].astype(str).tolist(), ["Négatif", "Neutre", "Positif"])
+        self.assertEqual(df["is_churn"].tolist(), [True, False, False])
+        self.assertIsInstance(df["motif"].dtype, pd.CategoricalDtype)
+
+    def test_append_rows_extends_categories(self):
+        """Appended rows keep categorical columns, new values become categories"""
+        df = prepare_serving_frame(make_tweets())
+        rows = prepare_serving_frame(make_tweets().assign(Motif="Box", tweet_id=["5", "6", "7", "8"]))
+        merged = append_rows(df, rows)
+        self.assertIsInstance(merged["motif"].dtype, pd.CategoricalDtype)
+        self.assertEqual(list(merged["motif"].cat.categories), ["Box", "Facturation", "Réseau"])
+        self.assertEqual(merged["motif"].astype(object).tolist()[:3], df["motif"].astype(object).tolist())
+        self.assertEqual(merged.index.tolist(), list(range(6)))
+
+class TestServingSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = Path(self.tmp.name) / "tweets_enriched.parquet"
+        save_dataframe(make_tweets(), self.source, sort_by="created_at")
+        self.path = snapshot_path(self.source)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        """The snapshot reads back as the prepared frame, with its word index"""
+        expected = prepare_serving_frame(pd.read_parquet(self.source).drop(columns=["raw_llm_response"]))
+        write_serving_snapshot(pd.read_parquet(self.source), self.path, source=self.source)
+        df, words, search = read_serving_snapshot(self.path, source=self.source)
+        pd.testing.assert_frame_equal(df, expected)
+        self.assertEqual(len(words), len(df))
+        self.assertEqual(dict(words.top_terms([1])), {"facture": 1, "prélevée": 1, "deux": 1, "fois": 1})
+        self.assertEqual(search.search("prelevee", df["full_text"])[0].tolist(), [1])
+
+    def test_stale_snapshot_ignored(self):
+        """A snapshot older than its parquet source, or of another version, is not used"""
+        write_serving_snapshot(pd.read_parquet(self.source), self.path, source=self.source)
+        save_dataframe(make_tweets().iloc[:2], self.source, sort_by="created_at")
+        self.assertIsNone(read_serving_snapshot(self.path, source=self.source))
+
+        write_serving_snapshot(pd.read_parquet(self.source), self.path, source=self.source)
+        self.assertIsNotNone(read_serving_snapshot(self.path, source=self.source))
+        original = serving.SNAPSHOT_VERSION
+        serving.SNAPSHOT_VERSION = original + 1
+        try:
+            self.assertIsNone(read_serving_snapshot(self.path, source=self.source))
+        finally:
+            serving.SNAPSHOT_VERSION = original
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.serving import NO_TOPIC
+from src.topics import TopicModel, assign_topics, topic_texts, write_topics
+
+THEMES = [
+    "fibre coupure raccordement technicien optique",
+    "facture prélèvement remboursement montant paiement",
+    "décodeur télévision chaîne replay image",
+]
+
+def make_tweets(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    theme = rng.integers(0, len(THEMES), n)
+    texts = [" ".join(rng.choice(THEMES[t].split(), 3, replace=False)) + " encore problème" for t in theme]
+    sentiment = np.where(np.arange(n) % 5 == 0, "positif", "négatif")
+    return pd.DataFrame({"text_clean": texts, "text_preproc": texts, "sentiment": sentiment}), theme
+
+class TestTopics(unittest.TestCase):
+    def test_topic_texts(self):
+        """Lemmas are clustered when available, text_clean otherwise"""
+        df = pd.DataFrame({"text_clean": ["la fibre est coupée", "facture"], "text_preproc": ["fibre couper", ""]})
+        self.assertEqual(topic_texts(df).tolist(), ["fibre couper", "facture"])
+
+    def test_themes_are_separated(self):
+        """Negative tweets of each theme share a topic, other tweets have none"""
+        df, theme = make_tweets()
+        model = TopicModel(n_topics=3, batch_size=64)
+        out = assign_topics(df, model, update=True)
+        negative = (df["sentiment"] == "négatif").to_numpy()
+        self.assertTrue((out.loc[~negative, "topic_id"] == NO_TOPIC).all())
+        pairs = set(zip(theme[negative], out.loc[negative, "topic_id"]))
+        self.assertEqual(len(pairs), 3)
+        self.assertEqual(len({t for _, t in pairs}), 3)
+        self.assertEqual(int(model.sizes.sum()), int(negative.sum()))
+
+        terms = model.top_terms(n=5)
+        for theme_id, topic in pairs:
+            self.assertEqual(set(terms[topic]), set(THEMES[theme_id].split()))
+
+    def test_incremental_partitions(self):
+        """A new partition updates the model without changing existing topics"""
+        df, theme = make_tweets(seed=0)
+        model = TopicModel(n_topics=3, batch_size=64)
+        first = assign_topics(df, model, update=True)["topic_id"].to_numpy()
+        new, _ = make_tweets(seed=1)
+        assign_topics(new, model, update=True)
+        self.assertEqual(model.n_docs, int((df["sentiment"] == "négatif").sum() + (new["sentiment"] == "négatif").sum()))
+        self.assertTrue((assign_topics(df, model)["topic_id"].to_numpy() == first).all())
+
+    def test_not_enough_tweets(self):
+        """Fewer texts than topics leave the model unfitted and every tweet without topic"""
+        df, _ = make_tweets(n=5)
+        model = TopicModel(n_topics=10)
+        out = assign_topics(df, model, update=True)
+        self.assertFalse(model.fitted)
+        self.assertTrue((out["topic_id"] == NO_TOPIC).all())
+        self.assertTrue((assign_topics(df, None)["topic_id"] == NO_TOPIC).all())
+
+    def test_save_and_write_topics(self):
+        """The saved model predicts the same topics, keywords are written as JSON"""
+        df, _ = make_tweets()
+        model = TopicModel(n_topics=3, batch_size=64)
+        out = assign_topics(df, model, update=True)
+        with tempfile.TemporaryDirectory() as tmp:
+            model.save(Path(tmp) / "model.joblib")
+            loaded = TopicModel.load(Path(tmp) / "model.joblib")
+            self.assertTrue((assign_topics(df, loaded)["topic_id"] == out["topic_id"]).all())
+            write_topics(model, Path(tmp) / "topics.json")
+            topics = pd.read_json(Path(tmp) / "topics.json")["topics"].tolist()
+            self.assertEqual([t["topic_id"] for t in topics], [0, 1, 2])
+            self.assertEqual(sum(t["size"] for t in topics), int((out["topic_id"] >= 0).sum()))
+
+if __name__ == "__main__":
+    unittest.main()
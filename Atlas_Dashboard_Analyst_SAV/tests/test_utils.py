@@ -0,0 +1,125 @@
+import unittest
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from unittest.mock import patch
+
+import pyarrow.parquet as pq
+
+import src.utils as utils
+from src.utils import sniff_encoding, load_csv_with_encoding, save_dataframe, load_dataframe
+
+class TestCsvLoading(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.df = pd.DataFrame({
+            "id_str": ["1700000000000000001", "1700000000000000002", "1700000000000000003"],
+            "screen_name": ["élodie", "bob", "zoé"],
+            "full_text": ["réseau coupé", "facture élevée", "merci à vous"],
+            "unused": [1, 2, 3],
+        })
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, encoding, name="tweets.csv"):
+        path = self.dir / name
+        self.df.to_csv(path, index=False, encoding=encoding)
+        return path
+
+    def test_sniff_encoding(self):
+        """BOM, UTF-8 and cp1252 files are told apart from a sample"""
+        self.assertEqual(sniff_encoding(self._write("utf-8-sig", "bom.csv")), "utf-8-sig")
+        self.assertEqual(sniff_encoding(self._write("utf-8", "utf8.csv")), "utf-8")
+        self.assertEqual(sniff_encoding(self._write("cp1252", "cp.csv")), "cp1252")
+
+        # A multi-byte character cut by the sample boundary is still UTF-8
+        path = self.dir / "cut.csv"
+        path.write_bytes(("a" * 9 + "é").encode("utf-8"))
+        self.assertEqual(sniff_encoding(path, sample_size=10), "utf-8")
+
+    def test_pruned_columns_and_string_ids(self):
+        """Only requested columns are read and long ids keep every digit"""
+        df = load_csv_with_encoding(self._write("cp1252"), columns=["id_str", "screen_name"])
+        self.assertEqual(sorted(df.columns), ["full_text", "id_str", "screen_name"])
+        self.assertEqual(df["id_str"][0], "1700000000000000001")
+        self.assertEqual(df["screen_name"][2], "zoé")
+
+    def test_chunked_iterator(self):
+        """chunksize returns an iterator of bounded DataFrames"""
+        chunks = list(load_csv_with_encoding(self._write("utf-8"), columns=[], chunksize=2))
+        self.assertEqual([len(c) for c in chunks], [2, 1])
+        self.assertEqual(list(chunks[0].columns), ["full_text"])
+
+    def test_chunked_encoding_fallback_mid_stream(self):
+        """A cp1252 file whose head is ASCII is re-read as cp1252 without repeating rows"""
+        path = self.dir / "late_accents.csv"
+        texts = [f"bonjour {i}" for i in range(100000)] + ["café résilié"]
+        pd.DataFrame({"full_text": texts}).to_csv(path, index=False, encoding="cp1252")
+        self.assertEqual(sniff_encoding(path), "utf-8")
+        chunks = list(load_csv_with_encoding(path, columns=[], chunksize=4000))
+        self.assertEqual(pd.concat(chunks)["full_text"].tolist(), texts)
+
+class TestParquetLayout(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "tweets.parquet"
+        days = pd.date_range("2024-01-01", periods=10, freq="D")
+        self.df = pd.DataFrame({
+            "created_at": [d.strftime("%a %b %d %H:%M:%S +0000 %Y") for d in days[::-1]],
+            "motif": ["Réseau", "Facturation"] * 5,
+            "text_clean": [f"tweet {i}" for i in range(10)],
+        })
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sorted_typed_row_groups(self):
+        """Output is sorted by date by default, typed as timestamp, split in row groups with stats"""
+        with patch.object(utils, "PARQUET_ROW_GROUP_SIZE", 3):
+            save_dataframe(self.df, self.path)
+
+        meta = pq.ParquetFile(self.path).metadata
+        self.assertEqual(meta.num_row_groups, 4)
+        column = meta.schema.names.index("created_at")
+        stats = [meta.row_group(i).column(column).statistics for i in range(meta.num_row_groups)]
+        self.assertTrue(all(a.max <= b.min for a, b in zip(stats, stats[1:])))
+        motif = meta.schema.names.index("motif")
+        self.assertIn("RLE_DICTIONARY", meta.row_group(0).column(motif).encodings)
+
+    def test_date_range_pushdown_and_legacy_fallback(self):
+        """Date ranges are pushed down on typed files and filtered in pandas on old ones"""
+        with patch.object(utils, "PARQUET_ROW_GROUP_SIZE", 3):
+            save_dataframe(self.df, self.path, sort_by="created_at")
+        df = load_dataframe(self.path, columns=["motif"], date_range=("2024-01-03", "2024-01-05"))
+        self.assertEqual(len(df), 3)
+        self.assertEqual(list(df.columns), ["motif"])
+
+        legacy = Path(self.tmp.name) / "legacy.parquet"
+        self.df.to_parquet(legacy, index=False)
+        df = load_dataframe(legacy, date_range=(None, "2024-01-02"))
+        self.assertEqual(len(df), 2)
+
+    def test_tz_aware_date_range(self):
+        """Bounds with a time zone select the same days on typed and legacy files"""
+        with patch.object(utils, "PARQUET_ROW_GROUP_SIZE", 3):
+            save_dataframe(self.df, self.path, sort_by="created_at")
+        legacy = Path(self.tmp.name) / "legacy.parquet"
+        self.df.to_parquet(legacy, index=False)
+        # Days in New York: 2024-01-03 05:00 UTC to 2024-01-06 05:00 UTC
+        date_range = (pd.Timestamp("2024-01-03", tz="America/New_York"), pd.Timestamp("2024-01-05", tz="America/New_York"))
+        for path in (self.path, legacy):
+            df = load_dataframe(path, date_range=date_range)
+            days = sorted(d.day for d in utils.to_utc_datetime(df["created_at"]))
+            self.assertEqual(days, [4, 5, 6], path.name)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -99,7 +99,8 @@ async def startup():
         try:
             services.rag_service = RAGService(
                 mistral_api_key=MISTRAL_API_KEY,
-                chroma_persist_dir=str(CHROMA_DB_DIR)
+                chroma_persist_dir=str(CHROMA_DB_DIR),
+                api_url=MISTRAL_API_URL
             )
             
             # Charger les documents si la base est vide
@@ -10,8 +10,9 @@ logger = logging.getLogger(__name__)
 
 class RAGService:
     
-    def __init__(self, mistral_api_key: str, chroma_persist_dir: str = "./chroma_db", collection_name: str = "freeda_knowledge"):
+    def __init__(self, mistral_api_key: str, chroma_persist_dir: str = "./chroma_db", collection_name: str = "freeda_knowledge", api_url: str = "https://api.mistral.ai"):
         self.mistral_api_key = mistral_api_key
+        self.api_url = api_url.rstrip("/")
         self.collection_name = collection_name
         
         self.chroma_client = chromadb.Client(Settings(persist_directory=chroma_persist_dir, anonymized_telemetry=False))
@@ -24,7 +25,7 @@ class RAGService:
             logger.info(f"Collection '{collection_name}' créée")
     
     async def get_embedding(self, text: str) -> List[float]:
-        url = "https://api.mistral.ai/v1/embeddings"
+        url = f"{self.api_url}/v1/embeddings"
         headers = {"Authorization": f"Bearer {self.mistral_api_key}", "Content-Type": "application/json"}
         payload = {"model": "mistral-embed", "input": [text]}
         
@@ -0,0 +1,100 @@
+"""
+Benchmark hors ligne de MistralClient et RAGService contre le serveur
+Mistral simulé (tools/mock_mistral_server.py à la racine du dépôt).
+
+Usage:
+    python scripts/bench_mistral_mock.py --requests 200 --latency-median-ms 300 --rate-limit-rate 0.05
+    python scripts/bench_mistral_mock.py --url http://127.0.0.1:8089   # serveur déjà lancé (ex: mode replay)
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# scripts/ -> backend/ ; backend/ -> Freeda/ -> racine du dépôt
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "tools"))
+
+from app.services.ai.mistral import MistralClient
+from mock_mistral_server import MockConfig, start_mock_server
+
+
+def _percentiles(latencies):
+    ordered = sorted(latencies)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    return f"p50={pick(0.5):.0f}ms p95={pick(0.95):.0f}ms p99={pick(0.99):.0f}ms"
+
+
+async def _timed(coro_factory, n):
+    latencies, failures = [], 0
+
+    async def one(i):
+        nonlocal failures
+        start = time.perf_counter()
+        try:
+            await coro_factory(i)
+        except Exception:
+            failures += 1
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n)))
+    return time.perf_counter() - start, latencies, failures
+
+
+async def run(url: str, n: int, concurrency: int):
+    client = MistralClient(api_key="mock", api_url=url, max_concurrency=concurrency, backoff_base=0.1)
+    messages = lambda i: [{"role": "system", "content": "Tu es Freeda"}, {"role": "user", "content": f"Ma box ne marche plus ({i})"}]
+
+    elapsed, latencies, failures = await _timed(lambda i: client.chat(messages(i)), n)
+    print(f"MistralClient.chat        {n / elapsed:7.1f} req/s  {_percentiles(latencies)}  échecs={failures}")
+
+    elapsed, latencies, failures = await _timed(lambda i: client.get_embedding(f"question {i}"), n)
+    print(f"MistralClient.embedding   {n / elapsed:7.1f} req/s  {_percentiles(latencies)}  échecs={failures}")
+    await client.close()
+
+    try:
+        from app.services.ai.rag import RAGService
+    except ImportError as e:
+        print(f"RAGService ignoré ({e})")
+        return
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        rag = RAGService(mistral_api_key="mock", chroma_persist_dir=tmp, collection_name="bench", api_url=url)
+        docs = [{"question": f"Question {i}", "answer": f"Réponse {i}"} for i in range(n)]
+        start = time.perf_counter()
+        await rag.add_documents(docs)
+        print(f"RAGService.add_documents  {n / (time.perf_counter() - start):7.1f} docs/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Mistral hors ligne")
+    parser.add_argument("--url", default=None, help="Serveur simulé existant (sinon démarré en interne)")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=3)
+    parser.add_argument("--latency-median-ms", type=float, default=200.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        config = MockConfig(
+            latency_median_ms=args.latency_median_ms,
+            error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate,
+            seed=0,
+        )
+        server, url = start_mock_server(config=config)
+    try:
+        asyncio.run(run(url, args.requests, args.concurrency))
+    finally:
+        if server is not None:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -14,7 +14,7 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from app.services.ai.scraper import FreeFAQScraper
 from app.services.ai.rag import RAGService
-from app.core.config import MISTRAL_API_KEY, CHROMA_DB_DIR, DATA_DIR
+from app.core.config import MISTRAL_API_KEY, MISTRAL_API_URL, CHROMA_DB_DIR, DATA_DIR
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -49,7 +49,8 @@ async def initialize_knowledge_base():
         logger.info("\n🔧 Étape 2/3 : Initialisation du service RAG...")
         rag_service = RAGService(
             mistral_api_key=MISTRAL_API_KEY,
-            chroma_persist_dir=str(CHROMA_DB_DIR)
+            chroma_persist_dir=str(CHROMA_DB_DIR),
+            api_url=MISTRAL_API_URL
         )
         
         # Étape 3 : Charger les documents dans ChromaDB
@@ -1,14 +1,14 @@
 import asyncio
 from pathlib import Path
 from app.core.container import services
-from app.core.config import MISTRAL_API_KEY, CHROMA_DB_DIR
+from app.core.config import MISTRAL_API_KEY, MISTRAL_API_URL, CHROMA_DB_DIR
 
 async def main():
     rag = services.rag_service
     if not rag:
         # Initialise le service si ce n'est pas déjà fait (cas du script exécuté hors du démarrage FastAPI)
         from app.services.ai.rag import RAGService
-        rag = RAGService(mistral_api_key=MISTRAL_API_KEY, chroma_persist_dir=str(CHROMA_DB_DIR))
+        rag = RAGService(mistral_api_key=MISTRAL_API_KEY, chroma_persist_dir=str(CHROMA_DB_DIR), api_url=MISTRAL_API_URL)
         services.rag_service = rag
     knowledge_file = Path(__file__).parents[2] / "data" / "knowledge_base" / "faq_documents.json"
     await rag.load_from_file(str(knowledge_file))
@@ -0,0 +1,317 @@
+"""
+Serveur HTTP local imitant l'API Mistral pour les tests et benchmarks hors ligne
+
+Endpoints émulés:
+    POST /v1/chat/completions   réponses canned (labels de classification
+                                Atlas ou réponse SAV Freeda)
+    POST /v1/embeddings         vecteurs déterministes (dimension 1024)
+    GET  /v1/models             liste de modèles
+    GET  /stats                 compteurs de requêtes par endpoint et statut
+
+Latence log-normale, taux d'erreurs 5xx et de 429 configurables. Mode
+record (proxy vers l'API réelle avec enregistrement) et replay (réponses
+enregistrées rejouées par hash de requête).
+
+Usage:
+    python tools/mock_mistral_server.py --port 8089 --latency-median-ms 400 --rate-limit-rate 0.02
+    python tools/mock_mistral_server.py --record recordings.jsonl --upstream https://api.mistral.ai
+    python tools/mock_mistral_server.py --replay recordings.jsonl
+
+Puis pointer les clients dessus:
+    Atlas:  MISTRAL_SERVER_URL=http://127.0.0.1:8089
+    Freeda: MISTRAL_API_URL=http://127.0.0.1:8089
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+EMBEDDING_DIM = 1024
+
+# Règles mots-clés -> labels pour des classifications plausibles
+_KEYWORD_MOTIFS = [
+    (("factur", "prélev", "rembours", "paiement"), "Facturation"),
+    (("réseau", "reseau", "4g", "5g", "antenne", "coupure", "coupé"), "Réseau"),
+    (("box", "fibre", "wifi", "débit", "panne", "tv"), "Technique"),
+    (("abonnement", "offre", "forfait", "résili"), "Abonnement"),
+    (("conseiller", "service client", "hotline", "sav"), "Service client"),
+]
+_NEGATIVE = ("panne", "marre", "nul", "honte", "bloqué", "impossible", "coupé", "scandale")
+_POSITIVE = ("merci", "top", "bravo", "rapide", "parfait")
+_URGENT = ("urgent", "bloqué", "aucun accès", "depuis", "impossible")
+_CHURN = ("résili", "changer d'opérateur", "je vais partir", "marre", "concurrence")
+
+
+class MockConfig:
+    """
+    Paramètres du serveur (modifiables à chaud en tests)
+    """
+
+    def __init__(
+        self,
+        latency_median_ms: float = 0.0,
+        latency_sigma: float = 0.5,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        malformed_rate: float = 0.0,
+        seed: Optional[int] = None,
+        record_path: Optional[Path] = None,
+        replay_path: Optional[Path] = None,
+        upstream: str = "https://api.mistral.ai"
+    ):
+        self.latency_median_ms = latency_median_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.malformed_rate = malformed_rate
+        self.rng = random.Random(seed)
+        self.record_path = record_path
+        self.upstream = upstream.rstrip("/")
+        self.replay: Dict[str, Dict] = {}
+        if replay_path is not None:
+            self.replay = _load_recordings(replay_path)
+        self.stats = Counter()
+        self.lock = threading.Lock()
+
+
+def _request_key(path: str, payload: Dict) -> str:
+    canonical = json.dumps({"path": path, "payload": payload}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _load_recordings(path: Path) -> Dict[str, Dict]:
+    recordings = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                recordings[entry["key"]] = entry
+    return recordings
+
+
+def _seeded_rng(text: str) -> random.Random:
+    return random.Random(int(hashlib.md5(text.encode("utf-8")).hexdigest()[:16], 16))
+
+
+def canned_labels(tweet: str) -> Dict[str, str]:
+    """
+    Labels déterministes pour un tweet (mots-clés, sinon tirage par hash)
+    """
+    t = tweet.lower()
+    rng = _seeded_rng(t)
+    motif = next((m for keys, m in _KEYWORD_MOTIFS if any(k in t for k in keys)), None)
+    motif = motif or rng.choice(["Technique", "Réseau", "Abonnement", "Facturation", "Service client", "Autre"])
+    if any(k in t for k in _NEGATIVE):
+        sentiment = "négatif"
+    elif any(k in t for k in _POSITIVE):
+        sentiment = "positif"
+    else:
+        sentiment = rng.choice(["neutre", "négatif"])
+    return {
+        "motif": motif,
+        "sentiment": sentiment,
+        "urgence": "élevée" if any(k in t for k in _URGENT) else rng.choice(["faible", "moyenne"]),
+        "risque_churn": "élevé" if any(k in t for k in _CHURN) else rng.choice(["faible", "faible", "modéré"]),
+    }
+
+
+def canned_embedding(text: str, dim: int = EMBEDDING_DIM) -> list:
+    """
+    Vecteur unitaire déterministe: textes identiques -> embeddings identiques
+    """
+    rng = _seeded_rng(text)
+    vec = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+    norm = sum(v * v for v in vec) ** 0.5 or 1.0
+    return [v / norm for v in vec]
+
+
+def _chat_response(payload: Dict, config: MockConfig) -> Dict:
+    messages = payload.get("messages", [])
+    system = next((m["content"] for m in messages if m.get("role") == "system"), "")
+    user = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+
+    if "risque_churn" in system:
+        # Classification Atlas: le tweet est entre guillemets dans le prompt
+        first_user = next((m["content"] for m in messages if m.get("role") == "user"), "")
+        tweet = first_user.split('"', 1)[-1].rsplit('"', 1)[0]
+        content = json.dumps(canned_labels(tweet), ensure_ascii=False)
+        if config.malformed_rate and config.rng.random() < config.malformed_rate:
+            content = "Voici l'analyse demandée: " + content[: len(content) // 2]
+    else:
+        content = f"Bonjour, nous avons bien pris en compte votre demande ({user[:60]}).\n-- Agent Free"
+
+    prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in messages)
+    completion_tokens = len(content.split())
+    return {
+        "id": f"mock-{hashlib.md5(content.encode('utf-8')).hexdigest()[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": payload.get("model", "mock"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+
+def _embeddings_response(payload: Dict) -> Dict:
+    inputs = payload.get("input", [])
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    return {
+        "id": "mock-embeddings",
+        "object": "list",
+        "model": payload.get("model", "mistral-embed"),
+        "data": [{"object": "embedding", "index": i, "embedding": canned_embedding(text)} for i, text in enumerate(inputs)],
+        "usage": {"prompt_tokens": sum(len(t.split()) for t in inputs), "total_tokens": sum(len(t.split()) for t in inputs)},
+    }
+
+
+def _forward_upstream(path: str, body: bytes, headers: Dict[str, str], config: MockConfig) -> Tuple[int, Dict]:
+    request = urllib.request.Request(
+        config.upstream + path,
+        data=body,
+        headers={"Authorization": headers.get("Authorization", ""), "Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, {"message": e.read().decode("utf-8", "replace")}
+
+
+class MockMistralHandler(BaseHTTPRequestHandler):
+    config: MockConfig = MockConfig()
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: Dict, extra_headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (extra_headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+        with self.config.lock:
+            self.config.stats[f"{self.path} {status}"] += 1
+
+    def do_GET(self):
+        if self.path == "/stats":
+            with self.config.lock:
+                stats = dict(self.config.stats)
+            self._send(200, stats)
+        elif self.path == "/v1/models":
+            models = ["mistral-medium-latest", "mistral-small-latest", "mistral-embed"]
+            self._send(200, {"object": "list", "data": [{"id": m, "object": "model"} for m in models]})
+        else:
+            self._send(404, {"message": "Not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        try:
+            payload = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            self._send(400, {"message": "Invalid JSON"})
+            return
+
+        config = self.config
+        if config.latency_median_ms > 0:
+            delay = config.rng.lognormvariate(0.0, config.latency_sigma) * config.latency_median_ms / 1000
+            time.sleep(delay)
+
+        draw = config.rng.random()
+        if draw < config.rate_limit_rate:
+            self._send(429, {"message": "Requests rate limit exceeded"}, {"Retry-After": "1"})
+            return
+        if draw < config.rate_limit_rate + config.error_rate:
+            self._send(503, {"message": "Service unavailable"})
+            return
+
+        key = _request_key(self.path, payload)
+        if config.replay:
+            entry = config.replay.get(key)
+            if entry is None:
+                self._send(404, {"message": "Requête absente de l'enregistrement"})
+            else:
+                self._send(entry["status"], entry["response"])
+            return
+
+        if config.record_path is not None:
+            status, response = _forward_upstream(self.path, body, dict(self.headers), config)
+            with config.lock:
+                with open(config.record_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"key": key, "path": self.path, "status": status, "response": response}, ensure_ascii=False) + "\n")
+            self._send(status, response)
+            return
+
+        if self.path == "/v1/chat/completions":
+            self._send(200, _chat_response(payload, config))
+        elif self.path == "/v1/embeddings":
+            self._send(200, _embeddings_response(payload))
+        else:
+            self._send(404, {"message": "Not found"})
+
+
+def start_mock_server(host: str = "127.0.0.1", port: int = 0, config: Optional[MockConfig] = None) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Démarre le serveur dans un thread (port=0: port libre); retourne (serveur, url)
+    A arrêter avec server.shutdown()
+    """
+    handler = type("ConfiguredHandler", (MockMistralHandler,), {"config": config or MockConfig()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur Mistral simulé pour tests et benchmarks hors ligne")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-median-ms", type=float, default=300.0, help="Latence médiane (loi log-normale)")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Dispersion de la latence (sigma log-normal)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Part de réponses 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Part de réponses 429")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Part de classifications tronquées")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--record", type=str, default=None, help="Proxy vers --upstream et enregistre les échanges (JSONL)")
+    parser.add_argument("--replay", type=str, default=None, help="Rejoue un enregistrement JSONL")
+    parser.add_argument("--upstream", type=str, default="https://api.mistral.ai")
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency_median_ms=args.latency_median_ms,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        malformed_rate=args.malformed_rate,
+        seed=args.seed,
+        record_path=Path(args.record) if args.record else None,
+        replay_path=Path(args.replay) if args.replay else None,
+        upstream=args.upstream,
+    )
+    handler = type("ConfiguredHandler", (MockMistralHandler,), {"config": config})
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    print(f"Serveur Mistral simulé sur http://{args.host}:{args.port} (Ctrl+C pour arrêter)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()